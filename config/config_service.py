@@ -0,0 +1,137 @@
+from __future__ import annotations
+import json
+import logging
+import threading
+from pathlib import Path
+
+from utils.path_helper import resource_path
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = resource_path("config/app_config.json")
+
+
+class ConfigService:
+    """
+    Service config dùng chung cho toàn app.
+    Cache dict đã parse từ app_config.json, chỉ đọc lại file khi mtime/size thay đổi
+    hoặc khi gọi invalidate() (ví dụ sau khi lưu Settings).
+    Giá trị override (set_overrides) chỉ nằm trong bộ nhớ, ưu tiên hơn file và không bao giờ bị ghi ra file.
+    """
+
+    def __init__(self, path: Path = CONFIG_FILE) -> None:
+        self.path = Path(path)
+        self._data: dict = {}
+        self._signature: tuple[int, int] | None = None
+        self._loaded = False
+        self._overrides: dict = {}
+        self._lock = threading.RLock()
+
+    # =========================
+    # Cache
+    # =========================
+    def _file_signature(self) -> tuple[int, int] | None:
+        try:
+            st = self.path.stat()
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _ensure_fresh(self) -> dict:
+        """Reload nếu file đã thay đổi kể từ lần đọc trước"""
+        with self._lock:
+            signature = self._file_signature()
+            if self._loaded and signature == self._signature:
+                return self._data
+
+            if signature is None:
+                logger.warning(f"Config file not found, using defaults: {self.path}")
+                self._data = {}
+            else:
+                try:
+                    self._data = json.loads(self.path.read_text(encoding="utf-8"))
+                    logger.info(f"⚙️ Config loaded: {self.path}")
+                except Exception as e:
+                    logger.error(f"Error reading config: {e}")
+                    self._data = {}
+
+            self._signature = signature
+            self._loaded = True
+            return self._data
+
+    def invalidate(self) -> None:
+        """Buộc đọc lại file ở lần truy cập tiếp theo"""
+        with self._lock:
+            self._loaded = False
+
+    def set_overrides(self, **values) -> None:
+        """Ghi đè key trong bộ nhớ cho process hiện tại (ví dụ tham số dòng lệnh)"""
+        with self._lock:
+            self._overrides.update(values)
+
+    # =========================
+    # Read
+    # =========================
+    def load(self) -> dict:
+        """Trả về bản sao toàn bộ config (đã áp override)"""
+        with self._lock:
+            return {**self._ensure_fresh(), **self._overrides}
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            if key in self._overrides:
+                return self._overrides[key]
+            return self._ensure_fresh().get(key, default)
+
+    def get_str(self, key: str, default: str = "") -> str:
+        value = self.get(key, default)
+        return default if value is None else str(value)
+
+    def get_int(self, key: str, default: int = 0) -> int:
+        try:
+            return int(self.get(key, default))
+        except (TypeError, ValueError):
+            logger.warning(f"Config '{key}' is not an integer, using {default}")
+            return default
+
+    def get_float(self, key: str, default: float = 0.0) -> float:
+        try:
+            return float(self.get(key, default))
+        except (TypeError, ValueError):
+            logger.warning(f"Config '{key}' is not a number, using {default}")
+            return default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self.get(key, default)
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+
+    def get_path(self, key: str) -> Path | None:
+        """Trả về Path nếu key có giá trị, None nếu rỗng"""
+        value = self.get_str(key).strip()
+        return Path(value) if value else None
+
+    # =========================
+    # Write
+    # =========================
+    def save(self, data: dict) -> None:
+        """Ghi toàn bộ config (ghi file tạm rồi replace) và cập nhật cache"""
+        with self._lock:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.path)
+            self._data = dict(data)
+            self._signature = self._file_signature()
+            self._loaded = True
+
+    def update(self, **values) -> None:
+        """Merge các key vào config hiện tại rồi lưu"""
+        with self._lock:
+            data = dict(self._ensure_fresh())
+            data.update(values)
+            self.save(data)
+
+
+# Singleton
+config_service = ConfigService()
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from pathlib import Path
+
+import httpx
+from PIL import Image
+
+from config.config_service import config_service
+from core import metrics
+from core.cancel import CancelToken, OperationCancelled
+from core.ocr_extract import SSE_DONE, OCRClient, describe_image, parse_sse_line
+from core.status import status_manager
+
+
+class AsyncOCREngine:
+    """
+    Engine OCR dùng asyncio + httpx.AsyncClient, chạy trên 1 event loop riêng (luồng nền).
+    - Semaphore giới hạn số request đang bay (`max_in_flight`), phần còn lại xếp hàng trong loop
+    - Timeout tổng cho mỗi request (`request_timeout`), ngoài timeout kết nối/đọc của httpx
+    - cancel_all() huỷ ngay các request đang chạy (đóng kết nối HTTP, không chờ server trả lời)
+    Facade đồng bộ: submit() trả về concurrent.futures.Future, ocr() chờ kết quả —
+    cùng interface với OCRClient nên dùng được cho call_qwen_ocr / ocr_tiled.
+    """
+
+    def __init__(self, max_in_flight: int = 64, max_retries: int = 2, timeout: float = 180,
+                 request_timeout: float = 300) -> None:
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.request_timeout = request_timeout
+        self._pending: set[Future] = set()
+        self._pending_lock = threading.Lock()
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="ocr-async-loop", daemon=True)
+        self._thread.start()
+
+        async def _setup():
+            # httpx chỉ retry lỗi kết nối; lỗi đọc không retry (request OCR dài)
+            transport = httpx.AsyncHTTPTransport(retries=max_retries)
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(timeout, connect=10.0, pool=None),
+                limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+                headers={"Content-Type": "application/json"},
+            )
+            return client, asyncio.Semaphore(max_in_flight)
+
+        self._client, self._semaphore = asyncio.run_coroutine_threadsafe(_setup(), self._loop).result()
+
+    # =========================
+    # Coroutine phía event loop
+    # =========================
+    async def _request(self, url: str, payload: dict, on_partial, file_metrics) -> str:
+        # Event loop không thấy contextvars của luồng gọi → FileMetrics được truyền vào
+        async with self._semaphore:
+            start = time.perf_counter()
+            if not payload["stream"]:
+                resp = await self._client.post(url, json=payload)
+                resp.raise_for_status()
+                data = resp.json()
+                if "choices" not in data or not data["choices"]:
+                    raise ValueError("Invalid OCR response (no 'choices').")
+                if file_metrics is not None:
+                    file_metrics.add_usage(data.get("usage"))
+                return data["choices"][0]["message"]["content"]
+
+            parts = []
+            async with self._client.stream("POST", url, json=payload) as resp:
+                resp.raise_for_status()
+                if "text/event-stream" not in resp.headers.get("Content-Type", ""):
+                    # Server bỏ qua `stream` → JSON thường
+                    await resp.aread()
+                    data = resp.json()
+                    if "choices" not in data or not data["choices"]:
+                        raise ValueError("Invalid OCR response (no 'choices').")
+                    if file_metrics is not None:
+                        file_metrics.add_usage(data.get("usage"))
+                    parts.append(data["choices"][0]["message"]["content"])
+                    if on_partial is not None:
+                        on_partial(parts[0])
+                    return parts[0]
+
+                usage = {}
+                async for line in resp.aiter_lines():
+                    delta = parse_sse_line(line, usage)
+                    if delta is SSE_DONE:
+                        break
+                    if delta:
+                        if not parts and file_metrics is not None:
+                            file_metrics.add("first_token", (time.perf_counter() - start) * 1000)
+                        parts.append(delta)
+                        if on_partial is not None:
+                            on_partial("".join(parts))
+                if file_metrics is not None:
+                    file_metrics.add_usage(usage)
+            return "".join(parts)
+
+    async def _run(self, url: str, payload: dict, on_partial, file_metrics) -> str:
+        return await asyncio.wait_for(self._request(url, payload, on_partial, file_metrics), self.request_timeout)
+
+    # =========================
+    # Facade đồng bộ
+    # =========================
+    def submit(self, image: str | Path | Image.Image, prompt_text: str, on_partial=None) -> "Future[str]":
+        """
+        Encode ảnh ở luồng gọi rồi đưa request vào event loop.
+        on_partial(text) (nếu có) chạy trên luồng event loop; raise trong callback sẽ huỷ request.
+        """
+        stream = on_partial is not None or config_service.get_bool("stream", False)
+        url, payload = OCRClient.build_request(image, prompt_text, stream)
+        future = asyncio.run_coroutine_threadsafe(self._run(url, payload, on_partial, metrics.current()), self._loop)
+        with self._pending_lock:
+            self._pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: Future) -> None:
+        with self._pending_lock:
+            self._pending.discard(future)
+
+    def ocr(self, image: str | Path | Image.Image, prompt_text: str, on_partial=None,
+            cancel: CancelToken | None = None) -> str:
+        """
+        Bản blocking của submit(), log giống OCRClient.ocr.
+        `cancel` huỷ → task trên event loop bị huỷ (đóng kết nối) và raise OperationCancelled ngay.
+        """
+        base_url = config_service.get_str("base_url", "http://127.0.0.1:1234/v1")
+        future = None
+        try:
+            status_manager.add(f"🔄 Sending OCR request to: {base_url} (async)")
+            status_manager.add(f"📸 Processing: {describe_image(image)}")
+            start = time.perf_counter()
+            future = self.submit(image, prompt_text, on_partial=on_partial)
+            if cancel is not None:
+                cancel.on_cancel(future.cancel)
+            result = future.result()
+            status_manager.add(f"✅ OCR completed successfully ({time.perf_counter() - start:.1f}s).")
+            return result
+
+        except CancelledError:
+            status_manager.add("🛑 Đã huỷ request OCR")
+            raise OperationCancelled("OCR request cancelled") from None
+        except httpx.ConnectError as e:
+            status_manager.add(f"❌ Connection failed: {e}")
+            status_manager.add(f"🔍 Check BASE_URL: {base_url}")
+            raise
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            status_manager.add(f"❌ Request timeout (>{self.request_timeout:.0f}s)")
+            raise
+        except httpx.HTTPStatusError as e:
+            status_manager.add(f"❌ HTTP Error: {e}")
+            status_manager.add(f"Response: {e.response.text}")
+            raise
+        except Exception as e:
+            status_manager.add(f"❌ OCR failed: {e}")
+            raise
+        finally:
+            if cancel is not None and future is not None:
+                cancel.remove_callback(future.cancel)
+
+    def in_flight(self) -> int:
+        """Số request chưa xong (đang chạy hoặc đang chờ semaphore)"""
+        with self._pending_lock:
+            return len(self._pending)
+
+    def cancel_all(self) -> int:
+        """Huỷ mọi request chưa xong; các luồng đang chờ nhận CancelledError ngay. Trả về số request bị huỷ"""
+        with self._pending_lock:
+            pending = list(self._pending)
+        cancelled = sum(1 for f in pending if f.cancel())
+        if cancelled:
+            status_manager.add(f"🛑 Đã huỷ {cancelled} request OCR")
+        return cancelled
+
+    def close(self) -> None:
+        """Huỷ request còn lại, đóng client và dừng event loop"""
+        self.cancel_all()
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_engine: AsyncOCREngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_async_ocr_engine() -> AsyncOCREngine:
+    """
+    AsyncOCREngine dùng chung (tạo lần đầu từ config):
+    - ocr_max_in_flight: số request đồng thời tối đa tới server
+    - ocr_max_retries: số lần retry lỗi kết nối
+    - ocr_request_timeout: timeout tổng cho 1 request (giây)
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncOCREngine(
+                max_in_flight=max(1, config_service.get_int("ocr_max_in_flight", 64)),
+                max_retries=config_service.get_int("ocr_max_retries", 2),
+                request_timeout=max(1.0, config_service.get_float("ocr_request_timeout", 300)),
+            )
+        return _engine
@@ -0,0 +1,57 @@
+from __future__ import annotations
+import threading
+
+
+class OperationCancelled(Exception):
+    """Thao tác bị dừng qua CancelToken"""
+
+
+class CancelToken:
+    """
+    Token huỷ hợp tác, truyền từ worker xuống upscale / OCR / ghi file.
+    - Code chạy lâu gọi raise_if_cancelled() giữa các bước (ví dụ giữa các dải ảnh)
+    - Thao tác chặn (HTTP, Future) đăng ký on_cancel() để bị huỷ ngay khi cancel()
+    - wait(timeout) thay cho sleep: trả về sớm khi bị huỷ
+    """
+
+    def __init__(self, event=None) -> None:
+        # `event`: Event có sẵn (ví dụ multiprocessing.Event dùng chung với process con)
+        self._event = event if event is not None else threading.Event()
+        self._callbacks: list = []
+        self._lock = threading.Lock()
+
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback) -> None:
+        """Gọi `callback()` khi token bị huỷ (gọi ngay nếu đã huỷ)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OperationCancelled("Operation cancelled")
+
+    def wait(self, timeout: float) -> bool:
+        """Chờ tối đa `timeout` giây; True nếu bị huỷ trong lúc chờ"""
+        return self._event.wait(timeout)
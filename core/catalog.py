@@ -0,0 +1,303 @@
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from core.status import status_manager
+
+CATALOG_FILE_NAME = ".catalog.sqlite"
+
+# Trạng thái folder output (giống badge trên FileLogPage)
+STATUS_SUCCESS = "Success"   # có original + processed + text
+STATUS_PARTIAL = "Partial"   # có processed nhưng thiếu phần khác
+STATUS_PENDING = "Pending"
+
+# Thứ tự sắp xếp → ORDER BY (tên hiển thị trong combobox của FileLogPage)
+SORT_ORDERS = {
+    "Date (Newest)": "mtime DESC",
+    "Date (Oldest)": "mtime ASC",
+    "Name (A-Z)": "name_lower ASC",
+    "Name (Z-A)": "name_lower DESC",
+    "Size (Largest)": "bytes DESC",
+    "Size (Smallest)": "bytes ASC",
+}
+
+
+@dataclass
+class FolderEntry:
+    """1 folder output (output/{img_name}) trong catalog"""
+    name: str
+    path: Path
+    status: str
+    files: int
+    bytes: int
+    mtime: float
+
+
+def _signature(folder: Path) -> float:
+    """
+    Mốc thay đổi của folder: mtime lớn nhất của folder và các thư mục con trực tiếp
+    (original/processed/text — ghi file qua os.replace làm đổi mtime thư mục chứa nó)
+    """
+    sig = folder.stat().st_mtime
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                sig = max(sig, entry.stat(follow_symlinks=False).st_mtime)
+    return sig
+
+
+def scan_folder(folder: Path) -> tuple[str, int, int]:
+    """Duyệt 1 folder output: trả về (status, số file, tổng byte)"""
+    files = 0
+    total = 0
+    non_empty = set()
+    for root, _, names in os.walk(folder):
+        if not names:
+            continue
+        rel = Path(root).relative_to(folder).parts
+        if rel:
+            non_empty.add(rel[0])
+        for name in names:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                continue
+
+    if {"text", "processed", "original"} <= non_empty:
+        status = STATUS_SUCCESS
+    elif "processed" in non_empty:
+        status = STATUS_PARTIAL
+    else:
+        status = STATUS_PENDING
+    return status, files, total
+
+
+class StorageCatalog:
+    """
+    Chỉ mục (SQLite) các folder output của 1 storage root: trạng thái, số file, dung lượng, mtime.
+    - Pipeline gọi refresh(img_name) sau khi ghi output → không cần duyệt lại cả cây
+    - reconcile(): so mtime từng folder với bản ghi, chỉ quét lại folder đã đổi, xoá folder đã mất
+    - sync_root(): chỉ so danh sách folder cấp 1 (thêm / xoá) — dùng khi watcher báo root đổi
+    - query()/totals(): tìm kiếm, sắp xếp, phân trang bằng SQL
+    - subscribe(callback): nhận tên các folder vừa đổi trong catalog (UI cập nhật đúng phần bị ảnh hưởng)
+    Folder / file bắt đầu bằng "." (cache, catalog, thumbnail...) không được đưa vào.
+    """
+
+    def __init__(self, output_root: Path) -> None:
+        self.output_root = Path(output_root)
+        self.db_path = self.output_root / CATALOG_FILE_NAME
+        self._lock = threading.Lock()
+        self._subscribers: list[Callable[[set[str]], None]] = []
+        self.output_root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS folders (
+                name TEXT PRIMARY KEY,
+                name_lower TEXT NOT NULL,
+                status TEXT NOT NULL,
+                files INTEGER NOT NULL,
+                bytes INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                signature REAL NOT NULL,
+                scanned_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_mtime ON folders(mtime)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_bytes ON folders(bytes)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_folders_name ON folders(name_lower)")
+        self._conn.commit()
+
+    # =========================
+    # Thông báo thay đổi
+    # =========================
+    def subscribe(self, callback: Callable[[set[str]], None]) -> Callable[[], None]:
+        """
+        Đăng ký nhận set tên folder vừa được thêm / cập nhật / xoá; trả về hàm huỷ đăng ký.
+        `callback` chạy trên luồng thay đổi catalog (luồng pipeline) — UI Qt cần chuyển qua Signal.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    def _notify(self, names: set[str]) -> None:
+        if not names:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(set(names))
+            except Exception:
+                pass
+
+    # =========================
+    # Cập nhật
+    # =========================
+    def _row(self, folder: Path, signature: float | None = None) -> tuple:
+        status, files, total = scan_folder(folder)
+        if signature is None:
+            signature = _signature(folder)
+        return (folder.name, folder.name.lower(), status, files, total,
+                folder.stat().st_mtime, signature, time.time())
+
+    def _upsert(self, rows: list[tuple]) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO folders (name, name_lower, status, files, bytes, mtime, signature, scanned_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def refresh(self, name: str) -> None:
+        """Quét lại 1 folder (sau khi pipeline / editor ghi vào nó); folder không còn thì xoá khỏi catalog"""
+        folder = self.output_root / name
+        try:
+            row = self._row(folder)
+        except FileNotFoundError:
+            self.remove(name)
+            return
+        with self._lock:
+            self._upsert([row])
+            self._conn.commit()
+        self._notify({name})
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM folders WHERE name = ?", (name,)).rowcount
+            self._conn.commit()
+        if deleted:
+            self._notify({name})
+
+    def names(self) -> set[str]:
+        with self._lock:
+            return {name for (name,) in self._conn.execute("SELECT name FROM folders")}
+
+    def _list_root(self) -> dict[str, Path]:
+        """Folder output cấp 1 hiện có (bỏ qua mục bắt đầu bằng ".")"""
+        folders = {}
+        with os.scandir(self.output_root) as it:
+            for entry in it:
+                if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False):
+                    folders[entry.name] = Path(entry.path)
+        return folders
+
+    def sync_root(self) -> tuple[set[str], set[str]]:
+        """
+        Chỉ đồng bộ danh sách folder cấp 1: quét folder mới, xoá bản ghi folder đã mất.
+        Không stat lại folder đã biết (rẻ với hàng chục nghìn folder). Trả về (added, removed).
+        """
+        known = self.names()
+        folders = self._list_root()
+        rows = []
+        for name in folders.keys() - known:
+            try:
+                rows.append(self._row(folders[name]))
+            except OSError:
+                continue
+        added = {row[0] for row in rows}
+        removed = known - folders.keys()
+        with self._lock:
+            self._upsert(rows)
+            self._conn.executemany("DELETE FROM folders WHERE name = ?", [(n,) for n in removed])
+            self._conn.commit()
+        self._notify(added | removed)
+        return added, removed
+
+    def reconcile(self) -> int:
+        """
+        Đồng bộ catalog với thư mục: chỉ quét lại folder mới / có mtime khác bản ghi,
+        xoá bản ghi của folder đã bị xoá. Trả về số folder đã quét lại.
+        """
+        with self._lock:
+            known = dict(self._conn.execute("SELECT name, signature FROM folders").fetchall())
+
+        rows = []
+        folders = self._list_root()
+        for name, folder in folders.items():
+            try:
+                signature = _signature(folder)
+                if known.get(name) == signature:
+                    continue
+                rows.append(self._row(folder, signature))
+            except OSError:
+                continue
+
+        gone = [name for name in known if name not in folders]
+        with self._lock:
+            self._upsert(rows)
+            self._conn.executemany("DELETE FROM folders WHERE name = ?", [(n,) for n in gone])
+            self._conn.commit()
+        if rows or gone:
+            status_manager.add(f"🗂️ Catalog: quét lại {len(rows)} folder, xoá {len(gone)}")
+            self._notify({row[0] for row in rows} | set(gone))
+        return len(rows)
+
+    # =========================
+    # Truy vấn
+    # =========================
+    @staticmethod
+    def _where(search: str) -> tuple[str, tuple]:
+        if not search:
+            return "", ()
+        return " WHERE instr(name_lower, ?) > 0", (search.lower(),)
+
+    def query(self, search: str = "", sort: str = "Date (Newest)", limit: int = 5, offset: int = 0) -> list[FolderEntry]:
+        where, params = self._where(search)
+        order = SORT_ORDERS.get(sort, SORT_ORDERS["Date (Newest)"])
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, status, files, bytes, mtime FROM folders{where} "
+                f"ORDER BY {order}, name_lower ASC LIMIT ? OFFSET ?",
+                (*params, limit, offset),
+            ).fetchall()
+        return [FolderEntry(name, self.output_root / name, status, files, size, mtime)
+                for name, status, files, size, mtime in rows]
+
+    def totals(self, search: str = "") -> tuple[int, int]:
+        """(số folder, tổng byte) khớp `search`"""
+        where, params = self._where(search)
+        with self._lock:
+            count, total = self._conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM folders{where}", params
+            ).fetchone()
+        return count, total
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_catalogs: dict[Path, StorageCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(output_root: Path) -> StorageCatalog:
+    """StorageCatalog của storage root (mỗi root 1 file SQLite, tạo lần đầu)"""
+    root = Path(output_root).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(root)
+        if catalog is None:
+            catalog = _catalogs[root] = StorageCatalog(root)
+        return catalog
+
+
+def record_output(output_root: Path, img_name: str) -> None:
+    """Cập nhật catalog sau khi pipeline ghi output của 1 ảnh (lỗi catalog không làm hỏng pipeline)"""
+    try:
+        get_catalog(output_root).refresh(img_name)
+    except (OSError, sqlite3.Error) as e:
+        status_manager.add(f"⚠️ Catalog update failed: {e}")
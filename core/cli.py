@@ -0,0 +1,137 @@
+"""
+Chạy pipeline OCR không cần giao diện (không import PySide6), dùng cho batch trên server / cron / container.
+
+    python -m core.cli scans/ https://example.com/a.png -o /data/output -c 4
+    python -m core.cli -i list.txt --no-cache > progress.jsonl
+
+Tiến trình được ghi ra stdout dạng JSON lines (1 event/dòng), log pipeline ra stderr.
+Exit code: 0 = tất cả thành công, 1 = có ảnh lỗi, 2 = tham số / input không hợp lệ.
+"""
+from __future__ import annotations
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+from config.config_service import config_service
+from core.cancel import CancelToken
+from core.status import status_manager
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="OCR-Medical: upscale (Waifu2x) + OCR (Qwen VL) cho file, folder hoặc URL.",
+    )
+    parser.add_argument("inputs", nargs="*", help="File ảnh, folder hoặc URL")
+    parser.add_argument("-i", "--input-list", metavar="FILE",
+                        help="File chứa danh sách input, mỗi dòng 1 input ('-' = stdin)")
+    parser.add_argument("-o", "--output", metavar="DIR",
+                        help="Thư mục output (mặc định: storage_path trong config)")
+    parser.add_argument("-c", "--concurrency", type=int, metavar="N",
+                        help="Số request OCR song song (mặc định: ocr_concurrency)")
+    parser.add_argument("--upscale-workers", type=int, metavar="N",
+                        help="Số process upscale, 0 = tự động (mặc định: upscale_workers)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bỏ qua cache OCR (luôn upscale + OCR lại, không ghi cache)")
+    parser.add_argument("--base-url", help="Endpoint OpenAI-compatible, ví dụ http://localhost:1234/v1")
+    parser.add_argument("--model", help="Model id gửi tới server OCR")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Không in log pipeline ra stderr")
+    return parser
+
+
+def read_inputs(args) -> list[str]:
+    """Gộp input từ dòng lệnh và --input-list (bỏ dòng trống và dòng bắt đầu bằng #)"""
+    inputs = list(args.inputs)
+    if args.input_list:
+        if args.input_list == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            lines = Path(args.input_list).read_text(encoding="utf-8").splitlines()
+        inputs.extend(line.strip() for line in lines if line.strip() and not line.lstrip().startswith("#"))
+    return inputs
+
+
+class JsonLinesWriter:
+    """Ghi event ra stdout dạng JSON lines (thread-safe, flush từng dòng)"""
+
+    def __init__(self, stream=None) -> None:
+        self.stream = stream or sys.stdout
+        # RLock: signal handler (chạy trên main thread) cũng ghi event
+        self._lock = threading.RLock()
+
+    def __call__(self, event: dict) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), **event}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    # stdout chỉ dành cho JSON lines
+    status_manager.stream = sys.stderr
+    status_manager.echo = not args.quiet
+
+    overrides = {}
+    if args.concurrency is not None:
+        overrides["ocr_concurrency"] = max(1, args.concurrency)
+    if args.upscale_workers is not None:
+        overrides["upscale_workers"] = max(0, args.upscale_workers)
+    if args.base_url:
+        overrides["base_url"] = args.base_url
+    if args.model:
+        overrides["model_id"] = args.model
+    config_service.set_overrides(**overrides)
+
+    emit = JsonLinesWriter()
+
+    from core.pipeline import collect_sources, get_default_output, run_batch
+    from core.upscale_pool import shutdown_upscale_pool
+
+    try:
+        sources = collect_sources(read_inputs(args))
+    except (OSError, ValueError) as e:
+        emit({"event": "error", "error": str(e)})
+        return 2
+    if not sources:
+        emit({"event": "error", "error": "No input images"})
+        return 2
+
+    output_root = Path(args.output) if args.output else get_default_output()
+    output_root.mkdir(parents=True, exist_ok=True)
+
+    # SIGINT/SIGTERM lần 1 → ngừng nhận ảnh mới, chờ ảnh đang OCR xong;
+    # lần 2 → huỷ cả ảnh đang xử lý (không để lại file ghi dở)
+    stop = threading.Event()
+    cancel = CancelToken()
+
+    def _on_signal(signum, frame):
+        if stop.is_set():
+            emit({"event": "cancelling", "signal": signum})
+            cancel.cancel()
+            return
+        stop.set()
+        emit({"event": "stopping", "signal": signum})
+
+    signal.signal(signal.SIGINT, _on_signal)
+    signal.signal(signal.SIGTERM, _on_signal)
+
+    emit({"event": "batch", "total": len(sources), "output": str(output_root),
+          "concurrency": config_service.get_int("ocr_concurrency", 2), "cache": not args.no_cache})
+    try:
+        stats = run_batch(sources, output_root, bypass_cache=args.no_cache,
+                          on_event=emit, should_stop=stop.is_set, cancel=cancel)
+    finally:
+        shutdown_upscale_pool()
+
+    emit({"event": "summary", "stopped": stop.is_set(), **stats})
+    return 1 if stats["failed"] or stats["cancelled"] or stop.is_set() else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+from __future__ import annotations
+import contextvars
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.config_service import config_service
+
+METRICS_FILE_NAME = ".metrics.jsonl"
+
+# Các stage được đo (ms), theo thứ tự trong pipeline — cũng là thứ tự hiển thị ở panel
+STAGES = (
+    "decode",          # mở ảnh nguồn (file / URL) + convert RGB
+    "save_original",   # encode PNG ảnh gốc
+    "preprocess",      # chọn nhánh tiền xử lý (đo nhiễu)
+    "upscale",         # Waifu2x (thời gian tính, không gồm thời gian chờ pool)
+    "save_processed",  # encode PNG ảnh processed (luồng nền)
+    "encode",          # encode ảnh gửi OCR (PNG/JPEG/WebP + base64)
+    "first_token",     # từ lúc gửi request tới token đầu tiên (streaming)
+    "ocr",             # toàn bộ lời gọi OCR (gồm encode, mạng, model sinh text)
+    "save_markdown",   # ghi file Markdown
+    "total",           # từ lúc bắt đầu ảnh tới khi xong (gồm thời gian chờ giữa các tầng)
+)
+
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+class FileMetrics:
+    """
+    Số đo của 1 ảnh: thời gian từng stage (ms, cộng dồn nếu stage chạy nhiều lần — ví dụ OCR theo dải),
+    token usage từ API và vài bộ đếm (payload_bytes...). Thread-safe.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stages: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def add_count(self, key: str, value: int) -> None:
+        with self._lock:
+            self.counts[key] = self.counts.get(key, 0) + value
+
+    def add_usage(self, usage: dict | None) -> None:
+        """Cộng `usage` của response /chat/completions (prompt/completion/total tokens)"""
+        for key in USAGE_KEYS:
+            value = (usage or {}).get(key)
+            if isinstance(value, int):
+                self.add_count(key, value)
+
+    def to_record(self, status: str) -> dict:
+        with self._lock:
+            stages = {k: round(v, 1) for k, v in self.stages.items()}
+            counts = dict(self.counts)
+        stages["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return {"ts": round(time.time(), 3), "name": self.name, "status": status, "stages": stages, **counts}
+
+
+# =====================================================
+#   Span theo ngữ cảnh (contextvars)
+# =====================================================
+# FileMetrics của ảnh đang xử lý trên luồng/context hiện tại.
+# Luồng con (ThreadPoolExecutor) không tự kế thừa → submit qua contextvars.copy_context().run
+_current: contextvars.ContextVar[FileMetrics | None] = contextvars.ContextVar("file_metrics", default=None)
+# Stage đang chạy (span trong cùng) — StatusManager dùng để gắn stage cho thông báo
+_stage: contextvars.ContextVar[str | None] = contextvars.ContextVar("pipeline_stage", default=None)
+
+
+def current() -> FileMetrics | None:
+    return _current.get()
+
+
+def current_stage() -> str | None:
+    return _stage.get()
+
+
+@contextmanager
+def bind(metrics: FileMetrics | None):
+    """Gắn `metrics` làm FileMetrics hiện tại trong khối with"""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(stage: str):
+    """Đánh dấu stage hiện tại và đo thời gian khối with vào FileMetrics hiện tại (nếu đã bind)"""
+    metrics = _current.get()
+    stage_token = _stage.set(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage.reset(stage_token)
+        if metrics is not None:
+            metrics.add(stage, (time.perf_counter() - start) * 1000)
+
+
+def record(stage: str, ms: float) -> None:
+    """Ghi 1 số đo đã có sẵn (ví dụ thời gian tới token đầu) vào FileMetrics hiện tại"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add(stage, ms)
+
+
+def record_usage(usage: dict | None) -> None:
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.add_usage(usage)
+
+
+# =====================================================
+#   File JSON lines + tổng hợp p50/p95
+# =====================================================
+class MetricsLog:
+    """Ghi số đo từng ảnh vào {output_root}/.metrics.jsonl (1 dòng JSON / ảnh, append)"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, metrics: FileMetrics, status: str) -> dict:
+        rec = metrics.to_record(status)
+        line = json.dumps(rec, ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        return rec
+
+    def tail(self, limit: int = 500) -> list[dict]:
+        """`limit` bản ghi cuối (bỏ qua dòng hỏng)"""
+        if not self.path.exists():
+            return []
+        records = deque(maxlen=limit)
+        with self._lock, open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return list(records)
+
+
+_logs: dict[Path, MetricsLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_metrics_log(output_root: Path) -> MetricsLog | None:
+    """
+    MetricsLog của storage root (tạo lần đầu).
+    Trả về None khi tắt ghi số đo (`metrics_enabled` = false).
+    """
+    if not config_service.get_bool("metrics_enabled", True):
+        return None
+    path = (Path(output_root) / METRICS_FILE_NAME).resolve()
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = MetricsLog(path)
+        return log
+
+
+def write_metrics(metrics: FileMetrics | None, output_root: Path, status: str) -> None:
+    """Ghi bản ghi của 1 ảnh (status: done / cached / failed / cancelled); lỗi ghi không làm hỏng pipeline"""
+    if metrics is None:
+        return
+    log = get_metrics_log(output_root)
+    if log is None:
+        return
+    try:
+        log.append(metrics, status)
+    except OSError:
+        pass
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentile theo nearest-rank (q: 0-100)"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(records: list[dict]) -> list[dict]:
+    """
+    Tổng hợp p50/p95 theo stage (ms), token và tốc độ sinh token (tok/s) từ các bản ghi.
+    Trả về list {"name", "unit", "count", "p50", "p95"} theo thứ tự STAGES.
+    """
+    rows = []
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in records if stage in r.get("stages", {})]
+        if values:
+            rows.append({"name": stage, "unit": "ms", "count": len(values),
+                         "p50": percentile(values, 50), "p95": percentile(values, 95)})
+
+    for key in ("prompt_tokens", "completion_tokens"):
+        values = [r[key] for r in records if isinstance(r.get(key), int)]
+        if values:
+            rows.append({"name": key, "unit": "tok", "count": len(values),
+                         "p50": percentile(values, 50), "p95": percentile(values, 95)})
+
+    rates = [r["completion_tokens"] / (r["stages"]["ocr"] / 1000) for r in records
+             if isinstance(r.get("completion_tokens"), int) and r.get("stages", {}).get("ocr")]
+    if rates:
+        # p95 của tốc độ = ảnh chậm nhất 5% → lấy percentile 5
+        rows.append({"name": "generation_rate", "unit": "tok/s", "count": len(rates),
+                     "p50": percentile(rates, 50), "p95": percentile(rates, 5)})
+    return rows
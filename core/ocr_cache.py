@@ -0,0 +1,160 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from PIL import Image
+
+from config.config_service import config_service
+from core.ocr_extract import tiling_settings
+from core.process_image import preprocess_settings
+from core.status import status_manager
+
+CACHE_FILE_NAME = ".ocr_cache.sqlite"
+
+
+def image_digest(img: Image.Image) -> str:
+    """
+    Hash nội dung pixel của ảnh (không phụ thuộc định dạng file / metadata)
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{img.mode}:{img.width}x{img.height}:".encode("utf-8"))
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def ocr_cache_params() -> dict:
+    """
+    Các tham số ảnh hưởng tới kết quả OCR, đưa vào cache key.
+    Đổi bất kỳ giá trị nào → cache miss.
+    """
+    return {
+        "model_id": config_service.get_str("model_id", "qwen/qwen2.5-vl-7b"),
+        "temperature": config_service.get_float("temperature", 0.1),
+        "max_tokens": config_service.get_int("max_tokens", 1500),
+        "wire_format": config_service.get_str("ocr_wire_format", "png").lower(),
+        "wire_quality": config_service.get_int("ocr_wire_quality", 90),
+        "max_side": config_service.get_int("ocr_max_side", 0),
+        "preprocess": preprocess_settings(),
+        "tiling": {k: v for k, v in tiling_settings().items() if k != "concurrency"},
+    }
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    processed_hash: str
+    markdown: str
+
+
+class OCRCache:
+    """
+    Cache kết quả OCR trên đĩa (SQLite), key = hash(ảnh nguồn + prompt + tham số model).
+    Lưu hash ảnh đã upscale và Markdown; khi vượt `max_bytes` thì xoá bản ghi
+    ít được dùng nhất (LRU theo last_access).
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int) -> None:
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                key TEXT PRIMARY KEY,
+                processed_hash TEXT NOT NULL,
+                markdown TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_access ON ocr_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(source_hash: str, prompt: str, params: dict | None = None) -> str:
+        """Cache key từ hash ảnh nguồn, prompt và tham số OCR"""
+        params = ocr_cache_params() if params is None else params
+        h = hashlib.sha256()
+        h.update(source_hash.encode("utf-8"))
+        h.update(prompt.encode("utf-8"))
+        h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT processed_hash, markdown FROM ocr_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE ocr_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return CacheEntry(key=key, processed_hash=row[0], markdown=row[1])
+
+    def put(self, key: str, processed_hash: str, markdown: str) -> None:
+        size = len(markdown.encode("utf-8")) + len(key) + len(processed_hash)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache (key, processed_hash, markdown, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, processed_hash, markdown, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Xoá bản ghi LRU cho tới khi tổng dung lượng <= max_bytes (gọi khi đang giữ lock)"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM ocr_cache ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM ocr_cache WHERE key = ?", evicted)
+        status_manager.add(f"🧹 OCR cache: evicted {len(evicted)} entr{'y' if len(evicted) == 1 else 'ies'}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_caches: dict[Path, OCRCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_ocr_cache(output_root: Path) -> OCRCache | None:
+    """
+    OCRCache của storage root (mỗi root 1 file SQLite, tạo lần đầu).
+    Trả về None khi cache bị tắt (`ocr_cache_enabled` = false).
+    """
+    if not config_service.get_bool("ocr_cache_enabled", True):
+        return None
+
+    db_path = (Path(output_root) / CACHE_FILE_NAME).resolve()
+    max_bytes = max(1, config_service.get_int("ocr_cache_max_mb", 256)) * 1024 * 1024
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = OCRCache(db_path, max_bytes)
+            _caches[db_path] = cache
+        cache.max_bytes = max_bytes
+        return cache
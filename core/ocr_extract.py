@@ -1,44 +1,56 @@
+from __future__ import annotations
 import base64
+import contextvars
 import json
-import requests
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
+from typing import TYPE_CHECKING
+from PIL import Image
+from core import metrics
+from core.cancel import CancelToken, OperationCancelled
 from core.status import status_manager
-from utils.path_helper import resource_path
+from config.config_service import config_service
+
+if TYPE_CHECKING:
+    # Chỉ cho type hint — requests được import khi tạo client đầu tiên
+    import requests
+
+# Định dạng ảnh gửi lên server OCR (wire encoding)
+WIRE_FORMATS = ("png", "jpeg", "webp")
+
+# Chế độ OCR theo dải ngang (tiling) cho ảnh dài / lớn
+TILING_MODES = ("off", "auto", "on")
+
+# Số dòng tối đa ở cuối/đầu 2 dải liền kề được so khớp khi bỏ phần trùng
+MAX_OVERLAP_LINES = 20
+
+TILE_PROMPT_SUFFIX = (
+    "\n\nLưu ý: ảnh này là phần {index}/{total} của một trang dài được cắt theo chiều ngang, "
+    "các phần liền kề chồng lên nhau vài dòng. Chỉ trích xuất nội dung nhìn thấy trong phần này; "
+    "nếu bảng bị cắt thì vẫn trình bày các hàng dưới dạng bảng Markdown với đúng số cột."
+)
 
 
 # =====================================================
-#   Load configuration safely (for .py and .exe)
+#   Load configuration (cache trong config_service)
 # =====================================================
 def load_config() -> dict:
     """
-    Đọc config từ config/app_config.json
-    (tự động tương thích PyInstaller)
+    Trả về config hiện tại từ config_service
+    (chỉ đọc lại app_config.json khi file thay đổi)
     """
-    config_path = resource_path("config/app_config.json")
+    return config_service.load()
 
-    try:
-        if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                status_manager.add("⚙️ Config loaded successfully.")
-                return data
-        else:
-            status_manager.add("⚠️ Config file not found, using defaults.")
-            return {}
-    except Exception as e:
-        status_manager.add(f"❌ Error reading config: {e}")
-        return {}
 
-
-# =====================================================
-#   Get config values (RELOAD mỗi lần gọi)
-# =====================================================
 def get_config_value(key: str, default):
     """
-    Đọc config real-time để luôn lấy giá trị mới nhất
+    Lấy giá trị config mới nhất (không parse lại file nếu không đổi)
     """
-    config = load_config()
-    return config.get(key, default)
+    return config_service.get(key, default)
 
 
 # =====================================================
@@ -72,68 +84,543 @@ def to_data_url(path: str) -> str:
         raise
 
 
+def image_to_data_url(img: Image.Image, fmt: str = "png", quality: int = 90, max_side: int = 0) -> str:
+    """
+    Encode ảnh trong bộ nhớ thành data URL (base64) — không qua file tạm.
+    - fmt: png | jpeg | webp
+    - quality: chất lượng JPEG/WebP (1-100)
+    - max_side: giới hạn cạnh dài nhất (px), 0 = giữ nguyên kích thước
+    """
+    try:
+        if max_side > 0 and max(img.size) > max_side:
+            img = img.copy()
+            img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        buf = BytesIO()
+        if fmt == "jpeg":
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            # subsampling=0 (4:4:4) giữ nét chữ nhỏ
+            img.save(buf, format="JPEG", quality=quality, subsampling=0)
+        elif fmt == "webp":
+            img.save(buf, format="WEBP", quality=quality, method=4)
+        else:
+            img.save(buf, format="PNG")
+
+        b64 = base64.b64encode(buf.getbuffer()).decode("utf-8")
+        return f"data:image/{fmt};base64,{b64}"
+    except Exception as e:
+        status_manager.add(f"❌ Error encoding image: {e}")
+        raise
+
+
+def describe_image(image: str | Path | Image.Image) -> str:
+    """Tên hiển thị của ảnh trong log (path hoặc ảnh trong bộ nhớ)"""
+    if isinstance(image, Image.Image):
+        return f"<in-memory {image.width}x{image.height}>"
+    return Path(image).name
+
+
+SSE_DONE = object()
+
+
+def parse_sse_line(line: str, usage: dict | None = None):
+    """
+    Parse 1 dòng SSE của /chat/completions (stream):
+    trả về text delta, None nếu dòng không có nội dung, SSE_DONE khi gặp `data: [DONE]`.
+    Chunk có `usage` (stream_options.include_usage) được ghi vào dict `usage` nếu truyền vào.
+    """
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if data == "[DONE]":
+        return SSE_DONE
+    chunk = json.loads(data)
+    if "error" in chunk:
+        raise ValueError(f"OCR stream error: {chunk['error']}")
+    if usage is not None and isinstance(chunk.get("usage"), dict):
+        usage.update(chunk["usage"])
+    choices = chunk.get("choices") or []
+    if not choices:
+        return None
+    return (choices[0].get("delta") or {}).get("content")
+
+
 # =====================================================
-#   OCR call to Qwen API
+#   OCR client (Session dùng chung, có connection pool)
 # =====================================================
-def call_qwen_ocr(image_path: str, prompt_text: str) -> str:
-    """
-    Gọi API Qwen OCR với ảnh đã xử lý (png/jpg/jpeg/webp)
-    """
-    # 🔥 RELOAD config mỗi lần gọi để lấy giá trị mới nhất
-    base_url = get_config_value("base_url", "http://127.0.0.1:1234/v1")
-    model_id = get_config_value("model_id", "qwen/qwen2.5-vl-7b")
-    temperature = get_config_value("temperature", 0.1)
-    max_tokens = get_config_value("max_tokens", 1500)
-    stream = get_config_value("stream", False)
-
-    url = f"{base_url}/chat/completions"
-    image_url = to_data_url(image_path)
-
-    payload = {
-        "model": model_id,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt_text},
-                    {"type": "image_url", "image_url": {"url": image_url}},
-                ],
-            }
-        ],
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-        "stream": stream,
-    }
-    headers = {"Content-Type": "application/json"}
+class OCRClient:
+    """
+    Client gọi API Qwen OCR (OpenAI-compatible).
+    Giữ 1 requests.Session dùng chung: keep-alive, connection pool và retry
+    cho lỗi kết nối / 502-504, tránh mở TCP (và TLS) mới cho mỗi ảnh.
+    """
 
-    try:
-        status_manager.add(f"🔄 Sending OCR request to: {base_url}")
-        status_manager.add(f"📸 Processing: {Path(image_path).name}")
-        resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=180)
-        resp.raise_for_status()
-        data = resp.json()
+    def __init__(self, pool_size: int = 8, max_retries: int = 2, timeout: float = 180):
+        # requests/urllib3 nạp khi tạo client đầu tiên (không làm chậm lúc mở app)
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        # Không retry lỗi đọc (read): request OCR dài, gửi lại sẽ tốn gấp đôi thời gian
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    @staticmethod
+    def encode_image(image: str | Path | Image.Image) -> str:
+        """
+        Encode ảnh thành data URL theo cấu hình wire encoding:
+        `ocr_wire_format` (png/jpeg/webp), `ocr_wire_quality`, `ocr_max_side`.
+        Ghi log kích thước payload và thời gian encode.
+        """
+        fmt = config_service.get_str("ocr_wire_format", "png").lower()
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in WIRE_FORMATS:
+            status_manager.add(f"⚠️ Unknown ocr_wire_format '{fmt}', using png")
+            fmt = "png"
+        quality = min(100, max(1, config_service.get_int("ocr_wire_quality", 90)))
+        max_side = max(0, config_service.get_int("ocr_max_side", 0))
+
+        start = time.perf_counter()
+        with metrics.span("encode"):
+            if isinstance(image, Image.Image):
+                data_url = image_to_data_url(image, fmt, quality, max_side)
+            elif fmt == "png" and max_side == 0 and infer_mime_from_filename(str(image)) == "image/png":
+                # File đã đúng định dạng → gửi nguyên bytes, không decode/encode lại
+                data_url = to_data_url(image)
+            else:
+                with Image.open(image) as img:
+                    data_url = image_to_data_url(img, fmt, quality, max_side)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        file_metrics = metrics.current()
+        if file_metrics is not None:
+            file_metrics.add_count("payload_bytes", len(data_url))
+
+        status_manager.add(
+            f"📦 Payload {fmt.upper()}: {len(data_url) / 1024:.0f} KB (base64), encode {elapsed_ms:.0f} ms"
+        )
+        return data_url
+
+    @staticmethod
+    def build_request(image: str | Path | Image.Image, prompt_text: str, stream: bool) -> tuple[str, dict]:
+        """Tạo (url, payload) cho /chat/completions từ config hiện tại (dùng chung với AsyncOCREngine)"""
+        # Config luôn mới nhất (config_service tự reload khi file đổi)
+        base_url = config_service.get_str("base_url", "http://127.0.0.1:1234/v1")
+        model_id = config_service.get_str("model_id", "qwen/qwen2.5-vl-7b")
+        temperature = config_service.get_float("temperature", 0.1)
+        max_tokens = config_service.get_int("max_tokens", 1500)
+
+        image_url = OCRClient.encode_image(image)
+
+        payload = {
+            "model": model_id,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": prompt_text},
+                        {"type": "image_url", "image_url": {"url": image_url}},
+                    ],
+                }
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+        if stream:
+            # Chunk cuối mang token usage (server không hỗ trợ thì bỏ qua)
+            payload["stream_options"] = {"include_usage": True}
+        return f"{base_url}/chat/completions", payload
+
+    @staticmethod
+    def iter_sse_deltas(resp: requests.Response, usage: dict | None = None):
+        """
+        Đọc response SSE (`data: {...}` mỗi dòng, kết thúc bằng `data: [DONE]`)
+        và yield phần text mới (choices[0].delta.content) của từng chunk.
+        """
+        for raw in resp.iter_lines():
+            delta = parse_sse_line(raw.decode("utf-8", errors="replace"), usage)
+            if delta is SSE_DONE:
+                return
+            if delta:
+                yield delta
 
+    def stream_ocr(self, image: str | Path | Image.Image, prompt_text: str, cancel: CancelToken | None = None):
+        """
+        Gọi API ở chế độ streaming (SSE) và yield từng đoạn text (delta) ngay khi server sinh ra.
+        Nếu server bỏ qua `stream` và trả JSON thường thì yield toàn bộ nội dung 1 lần.
+        `cancel`: huỷ → đóng kết nối đang stream và raise OperationCancelled.
+        """
+        url, payload = self.build_request(image, prompt_text, stream=True)
+        resp = self.session.post(url, data=json.dumps(payload), timeout=self.timeout, stream=True)
+        if cancel is not None:
+            cancel.on_cancel(resp.close)
+        try:
+            with resp:
+                resp.raise_for_status()
+                if "text/event-stream" in resp.headers.get("Content-Type", ""):
+                    usage = {}
+                    for delta in self.iter_sse_deltas(resp, usage):
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        yield delta
+                    metrics.record_usage(usage)
+                    return
+                data = resp.json()
+        except Exception:
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            raise
+        finally:
+            if cancel is not None:
+                cancel.remove_callback(resp.close)
         if "choices" not in data or not data["choices"]:
             raise ValueError("Invalid OCR response (no 'choices').")
+        metrics.record_usage(data.get("usage"))
+        yield data["choices"][0]["message"]["content"]
 
-        result = data["choices"][0]["message"]["content"]
-        status_manager.add("✅ OCR completed successfully.")
-        return result
+    def ocr(self, image: str | Path | Image.Image, prompt_text: str, on_partial=None,
+            cancel: CancelToken | None = None) -> str:
+        """
+        Gọi API Qwen OCR với ảnh đã xử lý:
+        path tới file (png/jpg/jpeg/webp) hoặc PIL.Image trong bộ nhớ.
+        Khi truyền `on_partial` (hoặc config `stream` = true) request chạy ở chế độ
+        streaming (xem stream_ocr); on_partial(text) nhận toàn bộ text đã có sau mỗi delta.
+        Có `cancel` thì luôn stream để huỷ được giữa chừng.
+        """
+        import requests  # đã nạp khi tạo client, chỉ để bắt requests.exceptions
 
-    except requests.exceptions.ConnectionError as e:
-        status_manager.add(f"❌ Connection failed: {e}")
-        status_manager.add(f"🔍 Check BASE_URL: {base_url}")
-        raise
-    except requests.exceptions.Timeout:
-        status_manager.add("❌ Request timeout (>180s)")
-        raise
-    except requests.exceptions.HTTPError as e:
-        status_manager.add(f"❌ HTTP Error: {e}")
-        status_manager.add(f"Response: {e.response.text if e.response else 'No response'}")
-        raise
-    except Exception as e:
-        status_manager.add(f"❌ OCR failed: {e}")
-        raise
+        base_url = config_service.get_str("base_url", "http://127.0.0.1:1234/v1")
+        stream = on_partial is not None or cancel is not None or config_service.get_bool("stream", False)
+
+        try:
+            status_manager.add(f"🔄 Sending OCR request to: {base_url}")
+            status_manager.add(f"📸 Processing: {describe_image(image)}")
+
+            if stream:
+                parts = []
+                start = time.perf_counter()
+                for delta in self.stream_ocr(image, prompt_text, cancel=cancel):
+                    if not parts:
+                        first_token = time.perf_counter() - start
+                        metrics.record("first_token", first_token * 1000)
+                        status_manager.add(f"⏱️ First token after {first_token:.1f}s")
+                    parts.append(delta)
+                    if on_partial is not None:
+                        on_partial("".join(parts))
+                result = "".join(parts)
+            else:
+                url, payload = self.build_request(image, prompt_text, stream=False)
+                resp = self.session.post(url, data=json.dumps(payload), timeout=self.timeout)
+                resp.raise_for_status()
+                data = resp.json()
+
+                if "choices" not in data or not data["choices"]:
+                    raise ValueError("Invalid OCR response (no 'choices').")
+
+                result = data["choices"][0]["message"]["content"]
+                metrics.record_usage(data.get("usage"))
+
+            status_manager.add("✅ OCR completed successfully.")
+            return result
+
+        except OperationCancelled:
+            status_manager.add("🛑 Đã huỷ request OCR")
+            raise
+        except requests.exceptions.ConnectionError as e:
+            status_manager.add(f"❌ Connection failed: {e}")
+            status_manager.add(f"🔍 Check BASE_URL: {base_url}")
+            raise
+        except requests.exceptions.Timeout:
+            status_manager.add(f"❌ Request timeout (>{self.timeout:.0f}s)")
+            raise
+        except requests.exceptions.HTTPError as e:
+            status_manager.add(f"❌ HTTP Error: {e}")
+            status_manager.add(f"Response: {e.response.text if e.response else 'No response'}")
+            raise
+        except Exception as e:
+            status_manager.add(f"❌ OCR failed: {e}")
+            raise
+
+    def close(self):
+        """Đóng toàn bộ connection trong pool"""
+        self.session.close()
+
+
+_ocr_client: OCRClient | None = None
+_ocr_client_lock = threading.Lock()
+
+
+def get_ocr_client():
+    """
+    Trả về client OCR dùng chung cho toàn app (tạo lần đầu từ config).
+    - `ocr_engine` = "async" (mặc định): AsyncOCREngine (httpx, asyncio), huỷ được request đang chạy;
+      tự lùi về OCRClient nếu chưa cài httpx
+    - `ocr_engine` = "requests": OCRClient, pool size tối thiểu bằng `ocr_concurrency`
+      để các luồng OCR không phải chờ connection
+    Cả 2 đều có .ocr(image, prompt_text, on_partial=None, cancel=None).
+    """
+    global _ocr_client
+    with _ocr_client_lock:
+        if _ocr_client is None:
+            if config_service.get_str("ocr_engine", "async").lower() == "async":
+                try:
+                    from core.async_ocr import get_async_ocr_engine
+                    _ocr_client = get_async_ocr_engine()
+                    return _ocr_client
+                except ImportError as e:
+                    status_manager.add(f"⚠️ Async OCR engine unavailable ({e}), using requests")
+            concurrency = config_service.get_int("ocr_concurrency", 2)
+            pool_size = max(config_service.get_int("ocr_pool_size", 8), concurrency)
+            max_retries = config_service.get_int("ocr_max_retries", 2)
+            _ocr_client = OCRClient(pool_size=pool_size, max_retries=max_retries)
+        return _ocr_client
+
+
+# =====================================================
+#   Tiled OCR (ảnh dài → nhiều dải ngang chồng lấn)
+# =====================================================
+def tiling_settings() -> dict:
+    """
+    Cấu hình tiling (đọc từ config):
+    - ocr_tiling: "off" | "auto" | "on"
+    - ocr_tile_height: chiều cao mỗi dải (px, trên ảnh đã xử lý)
+    - ocr_tile_overlap: số px chồng lấn giữa 2 dải liền kề
+    - ocr_tile_aspect: (auto) cao/rộng từ đó ảnh được coi là "dài"
+    - ocr_tile_concurrency: số dải OCR song song cho 1 ảnh
+    """
+    mode = config_service.get_str("ocr_tiling", "auto").lower()
+    return {
+        "mode": mode if mode in TILING_MODES else "auto",
+        "tile_height": max(256, config_service.get_int("ocr_tile_height", 2048)),
+        "overlap": max(0, config_service.get_int("ocr_tile_overlap", 160)),
+        "aspect": max(1.0, config_service.get_float("ocr_tile_aspect", 2.0)),
+        "concurrency": max(1, config_service.get_int("ocr_tile_concurrency", 3)),
+    }
+
+
+def split_bands(img: Image.Image, tile_height: int, overlap: int) -> list[Image.Image]:
+    """Cắt ảnh thành các dải ngang cao `tile_height` px, chồng lấn `overlap` px"""
+    width, height = img.size
+    overlap = min(overlap, tile_height // 2)
+    if height <= tile_height:
+        return [img]
+
+    count = -(-(height - overlap) // (tile_height - overlap))
+    # Chia đều để dải cuối không quá thấp
+    step = -(-(height - overlap) // count)
+    bands = []
+    for k in range(count):
+        top = k * step
+        bottom = min(height, top + step + overlap)
+        bands.append(img.crop((0, top, width, bottom)))
+    return bands
+
+
+def plan_tiles(img: Image.Image, settings: dict | None = None) -> list[Image.Image]:
+    """
+    Danh sách dải cần OCR cho ảnh (1 phần tử = không tiling).
+    auto: chỉ cắt khi ảnh dài (cao/rộng >= ocr_tile_aspect) và cao hơn 1.5 dải.
+    """
+    settings = settings or tiling_settings()
+    if settings["mode"] == "off":
+        return [img]
+    width, height = img.size
+    if settings["mode"] == "auto":
+        if height < settings["aspect"] * width or height < 1.5 * settings["tile_height"]:
+            return [img]
+    return split_bands(img, settings["tile_height"], settings["overlap"])
+
+
+_TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+
+
+def _is_table_row(line: str) -> bool:
+    return line.strip().startswith("|")
+
+
+def _is_separator(line: str) -> bool:
+    return bool(_TABLE_SEPARATOR.match(line))
+
+
+def _normalize(line: str) -> str:
+    """Chuẩn hoá 1 dòng để so khớp (bỏ khác biệt khoảng trắng quanh | và giữa các từ)"""
+    return re.sub(r"\s+", " ", re.sub(r"\s*\|\s*", "|", line.strip())).lower()
+
+
+def _last_table_header(lines: list[str]) -> str | None:
+    """Hàng tiêu đề của bảng ở cuối `lines` (None nếu không kết thúc bằng bảng)"""
+    i = len(lines) - 1
+    if i < 0 or not _is_table_row(lines[i]):
+        return None
+    while i > 0 and _is_table_row(lines[i - 1]):
+        i -= 1
+    if i + 1 < len(lines) and _is_separator(lines[i + 1]):
+        return lines[i]
+    return None
+
+
+def _is_truncation(last: str, full: str) -> bool:
+    """`last` (đã normalize) là bản bị cắt dở ở mép dải của dòng `full`"""
+    if full.startswith(last):
+        return True
+    # Hàng bảng: ô cuối bị cắt giữa chừng → so phần trước dấu | cuối cùng
+    prefix = last.rsplit("|", 1)[0]
+    return last.startswith("|") and prefix != "" and last.count("|") <= full.count("|") and full.startswith(prefix)
+
+
+def _seam_overlap(head: list[str], tail: list[str]) -> tuple[int, int] | None:
+    """
+    Tìm vùng chồng lấn ở đúng mép 2 dải: k dòng cuối của `head` trùng k dòng đầu của `tail`
+    (cho phép dòng cuối cùng của `head` là bản bị cắt dở của dòng kế tiếp trong `tail`).
+    Trả về (vị trí cắt trong head, vị trí bắt đầu trong tail) hoặc None.
+    Không so khớp ở giữa dải: bảng xét nghiệm hay lặp lại hàng / đơn vị, khớp lệch sẽ làm mất dòng.
+    """
+    # Chỉ so các dòng có nội dung (bỏ dòng trống / phân cách bảng), giữ vị trí gốc để cắt
+    a = [(i, _normalize(x)) for i, x in enumerate(head)
+         if i >= len(head) - MAX_OVERLAP_LINES and x.strip() and not _is_separator(x)]
+    b = [(i, _normalize(x)) for i, x in enumerate(tail[:MAX_OVERLAP_LINES]) if x.strip() and not _is_separator(x)]
+    a_text = [x for _, x in a]
+    b_text = [x for _, x in b]
+
+    for k in range(min(len(a), len(b)), 0, -1):
+        long_enough = k >= 2 or len(b_text[0]) >= 8
+        if not long_enough:
+            continue
+        if a_text[-k:] == b_text[:k]:
+            return a[-k][0], b[0][0]
+        # Dòng cuối của head bị cắt dở, k dòng trước nó trùng phần đầu tail
+        if (k + 1 <= len(a) and k < len(b) and a_text[-k - 1:-1] == b_text[:k]
+                and _is_truncation(a_text[-1], b_text[k])):
+            return a[-k - 1][0], b[0][0]
+    return None
+
+
+def _merge_two(head: list[str], tail: list[str]) -> list[str]:
+    """
+    Nối Markdown của 2 dải liền kề:
+    - bảng bị cắt: bỏ tiêu đề/dòng phân cách mà model sinh lại ở đầu dải sau
+    - bỏ các dòng trùng ở vùng chồng lấn: chỉ khi cuối dải trước trùng đầu dải sau
+      (dòng bị cắt dở ở mép được bỏ theo); không khớp thì nối nguyên vẹn
+    """
+    while head and not head[-1].strip():
+        head = head[:-1]
+    while tail and not tail[0].strip():
+        tail = tail[1:]
+    if not head or not tail:
+        return head + tail
+
+    header = _last_table_header(head)
+    continues_table = header is not None and len(tail) > 1 and _is_table_row(tail[0]) and _is_separator(tail[1])
+    if continues_table:
+        if _normalize(tail[0]) == _normalize(header):
+            tail = tail[2:]
+        else:
+            # Model coi hàng dữ liệu đầu tiên là tiêu đề → giữ hàng, bỏ dòng phân cách
+            tail = [tail[0]] + tail[2:]
+        if not tail:
+            return head
+
+    overlap = _seam_overlap(head, tail)
+    if overlap is not None:
+        cut, resume = overlap
+        return head[:cut] + tail[resume:]
+
+    if continues_table or (_is_table_row(head[-1]) and _is_table_row(tail[0])):
+        # Hàng cuối dải trước bị cắt dở (ít cột hơn) và dải sau có bản đầy đủ → bỏ bản cắt dở
+        last, first = _normalize(head[-1]), _normalize(tail[0])
+        if last.count("|") < first.count("|") and first.startswith(last.rsplit("|", 1)[0]):
+            head = head[:-1]
+        return head + tail
+    return head + [""] + tail
+
+
+def merge_markdown(parts: list[str]) -> str:
+    """Ghép Markdown của các dải theo thứ tự từ trên xuống"""
+    merged: list[str] = []
+    for part in parts:
+        merged = _merge_two(merged, part.splitlines())
+    return "\n".join(merged)
+
+
+def ocr_tiled(client, image: Image.Image, prompt_text: str,
+              on_partial=None, settings: dict | None = None, cancel: CancelToken | None = None) -> str:
+    """
+    OCR ảnh dài theo từng dải ngang chồng lấn, gửi song song `ocr_tile_concurrency`
+    request rồi ghép kết quả (merge_markdown).
+    on_partial(text): nhận phần đã ghép của các dải liên tiếp đã xong từ trên xuống.
+    """
+    settings = settings or tiling_settings()
+    bands = plan_tiles(image, settings)
+    if len(bands) == 1:
+        return client.ocr(image, prompt_text, on_partial=on_partial, cancel=cancel)
+
+    total = len(bands)
+    status_manager.add(f"🧩 Tiled OCR: {total} dải ({image.width}x{image.height}px)")
+    results: list[str | None] = [None] * total
+    lock = threading.Lock()
+
+    def _run(index: int) -> None:
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        prompt = prompt_text + TILE_PROMPT_SUFFIX.format(index=index + 1, total=total)
+        text = client.ocr(bands[index], prompt, cancel=cancel)
+        with lock:
+            results[index] = text
+            done = []
+            for r in results:
+                if r is None:
+                    break
+                done.append(r)
+        if on_partial is not None and done:
+            on_partial(merge_markdown(done))
+
+    with ThreadPoolExecutor(max_workers=min(total, settings["concurrency"]),
+                            thread_name_prefix="ocr-tile") as executor:
+        # Mỗi dải 1 bản copy context → số đo của các dải ghi vào FileMetrics của ảnh
+        for future in [executor.submit(contextvars.copy_context().run, _run, k) for k in range(total)]:
+            future.result()
+
+    merged = merge_markdown(results)
+    status_manager.add(f"🧩 Đã ghép {total} dải → {len(merged)} ký tự")
+    return merged
+
+
+# =====================================================
+#   OCR call to Qwen API
+# =====================================================
+def call_qwen_ocr(image: str | Path | Image.Image, prompt_text: str, client=None,
+                  on_partial=None, cancel: CancelToken | None = None) -> str:
+    """
+    Gọi API Qwen OCR với ảnh đã xử lý (path hoặc PIL.Image)
+    qua OCRClient dùng chung (hoặc client truyền vào).
+    on_partial(text): nhận text từng phần khi streaming (xem OCRClient.ocr).
+    cancel: CancelToken để huỷ request đang chạy (raise OperationCancelled).
+    Ảnh trong bộ nhớ dài/lớn được OCR theo dải (xem ocr_tiled, config `ocr_tiling`).
+    """
+    client = client or get_ocr_client()
+    with metrics.span("ocr"):
+        if isinstance(image, Image.Image):
+            return ocr_tiled(client, image, prompt_text, on_partial=on_partial, cancel=cancel)
+        return client.ocr(image, prompt_text, on_partial=on_partial, cancel=cancel)
 
 
 # =====================================================
@@ -143,7 +630,7 @@ def get_window_state():
     """
     Trả về trạng thái hiển thị mặc định khi khởi động app
     """
-    is_maximized = get_config_value("is_maximized", True)
+    is_maximized = config_service.get_bool("is_maximized", True)
     if is_maximized:
         return "maximized"
     return "normal"
\ No newline at end of file
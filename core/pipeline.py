@@ -1,16 +1,28 @@
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+import os
+import sys
+import threading
+import time
 from urllib.parse import urlparse
 from io import BytesIO
-import requests
-import json
 from PIL import Image
-from PySide6.QtCore import QStandardPaths
 
-from core.waifu2x_loader import load_waifu2x
-from core.process_image import process_image
-from core.ocr_extract import call_qwen_ocr
+from core.process_image import (prepare_image, processed_path_for, save_original,
+                                save_processed, save_processed_async)
+from core.ocr_extract import OCRClient, call_qwen_ocr
+from core.ocr_cache import OCRCache, get_ocr_cache, image_digest
+from core.upscale_pool import UpscalePool, get_upscale_pool
+from core import metrics
+from core.catalog import record_output
+from core.cancel import CancelToken, OperationCancelled
+from core.metrics import FileMetrics, write_metrics
 from core.status import status_manager
-from utils.path_helper import resource_path
+from config.config_service import config_service
+from utils.file_helper import atomic_write_text
 
 # ============================================================
 # 📁 Project root (được dùng khi fallback)
@@ -42,29 +54,33 @@ DEFAULT_PROMPT = (
 # ============================================================
 # 📦 Lấy thư mục output mặc định từ config
 # ============================================================
+def _app_data_dir() -> Path:
+    """
+    Thư mục AppData của ứng dụng.
+    Chỉ dùng QStandardPaths khi Qt đã được load (chạy GUI) — CLI headless không import PySide6.
+    """
+    if "PySide6.QtCore" in sys.modules:
+        from PySide6.QtCore import QStandardPaths
+        return Path(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation))
+    if os.name == "nt":
+        return Path(os.environ.get("APPDATA", Path.home() / "AppData" / "Roaming"))
+    return Path(os.environ.get("XDG_DATA_HOME", Path.home() / ".local" / "share"))
+
+
 def get_default_output() -> Path:
     """
     Load default output directory từ config file.
     Nếu không có thì dùng AppData hoặc fallback về project/data/output.
     """
     try:
-        # 🔧 SỬA: Dùng path giống ocr_extract.py
-        config_path = resource_path("config/app_config.json")
-
-        if config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                storage_dir_str = config.get("storage_path", "")
-
-                if storage_dir_str and storage_dir_str.strip():
-                    storage_path = Path(storage_dir_str)
-                    storage_path.mkdir(parents=True, exist_ok=True)
-                    status_manager.add(f"📁 Using storage path: {storage_path}")
-                    return storage_path
+        storage_path = config_service.get_path("storage_path")
+        if storage_path:
+            storage_path.mkdir(parents=True, exist_ok=True)
+            status_manager.add(f"📁 Using storage path: {storage_path}")
+            return storage_path
 
         # Nếu không có config hoặc storage_path trống → AppData
-        app_data = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
-        default_path = Path(app_data) / "OCR-Medical" / "output"
+        default_path = _app_data_dir() / "OCR-Medical" / "output"
         default_path.mkdir(parents=True, exist_ok=True)
         status_manager.add(f"📁 Using AppData path: {default_path}")
         return default_path
@@ -78,112 +94,408 @@ def get_default_output() -> Path:
         return fallback_path
 
 
-# 🗂️ Output mặc định
-DEFAULT_OUTPUT = get_default_output()
+def __getattr__(name: str):
+    """🗂️ DEFAULT_OUTPUT được tính ở lần truy cập đầu (không tạo thư mục khi import)"""
+    if name == "DEFAULT_OUTPUT":
+        value = get_default_output()
+        globals()["DEFAULT_OUTPUT"] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ============================================================
 # ✏️ Gọi OCR và lưu kết quả Markdown
 # ============================================================
-def save_text(processed_path: Path, img_name: str, output_root: Path):
+def write_markdown(text: str, img_name: str, output_root: Path) -> Path:
     """
-    Gọi OCR và lưu kết quả Markdown.
+    Lưu Markdown vào output/{img_name}/text/{img_name}_processed.md
     """
-    try:
-        out_dir_text = output_root / img_name / "text"
-        out_dir_text.mkdir(parents=True, exist_ok=True)
+    ocr_path = output_root / img_name / "text" / f"{img_name}_processed.md"
+    with metrics.span("save_markdown"):
+        atomic_write_text(ocr_path, text)
+
+    status_manager.add(f"✅ Đã lưu kết quả OCR: {ocr_path.name}")
+    status_manager.add(f"📄 Full path: {ocr_path}")
+    return ocr_path
+
 
+def save_text(processed, img_name: str, output_root: Path, client: OCRClient = None,
+              on_partial=None, cancel: CancelToken | None = None) -> str:
+    """
+    Gọi OCR và lưu kết quả Markdown, trả về nội dung Markdown.
+    `processed` là path ảnh đã xử lý hoặc PIL.Image trong bộ nhớ.
+    Dùng OCRClient chung (connection pool) nếu không truyền client.
+    File Markdown chỉ được ghi khi OCR hoàn tất (không ghi khi bị huỷ).
+    """
+    try:
         status_manager.add(f"🔍 Starting OCR for: {img_name}")
-        extracted = call_qwen_ocr(str(processed_path), DEFAULT_PROMPT)
-        
-        ocr_path = out_dir_text / f"{img_name}_processed.md"
-        with open(ocr_path, "w", encoding="utf-8") as f:
-            f.write(extracted)
-
-        status_manager.add(f"✅ Đã lưu kết quả OCR: {ocr_path.name}")
-        status_manager.add(f"📄 Full path: {ocr_path}")
+        extracted = call_qwen_ocr(processed, DEFAULT_PROMPT, client=client, on_partial=on_partial, cancel=cancel)
+        write_markdown(extracted, img_name, output_root)
+        return extracted
     except Exception as e:
         status_manager.add(f"❌ Lỗi lưu OCR: {e}")
         raise
 
 
+# ============================================================
+# ⚡ Cache kết quả OCR
+# ============================================================
+def lookup_cached_ocr(img: Image.Image, output_root: Path, bypass_cache: bool = False):
+    """
+    Tra cache OCR cho ảnh nguồn.
+    Trả về (cache, key, entry) — cache/key là None khi cache tắt hoặc bypass,
+    entry là None khi miss.
+    """
+    cache = None if bypass_cache else get_ocr_cache(output_root)
+    if cache is None:
+        return None, None, None
+    key = OCRCache.make_key(image_digest(img), DEFAULT_PROMPT)
+    return cache, key, cache.get(key)
+
+
+def restore_from_cache(pool: UpscalePool, img: Image.Image, img_name: str, output_root: Path, markdown_text: str,
+                       cancel: CancelToken | None = None) -> Path:
+    """
+    Dựng lại thư mục output từ kết quả OCR đã cache (không gọi OCR).
+    Chỉ upscale lại khi ảnh processed cần lưu nhưng chưa có trên đĩa.
+    Trả về path ảnh dùng để preview.
+    """
+    status_manager.add(f"⚡ OCR cache hit: {img_name}")
+    write_markdown(markdown_text, img_name, output_root)
+
+    processed_path = processed_path_for(img_name, output_root)
+    if not config_service.get_bool("save_processed_image", True):
+        return save_original(img, img_name, output_root)
+    if processed_path.exists():
+        save_original(img, img_name, output_root)
+    else:
+        _, decision = prepare_image(img, img_name, output_root)
+        save_processed(pool.enhance(img, decision.mode, cancel=cancel), img_name, output_root)
+    return processed_path
+
+
+# ============================================================
+# 🧵 Tầng upscale dùng chung (UpscalePool, nhiều ảnh cùng lúc)
+# ============================================================
+@dataclass
+class UpscaledImage:
+    """Kết quả tầng upscale cho 1 ảnh nguồn"""
+    key: object
+    img_name: str
+    original_path: Path | None = None
+    enhanced: Image.Image | None = None
+    cache: OCRCache | None = None
+    cache_key: str | None = None
+    cached_markdown: str | None = None
+    preview_path: Path | None = None
+    error: Exception | None = None
+    metrics: FileMetrics | None = None
+
+
+def _metrics_status(error: BaseException) -> str:
+    return "cancelled" if isinstance(error, (OperationCancelled, CancelledError)) else "failed"
+
+
+def load_source(source) -> tuple[Image.Image, str]:
+    """Mở ảnh từ path hoặc URL, trả về (ảnh RGB, tên ảnh)"""
+    source = str(source)
+    if source.startswith(("http://", "https://")):
+        import requests
+        response = requests.get(source)
+        response.raise_for_status()
+        return Image.open(BytesIO(response.content)).convert("RGB"), Path(urlparse(source).path).stem
+    p = Path(source)
+    return Image.open(p).convert("RGB"), p.stem
+
+
+def upscale_stream(items, output_root: Path, pool: UpscalePool = None, bypass_cache: bool = False,
+                   on_start=None, should_stop=None, cancel: CancelToken | None = None):
+    """
+    Tầng upscale cho batch: `items` là iterable (key, source) với source là path hoặc URL.
+    Mỗi ảnh được tra cache, lưu ảnh gốc, chọn nhánh tiền xử lý rồi gửi vào UpscalePool;
+    tối đa `pool.capacity` ảnh được xử lý cùng lúc. Yield UpscaledImage theo đúng thứ tự
+    đầu vào (cache hit có `cached_markdown`, lỗi có `error`).
+    - on_start(key): gọi trước khi bắt đầu 1 ảnh
+    - should_stop(): True → ngừng nhận ảnh mới và huỷ các ảnh đang chờ (vẫn được yield với
+      `error` = OperationCancelled; ảnh chưa on_start thì không yield)
+    - cancel: CancelToken — huỷ cả ảnh đang upscale (dừng ở dải kế tiếp)
+    Số đo từng stage nằm trong `item.metrics`; ảnh cache hit / lỗi được ghi ngay vào .metrics.jsonl.
+    """
+    pool = pool or get_upscale_pool()
+    pending = deque()
+    if cancel is not None:
+        should_stop = (lambda stop=should_stop: cancel.is_cancelled() or (stop is not None and stop()))
+
+    def _resolve(item: UpscaledImage, future):
+        if future is not None:
+            try:
+                item.enhanced = future.result()
+            except Exception as e:
+                status_manager.add(f"❌ Lỗi xử lý ảnh: {e}")
+                item.error = e
+        if item.error is not None:
+            write_metrics(item.metrics, output_root, _metrics_status(item.error))
+            record_output(output_root, item.img_name)
+        return item
+
+    for key, source in items:
+        if should_stop and should_stop():
+            break
+        if on_start:
+            on_start(key)
+
+        item = UpscaledImage(key=key, img_name=Path(urlparse(str(source)).path).stem)
+        item.metrics = FileMetrics(item.img_name)
+        future = None
+        try:
+            with metrics.bind(item.metrics):
+                with metrics.span("decode"):
+                    img, item.img_name = load_source(source)
+                item.metrics.name = item.img_name
+                item.cache, item.cache_key, hit = lookup_cached_ocr(img, output_root, bypass_cache)
+                if hit is not None:
+                    item.cached_markdown = hit.markdown
+                    item.preview_path = restore_from_cache(pool, img, item.img_name, output_root, hit.markdown,
+                                                           cancel=cancel)
+                    write_metrics(item.metrics, output_root, "cached")
+                    record_output(output_root, item.img_name)
+                else:
+                    item.original_path, decision = prepare_image(img, item.img_name, output_root)
+                    future = pool.submit(img, decision.mode, cancel=cancel)
+        except Exception as e:
+            item.error = e
+        pending.append((item, future))
+
+        # Trả kết quả ở đầu hàng khi pool đã đầy hoặc ảnh đầu đã xong
+        while pending and (len(pending) > pool.capacity or pending[0][1] is None or pending[0][1].done()):
+            yield _resolve(*pending.popleft())
+
+    while pending:
+        if should_stop and should_stop():
+            # Huỷ các ảnh còn chờ nhưng vẫn yield từng ảnh (error = OperationCancelled)
+            # → mỗi ảnh đã on_start luôn có đúng 1 kết quả
+            for _, future in pending:
+                if future is not None:
+                    future.cancel()
+            while pending:
+                item, _ = pending.popleft()
+                if item.error is None:
+                    item.error = OperationCancelled("Đã dừng trước khi upscale xong")
+                yield _resolve(item, None)
+            return
+        yield _resolve(*pending.popleft())
+
+
+def finish_ocr(item: UpscaledImage, output_root: Path, client: OCRClient = None,
+               on_partial=None, cancel: CancelToken | None = None) -> str:
+    """
+    Tầng OCR cho 1 ảnh đã upscale: ghi ảnh processed ở nền (nếu bật),
+    gọi OCR từ bộ nhớ, lưu Markdown và cập nhật cache. Trả về Markdown.
+    Bản ghi số đo của ảnh (item.metrics) được ghi vào .metrics.jsonl khi xong hoặc lỗi;
+    catalog của storage (core.catalog) được cập nhật cho folder của ảnh.
+    """
+    with metrics.bind(item.metrics):
+        try:
+            pending_write = None
+            if config_service.get_bool("save_processed_image", True):
+                pending_write = save_processed_async(item.enhanced, item.img_name, output_root)
+
+            try:
+                extracted = save_text(item.enhanced, item.img_name, output_root, client=client,
+                                      on_partial=on_partial, cancel=cancel)
+            finally:
+                # Luôn chờ ghi ảnh processed xong (kể cả khi OCR lỗi/bị huỷ) để không còn file ghi dở
+                processed_path = pending_write.result() if pending_write is not None else None
+
+            if item.cache is not None:
+                item.cache.put(item.cache_key, image_digest(item.enhanced), extracted)
+        except BaseException as e:
+            write_metrics(item.metrics, output_root, _metrics_status(e))
+            record_output(output_root, item.img_name)
+            raise
+
+    write_metrics(item.metrics, output_root, "done")
+    record_output(output_root, item.img_name)
+    item.preview_path = processed_path or item.original_path
+    return extracted
+
+
+# ============================================================
+# 📦 Batch: upscale (UpscalePool) → N luồng OCR
+# ============================================================
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def collect_sources(inputs) -> list:
+    """
+    Mở rộng danh sách input (file, folder, URL) thành danh sách ảnh cần xử lý.
+    Folder → các file ảnh trực tiếp bên trong (sắp theo tên).
+    """
+    sources = []
+    for raw in inputs:
+        raw = str(raw)
+        if raw.startswith(("http://", "https://")):
+            sources.append(raw)
+            continue
+        p = Path(raw)
+        if p.is_dir():
+            sources.extend(sorted(f for f in p.glob("*.*") if f.suffix.lower() in IMAGE_SUFFIXES))
+        elif p.is_file():
+            sources.append(p)
+        else:
+            raise FileNotFoundError(f"Input {raw} không tồn tại")
+    return sources
+
+
+def run_batch(sources: list, output_root: Path, concurrency: int = None, bypass_cache: bool = False,
+              on_event=None, should_stop=None, cancel: CancelToken | None = None) -> dict:
+    """
+    Chạy pipeline cho nhiều ảnh: upscale song song qua UpscalePool, OCR song song
+    `concurrency` request (mặc định `ocr_concurrency`).
+    on_event(dict) được gọi (có thể từ nhiều luồng) với các event:
+    "start", "cached", "done", "failed", "cancelled" cho từng ảnh (key `index`, `source`);
+    mỗi ảnh có đúng 1 event kết thúc — ảnh bị bỏ do dừng / huỷ (kể cả chưa "start") là "cancelled".
+    should_stop(): ngừng nhận ảnh mới, chờ các ảnh đang OCR; cancel: huỷ luôn các ảnh đang xử lý.
+    Trả về thống kê {"total", "done", "cached", "failed", "cancelled", "elapsed"}.
+    """
+    from core.ocr_extract import get_ocr_client
+
+    output_root = Path(output_root)
+    concurrency = max(1, concurrency or config_service.get_int("ocr_concurrency", 2))
+    client = get_ocr_client()
+    stats = {"total": len(sources), "done": 0, "cached": 0, "failed": 0, "cancelled": 0}
+    stats_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(concurrency)
+    started = time.perf_counter()
+
+    def _emit(event: str, idx: int, **fields):
+        if on_event is not None:
+            on_event({"event": event, "index": idx, "source": str(sources[idx]), **fields})
+
+    def _count(key: str):
+        with stats_lock:
+            stats[key] += 1
+
+    def _ocr(item: UpscaledImage, t0: float):
+        try:
+            extracted = finish_ocr(item, output_root, client=client, cancel=cancel)
+            _count("done")
+            _emit("done", item.key, name=item.img_name, chars=len(extracted),
+                  markdown=str(output_root / item.img_name / "text" / f"{item.img_name}_processed.md"),
+                  elapsed=round(time.perf_counter() - t0, 3))
+        except (OperationCancelled, CancelledError):
+            _count("cancelled")
+            _emit("cancelled", item.key, name=item.img_name)
+        except Exception as e:
+            _count("failed")
+            _emit("failed", item.key, name=item.img_name, error=str(e))
+        finally:
+            slots.release()
+
+    start_times = {}
+    reported = set()
+
+    def _on_start(idx: int):
+        start_times[idx] = time.perf_counter()
+        _emit("start", idx)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ocr-batch") as executor:
+        for item in upscale_stream(enumerate(sources), output_root, bypass_cache=bypass_cache,
+                                   on_start=_on_start, should_stop=should_stop, cancel=cancel):
+            reported.add(item.key)
+            t0 = start_times.pop(item.key, started)
+            if isinstance(item.error, (OperationCancelled, CancelledError)):
+                _count("cancelled")
+                _emit("cancelled", item.key, name=item.img_name)
+            elif item.error is not None:
+                _count("failed")
+                _emit("failed", item.key, name=item.img_name, error=str(item.error))
+            elif item.cached_markdown is not None:
+                _count("cached")
+                _emit("cached", item.key, name=item.img_name, chars=len(item.cached_markdown),
+                      elapsed=round(time.perf_counter() - t0, 3))
+            else:
+                # Chờ khi đã đủ `concurrency` request OCR đang chạy
+                slots.acquire()
+                executor.submit(_ocr, item, t0)
+
+    # Ảnh chưa bắt đầu khi dừng (upscale_stream không yield) → vẫn báo "cancelled"
+    for idx in range(len(sources)):
+        if idx not in reported:
+            _count("cancelled")
+            _emit("cancelled", idx)
+
+    stats["elapsed"] = round(time.perf_counter() - started, 3)
+    return stats
+
+
 # ============================================================
 # 🔄 Pipeline chính
 # ============================================================
-def process_input(input_path: str, output_root: str = None):
+def process_input(input_path: str, output_root: str = None, bypass_cache: bool = False):
     """
     Pipeline OCR:
     - Input: file ảnh, folder, hoặc URL
     - Output: original, processed, text (.md)
+    - bypass_cache: bỏ qua cache OCR, luôn upscale + OCR lại
+    Ảnh trong folder được upscale song song qua UpscalePool (`upscale_workers`).
     """
     status_manager.reset()
     status_manager.add("=" * 60)
     status_manager.add("🚀 Starting OCR Pipeline")
     status_manager.add("=" * 60)
     
-    output_root = Path(output_root) if output_root else DEFAULT_OUTPUT
+    output_root = Path(output_root) if output_root else get_default_output()
     status_manager.add(f"📂 Output directory: {output_root}")
-    
-    upscaler = load_waifu2x()
 
     try:
         # Nếu là URL
         if input_path.startswith(("http://", "https://")):
             status_manager.add(f"🌐 Processing URL: {input_path}")
-            response = requests.get(input_path)
-            response.raise_for_status()
-            img = Image.open(BytesIO(response.content)).convert("RGB")
-            img_name = Path(urlparse(input_path).path).stem
-            _, proc_path = process_image(upscaler, img, img_name, output_root)
-            save_text(proc_path, img_name, output_root)
-            status_manager.add("=" * 60)
-            status_manager.add("✅ Pipeline completed successfully!")
-            status_manager.add("=" * 60)
-            return status_manager
-
-        # Nếu là file ảnh
-        p = Path(input_path)
-        if p.is_file():
-            status_manager.add(f"📸 Processing file: {p.name}")
-            img = Image.open(p).convert("RGB")
-            img_name = p.stem
-            _, proc_path = process_image(upscaler, img, img_name, output_root)
-            save_text(proc_path, img_name, output_root)
-            status_manager.add("=" * 60)
-            status_manager.add("✅ Pipeline completed successfully!")
-            status_manager.add("=" * 60)
-
-        # Nếu là thư mục
-        elif p.is_dir():
-            status_manager.add(f"📁 Processing directory: {p}")
-            files = list(p.glob("*.*"))
-            image_files = [f for f in files if f.suffix.lower() in [".png", ".jpg", ".jpeg", ".webp"]]
-            
-            if not image_files:
-                status_manager.add("⚠️ No image files found in directory")
-                return status_manager
-            
-            status_manager.add(f"📊 Found {len(image_files)} image(s)")
-            
-            for idx, file in enumerate(image_files, 1):
-                status_manager.add("-" * 60)
-                status_manager.add(f"[{idx}/{len(image_files)}] Processing: {file.name}")
-                img = Image.open(file).convert("RGB")
-                img_name = file.stem
-                _, proc_path = process_image(upscaler, img, img_name, output_root)
-                save_text(proc_path, img_name, output_root)
-            
-            status_manager.add("=" * 60)
-            status_manager.add(f"✅ All {len(image_files)} images processed successfully!")
-            status_manager.add("=" * 60)
+            sources = [input_path]
         else:
-            status_manager.add(f"❌ Input không tồn tại: {input_path}")
-            raise FileNotFoundError(f"Input {input_path} không tồn tại")
+            p = Path(input_path)
+            # Nếu là file ảnh
+            if p.is_file():
+                status_manager.add(f"📸 Processing file: {p.name}")
+                sources = [p]
+            # Nếu là thư mục
+            elif p.is_dir():
+                status_manager.add(f"📁 Processing directory: {p}")
+                files = list(p.glob("*.*"))
+                sources = [f for f in files if f.suffix.lower() in IMAGE_SUFFIXES]
 
+                if not sources:
+                    status_manager.add("⚠️ No image files found in directory")
+                    return status_manager
+
+                status_manager.add(f"📊 Found {len(sources)} image(s)")
+            else:
+                status_manager.add(f"❌ Input không tồn tại: {input_path}")
+                raise FileNotFoundError(f"Input {input_path} không tồn tại")
+
+        def _on_start(idx):
+            if len(sources) > 1:
+                status_manager.add("-" * 60)
+                status_manager.add(f"[{idx}/{len(sources)}] Processing: {Path(str(sources[idx - 1])).name}")
+
+        items = enumerate(sources, 1)
+        for item in upscale_stream(items, output_root, bypass_cache=bypass_cache, on_start=_on_start):
+            if item.error is not None:
+                raise item.error
+            if item.cached_markdown is None:
+                finish_ocr(item, output_root)
+
+        status_manager.add("=" * 60)
+        if len(sources) > 1:
+            status_manager.add(f"✅ All {len(sources)} images processed successfully!")
+        else:
+            status_manager.add("✅ Pipeline completed successfully!")
+        status_manager.add("=" * 60)
         return status_manager
 
     except Exception as e:
         status_manager.add("=" * 60)
         status_manager.add(f"❌ Pipeline error: {e}")
         status_manager.add("=" * 60)
-        raise
\ No newline at end of file
+        raise
@@ -1,6 +1,124 @@
+from __future__ import annotations
+import contextvars
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageChops, ImageFilter, ImageStat
+from core import metrics
+from core.cancel import CancelToken, OperationCancelled
 from core.status import status_manager
+from config.config_service import config_service
+from utils.file_helper import atomic_save_image, atomic_write_text
+
+# Ghi ảnh processed (và tạo preview) ở nền để không chặn lời gọi OCR
+_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="processed-writer")
+
+# Các nhánh tiền xử lý: giữ nguyên / chỉ khử nhiễu (scale=1) / upscale 2x
+PREPROCESS_MODES = ("none", "denoise", "upscale")
+
+# Vùng ảnh (px) dùng để ước lượng nhiễu — crop giữa ảnh, không thu nhỏ (thu nhỏ làm mất nhiễu)
+NOISE_SAMPLE_SIZE = 1024
+
+# Upscale có thể huỷ: chạy Waifu2x theo dải ngang cao UPSCALE_BAND_HEIGHT px (ảnh nguồn),
+# mỗi dải đệm thêm UPSCALE_BAND_PAD px mỗi phía để không lộ đường nối
+UPSCALE_BAND_HEIGHT = 256
+UPSCALE_BAND_PAD = 16
+
+
+@dataclass
+class PreprocessDecision:
+    """Nhánh tiền xử lý được chọn cho 1 ảnh và các số đo dẫn tới lựa chọn đó"""
+    mode: str
+    reason: str
+    width: int
+    height: int
+    dpi: float | None
+    noise: float
+
+
+def preprocess_settings() -> dict:
+    """
+    Ngưỡng của policy tiền xử lý (đọc từ config):
+    - preprocess_policy: "adaptive" hoặc "always_upscale"
+    - upscale_skip_pixels: số pixel từ đó coi là ảnh đã đủ phân giải
+    - upscale_skip_dpi: DPI từ đó coi là ảnh đã đủ phân giải
+    - denoise_noise_threshold: mức nhiễu từ đó ảnh phân giải cao vẫn được khử nhiễu
+    """
+    return {
+        "policy": config_service.get_str("preprocess_policy", "adaptive"),
+        "skip_pixels": config_service.get_int("upscale_skip_pixels", 6_000_000),
+        "skip_dpi": config_service.get_float("upscale_skip_dpi", 300.0),
+        "noise_threshold": config_service.get_float("denoise_noise_threshold", 4.0),
+    }
+
+
+def estimate_noise(img: Image.Image) -> float:
+    """
+    Ước lượng nhiễu: trung bình |ảnh xám - median 3x3| trên vùng giữa ảnh.
+    Ảnh sạch ~1-2, ảnh chụp/scan nhiễu thường > 4.
+    """
+    gray = img.convert("L")
+    w, h = gray.size
+    side = NOISE_SAMPLE_SIZE
+    if w > side or h > side:
+        left = max(0, (w - side) // 2)
+        top = max(0, (h - side) // 2)
+        gray = gray.crop((left, top, min(w, left + side), min(h, top + side)))
+    diff = ImageChops.difference(gray, gray.filter(ImageFilter.MedianFilter(3)))
+    return float(ImageStat.Stat(diff).mean[0])
+
+
+def source_dpi(img: Image.Image) -> float | None:
+    """DPI ghi trong metadata ảnh (lấy trục nhỏ hơn), None nếu không có"""
+    dpi = img.info.get("dpi")
+    try:
+        value = float(min(dpi)) if isinstance(dpi, (tuple, list)) else float(dpi)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 1 else None
+
+
+def choose_preprocess(img: Image.Image) -> PreprocessDecision:
+    """
+    Chọn nhánh tiền xử lý theo DPI, số pixel và mức nhiễu của ảnh nguồn:
+    - ảnh nhỏ / DPI thấp → upscale 2x
+    - ảnh đã đủ phân giải nhưng nhiễu → chỉ khử nhiễu (scale=1)
+    - ảnh đã đủ phân giải và sạch → giữ nguyên
+    """
+    settings = preprocess_settings()
+    width, height = img.size
+    dpi = source_dpi(img)
+
+    if settings["policy"] != "adaptive":
+        return PreprocessDecision("upscale", "policy=always_upscale", width, height, dpi, -1.0)
+
+    pixels = width * height
+    high_res = pixels >= settings["skip_pixels"] or (dpi is not None and dpi >= settings["skip_dpi"])
+    if not high_res:
+        return PreprocessDecision("upscale", f"{pixels} px < {settings['skip_pixels']} px", width, height, dpi, -1.0)
+
+    noise = estimate_noise(img)
+    if noise >= settings["noise_threshold"]:
+        return PreprocessDecision("denoise", f"high-res, noise {noise:.2f}", width, height, dpi, noise)
+    return PreprocessDecision("none", f"high-res, noise {noise:.2f}", width, height, dpi, noise)
+
+
+def record_preprocess(decision: PreprocessDecision, img_name: str, output_root: Path) -> Path:
+    """
+    Ghi nhánh tiền xử lý đã chọn vào output/{img_name}/meta.json
+    """
+    meta_path = output_root / img_name / "meta.json"
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    meta = {}
+    if meta_path.exists():
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except Exception:
+            meta = {}
+    meta["preprocess"] = asdict(decision)
+    atomic_write_text(meta_path, json.dumps(meta, indent=2, ensure_ascii=False))
+    return meta_path
 
 
 def save_original(img: Image.Image, img_name: str, output_root: Path) -> Path:
@@ -11,7 +129,9 @@ def save_original(img: Image.Image, img_name: str, output_root: Path) -> Path:
         out_dir = output_root / img_name / "original"
         out_dir.mkdir(parents=True, exist_ok=True)
         path = out_dir / f"{img_name}_original.png"
-        img.save(path)
+        with metrics.span("save_original"):
+            atomic_save_image(img, path)
+        _writer.submit(generate_previews, img, path, output_root)
         status_manager.add("✅ Lưu ảnh gốc (original)")
         return path
     except Exception as e:
@@ -19,27 +139,127 @@ def save_original(img: Image.Image, img_name: str, output_root: Path) -> Path:
         raise
 
 
-def enhance_image(upscaler, img: Image.Image, img_name: str, output_root: Path) -> Path:
+def generate_previews(img: Image.Image, path: Path, output_root: Path) -> None:
     """
-    Xử lý ảnh bằng Waifu2x và lưu vào output/{img_name}/processed
+    Tạo sẵn các mức preview (core.thumbnails) cho ảnh vừa ghi, từ ảnh trong bộ nhớ —
+    UI không phải decode ảnh đầy đủ (processed có thể cao 8000px).
     """
+    from core.thumbnails import get_thumbnail_cache
     try:
-        out_dir = output_root / img_name / "processed"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        enhanced = upscaler(img)
-        path = out_dir / f"{img_name}_processed.png"
-        enhanced.save(path)
-        status_manager.add("✅ Xử lý ảnh (processed)")
-        return path
+        get_thumbnail_cache(output_root).generate(path, img)
+    except Exception as e:
+        status_manager.add(f"⚠️ Không tạo được preview {path.name}: {e}")
+
+
+def run_banded(model, img: Image.Image, cancel: CancelToken) -> Image.Image:
+    """
+    Chạy `model` theo từng dải ngang (xem UPSCALE_BAND_HEIGHT) rồi ghép lại,
+    kiểm tra `cancel` giữa các dải để dừng được trong lúc upscale ảnh lớn.
+    """
+    width, height = img.size
+    if height <= UPSCALE_BAND_HEIGHT + 2 * UPSCALE_BAND_PAD:
+        cancel.raise_if_cancelled()
+        return model(img)
+
+    out = None
+    scale = 1
+    for top in range(0, height, UPSCALE_BAND_HEIGHT):
+        cancel.raise_if_cancelled()
+        bottom = min(height, top + UPSCALE_BAND_HEIGHT)
+        src_top = max(0, top - UPSCALE_BAND_PAD)
+        src_bottom = min(height, bottom + UPSCALE_BAND_PAD)
+        band = model(img.crop((0, src_top, width, src_bottom)))
+        if out is None:
+            scale = band.width // width
+            out = Image.new(band.mode, (band.width, height * scale))
+        y0 = (top - src_top) * scale
+        out.paste(band.crop((0, y0, band.width, y0 + (bottom - top) * scale)), (0, top * scale))
+    cancel.raise_if_cancelled()
+    return out
+
+
+def enhance_image(upscaler, img: Image.Image, mode: str = "upscale", cancel: CancelToken | None = None) -> Image.Image:
+    """
+    Xử lý ảnh bằng Waifu2x theo nhánh `mode`, trả về ảnh trong bộ nhớ (không ghi file):
+    - "upscale": dùng `upscaler` (noise_scale 2x)
+    - "denoise": model khử nhiễu scale=1 (lấy từ registry)
+    - "none": trả về ảnh gốc
+    Truyền `cancel` để xử lý theo dải và dừng được giữa chừng (raise OperationCancelled).
+    """
+    try:
+        if mode == "none":
+            status_manager.add("⏭️ Ảnh đủ phân giải — bỏ qua Waifu2x")
+            return img
+        if mode == "denoise":
+            from core.waifu2x_loader import load_waifu2x
+            model = load_waifu2x(method="noise", scale=1)
+        else:
+            model = upscaler
+        with metrics.span("upscale"):
+            enhanced = model(img) if cancel is None else run_banded(model, img, cancel)
+        status_manager.add(f"✅ Xử lý ảnh (processed, {mode})")
+        return enhanced
+    except OperationCancelled:
+        status_manager.add("🛑 Đã dừng xử lý ảnh")
+        raise
     except Exception as e:
         status_manager.add(f"❌ Lỗi xử lý ảnh: {e}")
         raise
 
 
-def process_image(upscaler, img: Image.Image, img_name: str, output_root: Path) -> tuple[Path, Path]:
+def processed_path_for(img_name: str, output_root: Path) -> Path:
+    """
+    Đường dẫn ảnh processed: output/{img_name}/processed/{img_name}_processed.png
+    """
+    return output_root / img_name / "processed" / f"{img_name}_processed.png"
+
+
+def save_processed(enhanced: Image.Image, img_name: str, output_root: Path) -> Path:
     """
-    Trả về (path ảnh gốc, path ảnh đã xử lý)
+    Lưu ảnh đã xử lý vào output/{img_name}/processed
+    """
+    try:
+        path = processed_path_for(img_name, output_root)
+        with metrics.span("save_processed"):
+            atomic_save_image(enhanced, path)
+        generate_previews(enhanced, path, output_root)
+        status_manager.add("✅ Lưu ảnh đã xử lý (processed)")
+        return path
+    except Exception as e:
+        status_manager.add(f"❌ Lỗi lưu ảnh đã xử lý: {e}")
+        raise
+
+
+def save_processed_async(enhanced: Image.Image, img_name: str, output_root: Path) -> "Future[Path]":
+    """
+    Lưu ảnh processed ở luồng nền, chạy song song với lời gọi OCR.
+    Gọi .result() trên Future trả về để chờ ghi xong (và nhận lỗi nếu có).
+    """
+    # copy_context: số đo của luồng nền vẫn ghi vào FileMetrics của ảnh đang xử lý
+    return _writer.submit(contextvars.copy_context().run, save_processed, enhanced, img_name, output_root)
+
+
+def prepare_image(img: Image.Image, img_name: str, output_root: Path) -> tuple[Path, PreprocessDecision]:
+    """
+    Lưu ảnh gốc, chọn nhánh tiền xử lý và ghi vào meta.json.
+    Trả về (path ảnh gốc, decision) — phần Waifu2x do caller chạy
+    (enhance_image hoặc UpscalePool).
     """
     orig = save_original(img, img_name, output_root)
-    proc = enhance_image(upscaler, img, img_name, output_root)
-    return orig, proc
+    with metrics.span("preprocess"):
+        decision = choose_preprocess(img)
+    status_manager.add(f"🧭 Tiền xử lý: {decision.mode} ({decision.reason})")
+    record_preprocess(decision, img_name, output_root)
+    return orig, decision
+
+
+def process_image(upscaler, img: Image.Image, img_name: str, output_root: Path) -> tuple[Path, Image.Image]:
+    """
+    Lưu ảnh gốc, chọn nhánh tiền xử lý (xem choose_preprocess) và xử lý ảnh.
+    Nhánh đã chọn được ghi vào meta.json của ảnh.
+    Trả về (path ảnh gốc, ảnh đã xử lý trong bộ nhớ) — việc ghi ảnh processed
+    do caller quyết định (xem save_processed_async).
+    """
+    orig, decision = prepare_image(img, img_name, output_root)
+    enhanced = enhance_image(upscaler, img, decision.mode)
+    return orig, enhanced
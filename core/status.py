@@ -1,24 +1,157 @@
-from typing import List
+from __future__ import annotations
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, List, TextIO
+
+from core import metrics
+
+# Số thông báo tối đa giữ trong bộ nhớ (cũ nhất bị đẩy ra)
+STATUS_CAPACITY = 2000
+
+# Level mặc định suy ra từ emoji đầu thông báo (các lời gọi add() cũ không truyền level)
+_EMOJI_LEVELS = (
+    ("❌", logging.ERROR),
+    ("⚠️", logging.WARNING),
+    ("🛑", logging.WARNING),
+)
+
+
+@dataclass(frozen=True)
+class StatusEvent:
+    """1 thông báo của pipeline"""
+    ts: float
+    level: int
+    message: str
+    file: str | None = None
+    stage: str | None = None
+    thread: str = ""
+
+    @property
+    def level_name(self) -> str:
+        return logging.getLevelName(self.level)
+
+
+class _ConsoleHandler(logging.Handler):
+    """
+    In thông báo ra console. Nơi in / bật tắt được chốt lúc add() (record.console, record.echo)
+    vì record được xử lý muộn hơn trên luồng QueueListener.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not getattr(record, "echo", True):
+            return
+        try:
+            stream = getattr(record, "console", None) or sys.stdout
+            stream.write(self.format(record) + "\n")
+            stream.flush()
+        except Exception:
+            self.handleError(record)
+
 
 class StatusManager:
     """
-    Quản lý thông báo cho pipeline.
+    Quản lý thông báo cho pipeline (thread-safe).
+    - Ring buffer `capacity` StatusEvent (level, thời gian, file, stage) — không tăng vô hạn
+    - Ghi ra `logging` (logger "ocr_medical.status") qua QueueHandler: luồng pipeline chỉ đưa
+      record vào queue, việc in ra console do luồng QueueListener làm
+    - subscribe(callback): UI nhận từng StatusEvent ngay khi có (không cần poll)
+    File / stage mặc định lấy từ ngữ cảnh của core.metrics (ảnh đang xử lý, span đang chạy).
     """
-    def __init__(self):
-        self.messages: List[str] = []
-        self.logs: List[str] = []
+
+    def __init__(self, capacity: int = STATUS_CAPACITY) -> None:
+        self._events: deque[StatusEvent] = deque(maxlen=capacity)
+        self._subscribers: list[Callable[[StatusEvent], None]] = []
+        self._lock = threading.Lock()
         self.state: str = ""
+        # Nơi in thông báo (None = stdout); CLI chuyển sang stderr để stdout chỉ chứa JSON
+        self.stream: TextIO | None = None
+        self.echo: bool = True
+
+        self.logger = logging.getLogger("ocr_medical.status")
+        self.logger.setLevel(logging.DEBUG)
+        # Không đẩy lên root (tránh in 2 lần); app muốn ghi file thì addHandler vào logger này
+        self.logger.propagate = False
+
+        console = _ConsoleHandler()
+        console.setFormatter(logging.Formatter("%(message)s"))
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+        self._listener.start()
+        # Thoát process: in nốt các thông báo còn trong queue
+        atexit.register(self._listener.stop)
+
+    # =========================
+    # Ghi thông báo
+    # =========================
+    def add(self, msg: str, level: int | None = None, file: str | None = None, stage: str | None = None):
+        if level is None:
+            level = next((lv for prefix, lv in _EMOJI_LEVELS if msg.startswith(prefix)), logging.INFO)
+        if file is None:
+            current = metrics.current()
+            file = current.name if current is not None else None
+        event = StatusEvent(
+            ts=time.time(),
+            level=level,
+            message=msg,
+            file=file,
+            stage=stage or metrics.current_stage(),
+            thread=threading.current_thread().name,
+        )
+        with self._lock:
+            self._events.append(event)
+            self.state = msg
+            subscribers = list(self._subscribers)
+
+        self.logger.log(level, msg, extra={"file": event.file, "stage": event.stage,
+                                           "console": self.stream, "echo": self.echo})
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    def subscribe(self, callback: Callable[[StatusEvent], None]) -> Callable[[], None]:
+        """
+        Đăng ký nhận StatusEvent mới; trả về hàm huỷ đăng ký.
+        `callback` chạy trên luồng gọi add() (luồng pipeline) — UI Qt cần chuyển qua Signal.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    # =========================
+    # Đọc lại
+    # =========================
+    def events(self, min_level: int = logging.NOTSET, file: str | None = None) -> List[StatusEvent]:
+        """Bản sao các thông báo còn trong buffer (lọc theo level / file)"""
+        with self._lock:
+            events = list(self._events)
+        return [e for e in events if e.level >= min_level and (file is None or e.file == file)]
 
-    def add(self, msg: str):
-        print(msg)
-        self.messages.append(msg)
-        self.logs.append(msg)
-        self.state = msg
+    @property
+    def messages(self) -> List[str]:
+        """Nội dung các thông báo còn trong buffer (tương thích code cũ)"""
+        with self._lock:
+            return [e.message for e in self._events]
 
     def reset(self):
-        self.messages.clear()
-        self.logs.clear()
-        self.state = ""
+        with self._lock:
+            self._events.clear()
+            self.state = ""
 
 # Singleton
-status_manager = StatusManager()
\ No newline at end of file
+status_manager = StatusManager()
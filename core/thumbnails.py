@@ -0,0 +1,146 @@
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from pathlib import Path
+from PIL import Image
+
+from config.config_service import config_service
+from core.status import status_manager
+from utils.file_helper import atomic_save_image
+
+THUMBS_DIR_NAME = ".thumbs"
+
+# Các mức preview (cạnh dài nhất, px) — UI chọn mức nhỏ nhất đủ cho vùng hiển thị
+PREVIEW_SIZES = (256, 1024, 2048)
+
+
+def preview_size_for(needed: int) -> int:
+    """Mức preview nhỏ nhất có cạnh >= `needed` px (tối đa mức lớn nhất)"""
+    for size in PREVIEW_SIZES:
+        if size >= needed:
+            return size
+    return PREVIEW_SIZES[-1]
+
+
+class ThumbnailCache:
+    """
+    Ảnh preview nhiều mức phân giải trên đĩa: {output_root}/.thumbs/{key}_{size}.jpg,
+    key = hash(path tuyệt đối + mtime + kích thước file) → ảnh nguồn đổi thì tự tạo lại.
+    Dùng được từ luồng nền (không phụ thuộc Qt).
+    """
+
+    def __init__(self, output_root: Path, max_bytes: int) -> None:
+        self.dir = Path(output_root) / THUMBS_DIR_NAME
+        self.max_bytes = max_bytes
+
+    def _key(self, source: Path) -> str | None:
+        try:
+            st = source.stat()
+        except OSError:
+            return None
+        raw = f"{source.resolve()}|{st.st_mtime_ns}|{st.st_size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24]
+
+    def path_for(self, source: Path, max_side: int) -> Path | None:
+        key = self._key(Path(source))
+        return None if key is None else self.dir / f"{key}_{max_side}.jpg"
+
+    def get(self, source: Path, max_side: int) -> Path | None:
+        """Path preview mức `max_side` của `source` (tạo nếu chưa có); None nếu không đọc được ảnh"""
+        source = Path(source)
+        path = self.path_for(source, max_side)
+        if path is None:
+            return None
+        if path.exists():
+            return path
+        try:
+            with Image.open(source) as img:
+                # JPEG: decode thẳng ở độ phân giải thấp (nhanh hơn nhiều so với decode đủ rồi thu nhỏ)
+                img.draft("RGB", (max_side, max_side))
+                self._save(img, path, max_side)
+        except Exception as e:
+            status_manager.add(f"⚠️ Không tạo được preview {source.name}: {e}")
+            return None
+        return path
+
+    def generate(self, source: Path, img: Image.Image | None = None) -> None:
+        """
+        Tạo sẵn mọi mức preview cho `source` (gọi từ pipeline sau khi ghi ảnh).
+        Truyền `img` (ảnh đang có trong bộ nhớ) để khỏi decode lại file.
+        """
+        source = Path(source)
+        if img is None:
+            with Image.open(source) as opened:
+                opened.load()
+                img = opened.copy()
+        current = img
+        # Từ mức lớn xuống mức nhỏ: mỗi mức thu nhỏ từ mức trước (ít pixel hơn ảnh gốc)
+        for size in sorted(PREVIEW_SIZES, reverse=True):
+            path = self.path_for(source, size)
+            if path is None:
+                return
+            current = self._save(current, path, size)
+
+    def _save(self, img: Image.Image, path: Path, max_side: int) -> Image.Image:
+        """Thu nhỏ `img` về cạnh dài `max_side` (không copy ảnh đầy đủ) rồi ghi JPEG"""
+        scale = max_side / max(img.size)
+        thumb = img
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            thumb = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        if thumb.mode != "RGB":
+            thumb = thumb.convert("RGB")
+        atomic_save_image(thumb, path, quality=90)
+        return thumb
+
+    def prune(self) -> int:
+        """Xoá preview cũ nhất (theo mtime) cho tới khi tổng dung lượng <= max_bytes. Trả về số file đã xoá"""
+        if not self.dir.exists():
+            return 0
+        entries = []
+        total = 0
+        with os.scandir(self.dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.startswith("."):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            status_manager.add(f"🧹 Preview cache: removed {removed} file(s)")
+        return removed
+
+
+_caches: dict[Path, ThumbnailCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_thumbnail_cache(output_root: Path) -> ThumbnailCache:
+    """
+    ThumbnailCache của storage root (tạo lần đầu, dọn cache cũ 1 lần mỗi phiên).
+    Giới hạn dung lượng: `preview_cache_max_mb`.
+    """
+    root = Path(output_root).resolve()
+    max_bytes = max(1, config_service.get_int("preview_cache_max_mb", 512)) * 1024 * 1024
+    with _caches_lock:
+        cache = _caches.get(root)
+        created = cache is None
+        if created:
+            cache = _caches[root] = ThumbnailCache(root, max_bytes)
+        cache.max_bytes = max_bytes
+    if created:
+        try:
+            cache.prune()
+        except OSError:
+            pass
+    return cache
@@ -0,0 +1,309 @@
+from __future__ import annotations
+import contextvars
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from PIL import Image
+
+from config.config_service import config_service
+from core import metrics
+from core.cancel import CancelToken
+from core.status import status_manager
+
+# Tỉ lệ số byte ảnh output / input theo nhánh tiền xử lý (Waifu2x 2x → 4 lần số pixel)
+_OUTPUT_FACTOR = {"upscale": 4, "denoise": 1}
+
+
+class _SharedFlag:
+    """
+    Cờ huỷ của 1 job: 1 byte ngay sau dữ liệu ảnh trong shared memory input.
+    Process cha set(), process con đọc is_set() giữa các dải — mỗi job 1 cờ riêng,
+    nên huỷ 1 batch không ảnh hưởng job của batch khác dùng chung pool.
+    Dùng như Event cho CancelToken; sau close() mọi thao tác đều bỏ qua (shared memory đã đóng).
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, offset: int) -> None:
+        self._shm = shm
+        self._offset = offset
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def is_set(self) -> bool:
+        with self._lock:
+            return not self._closed and self._shm.buf[self._offset] != 0
+
+    def set(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._shm.buf[self._offset] = 1
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(0.05, remaining))
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+
+
+# ==========================================================
+# 🔧 Phía process con
+# ==========================================================
+def _init_worker(num_threads: int, ready_count) -> None:
+    """
+    Khởi tạo process con: giới hạn số thread torch để các worker không tranh CPU,
+    rồi load sẵn model Waifu2x 2x (giữ warm trong registry của process).
+    Load xong thì tăng `ready_count` (multiprocessing.Value dùng chung với process cha).
+    """
+    import torch
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    from core.waifu2x_loader import load_waifu2x
+    load_waifu2x()
+
+    with ready_count.get_lock():
+        ready_count.value += 1
+
+
+def _enhance_in_worker(in_name: str, size: tuple, pil_mode: str, out_name: str, mode: str) -> tuple:
+    """
+    Đọc ảnh từ shared memory `in_name`, xử lý theo `mode`, ghi kết quả vào `out_name`.
+    Byte ngay sau ảnh trong `in_name` là cờ huỷ của job (xem _SharedFlag).
+    Trả về (size, pil_mode, nbytes, elapsed_ms) của ảnh kết quả (elapsed_ms: thời gian Waifu2x).
+    """
+    from core.process_image import enhance_image
+    from core.waifu2x_loader import load_waifu2x
+
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    nbytes = len(Image.new(pil_mode, (1, 1)).tobytes()) * size[0] * size[1]
+    cancel_flag = _SharedFlag(in_shm, nbytes)
+    try:
+        img = Image.frombytes(pil_mode, size, bytes(in_shm.buf[:nbytes]))
+        start = time.perf_counter()
+        enhanced = enhance_image(load_waifu2x(), img, mode, cancel=CancelToken(cancel_flag))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+    finally:
+        cancel_flag.close()
+        in_shm.close()
+    data = enhanced.tobytes()
+
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        if len(data) > out_shm.size:
+            raise ValueError(f"Output image too large for shared buffer ({len(data)} > {out_shm.size} bytes)")
+        out_shm.buf[:len(data)] = data
+    finally:
+        out_shm.close()
+    return enhanced.size, enhanced.mode, len(data), elapsed_ms
+
+
+# ==========================================================
+# ⚙️ UpscalePool
+# ==========================================================
+class UpscalePool:
+    """
+    Engine upscale cho batch.
+    - workers > 0: N process con, mỗi process giữ 1 model Waifu2x warm và dùng
+      `threads_per_worker` thread torch; ảnh vào/ra đi qua shared memory
+      (do process cha tạo và giữ, nên dùng được cả trên Windows).
+    - workers = 0: xử lý trong process hiện tại (GPU hoặc máy ít core).
+    Huỷ qua CancelToken truyền vào submit(): Future trả về bị huỷ ngay, phần Waifu2x đang chạy
+    dừng ở dải kế tiếp. Mỗi job có cờ huỷ riêng → GUI, CLI và warm-up dùng chung pool an toàn.
+    """
+
+    def __init__(self, workers: int, threads_per_worker: int) -> None:
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self._ready_count = None
+        if workers > 0:
+            ctx = mp.get_context("spawn")
+            # Số process con đã load xong model (mỗi initializer tăng 1)
+            self._ready_count = ctx.Value("i", 0)
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(threads_per_worker, self._ready_count),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="upscale")
+
+    @property
+    def capacity(self) -> int:
+        """Số ảnh nên đưa vào pool cùng lúc (mỗi worker 1 ảnh + 1 ảnh chờ)"""
+        return max(1, self.workers) + 1
+
+    @property
+    def ready_workers(self) -> int:
+        """Số process con đã khởi tạo xong (model Waifu2x đã load)"""
+        return self._ready_count.value if self._ready_count is not None else 0
+
+    def wait_ready(self, timeout: float) -> bool:
+        """
+        Chờ tối đa `timeout` giây cho đến khi mọi process con đã load xong model.
+        Process con chỉ được tạo khi có job → cần submit ít nhất `workers` job trước đó.
+        """
+        deadline = time.monotonic() + timeout
+        while self.ready_workers < self.workers:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    @staticmethod
+    def _bind_cancel(result: Future, task: Future, stop, cancel: CancelToken | None) -> None:
+        """
+        Khi `cancel` bị huỷ: huỷ Future trả về, bỏ job nếu chưa chạy (`task`)
+        và set cờ `stop` của job để phần Waifu2x đang chạy dừng lại
+        """
+        if cancel is None:
+            return
+
+        def _on_cancel():
+            stop.set()
+            result.cancel()
+            task.cancel()
+
+        cancel.on_cancel(_on_cancel)
+        result.add_done_callback(lambda _: cancel.remove_callback(_on_cancel))
+
+    def submit(self, img: Image.Image, mode: str = "upscale", cancel: CancelToken | None = None) -> "Future[Image.Image]":
+        """Xử lý ảnh theo nhánh `mode` ở nền, trả về Future chứa ảnh kết quả"""
+        if mode == "none":
+            done: Future = Future()
+            done.set_result(img)
+            return done
+
+        result: Future = Future()
+
+        if self.workers == 0:
+            from core.process_image import enhance_image
+            from core.waifu2x_loader import load_waifu2x
+            stop = threading.Event()
+            token = CancelToken(stop)
+
+            def _forward(f: Future) -> None:
+                try:
+                    result.set_result(f.result())
+                except InvalidStateError:
+                    pass
+                except BaseException as e:
+                    try:
+                        result.set_exception(e)
+                    except InvalidStateError:
+                        pass
+
+            # copy_context: span "upscale" của enhance_image ghi vào FileMetrics của ảnh
+            task = self._executor.submit(contextvars.copy_context().run,
+                                         lambda: enhance_image(load_waifu2x(), img, mode, cancel=token))
+            task.add_done_callback(_forward)
+            self._bind_cancel(result, task, stop, cancel)
+            return result
+
+        # Ảnh input + 1 byte cờ huỷ của job
+        data = img.tobytes()
+        in_shm = shared_memory.SharedMemory(create=True, size=len(data) + 1)
+        in_shm.buf[:len(data)] = data
+        in_shm.buf[len(data)] = 0
+        stop = _SharedFlag(in_shm, len(data))
+        out_shm = shared_memory.SharedMemory(create=True, size=len(data) * _OUTPUT_FACTOR.get(mode, 4))
+        file_metrics = metrics.current()
+
+        def _collect(f: Future) -> None:
+            try:
+                size, pil_mode, nbytes, elapsed_ms = f.result()
+                if file_metrics is not None:
+                    file_metrics.add("upscale", elapsed_ms)
+                if not result.cancelled():
+                    result.set_result(Image.frombytes(pil_mode, size, bytes(out_shm.buf[:nbytes])))
+            except InvalidStateError:
+                pass
+            except BaseException as e:
+                try:
+                    result.set_exception(e)
+                except InvalidStateError:
+                    pass
+            finally:
+                # Shared memory chỉ giải phóng khi process con đã xong (kể cả khi đã huỷ)
+                stop.close()
+                for shm in (in_shm, out_shm):
+                    shm.close()
+                    shm.unlink()
+
+        task = self._executor.submit(_enhance_in_worker, in_shm.name, img.size, img.mode, out_shm.name, mode)
+        task.add_done_callback(_collect)
+        self._bind_cancel(result, task, stop, cancel)
+        return result
+
+    def enhance(self, img: Image.Image, mode: str = "upscale", cancel: CancelToken | None = None) -> Image.Image:
+        """Bản blocking của submit()"""
+        return self.submit(img, mode, cancel=cancel).result()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: UpscalePool | None = None
+_pool_lock = threading.Lock()
+
+
+def _default_workers(threads_per_worker: int) -> int:
+    """GPU → xử lý trong process; CPU → chia đều core cho các worker"""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return 0
+    except ImportError:
+        pass
+    cpus = os.cpu_count() or 1
+    workers = cpus // threads_per_worker
+    return workers if workers >= 2 else 0
+
+
+def get_upscale_pool() -> UpscalePool:
+    """
+    UpscalePool dùng chung (tạo lần đầu từ config):
+    - upscale_workers: số process con, 0 = tự động
+    - upscale_threads_per_worker: số thread torch mỗi process
+      (giảm bớt nếu workers × threads vượt quá số CPU)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            cpus = os.cpu_count() or 1
+            wanted = max(1, config_service.get_int("upscale_threads_per_worker", 4))
+            threads = min(cpus, wanted)
+            workers = config_service.get_int("upscale_workers", 0)
+            if workers <= 0:
+                workers = _default_workers(threads)
+            else:
+                # Giữ số thread đã cấu hình, chỉ giảm khi các worker sẽ tranh nhau CPU
+                threads = max(1, min(threads, cpus // workers))
+            _pool = UpscalePool(workers, threads)
+            if workers:
+                note = f" (giảm từ {wanted} theo {cpus} CPU)" if threads < wanted else ""
+                status_manager.add(f"🧵 Upscale pool: {workers} process × {threads} thread{note}")
+            else:
+                status_manager.add("🧵 Upscale pool: xử lý trong process hiện tại")
+        return _pool
+
+
+def shutdown_upscale_pool() -> None:
+    """Dừng pool (gọi khi thoát app)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -1,5 +1,50 @@
+import threading
+from pathlib import Path
 import torch
 from core.status import status_manager
+from config.config_service import config_service
+
+# ==========================================================
+# 🗃️ Registry model dùng chung toàn process
+# key = (model_type, method, noise_level, scale, tile_size, device_ids)
+# ==========================================================
+_models: dict = {}
+_models_lock = threading.Lock()
+
+
+def _resolve_device_ids(device_ids):
+    """Tự động phát hiện thiết bị (GPU / CPU) nếu device_ids là None"""
+    if device_ids is not None:
+        return list(device_ids)
+    return [0] if torch.cuda.is_available() else [-1]
+
+
+def _resolve_hub_source(repo: str, source: str):
+    """
+    Chọn nguồn torch.hub:
+    - `waifu2x_hub_dir` trong config → dùng làm thư mục hub cache
+    - Nếu repo đã có trong hub cache → load từ local (không gọi GitHub)
+    - `waifu2x_offline` = true mà chưa có cache → báo lỗi thay vì tải về
+    """
+    hub_dir = config_service.get_path("waifu2x_hub_dir")
+    if hub_dir:
+        torch.hub.set_dir(str(hub_dir))
+
+    if source != "github":
+        return repo, source
+
+    owner, name = repo.split(":")[0].split("/")
+    cached = sorted(Path(torch.hub.get_dir()).glob(f"{owner}_{name}_*"))
+    cached = [p for p in cached if (p / "hubconf.py").exists()]
+    if cached:
+        status_manager.add(f"📦 Dùng Waifu2x từ hub cache: {cached[0]}")
+        return str(cached[0]), "local"
+
+    if config_service.get_bool("waifu2x_offline", False):
+        raise FileNotFoundError(
+            f"Không tìm thấy {repo} trong hub cache ({torch.hub.get_dir()}) và đang bật waifu2x_offline"
+        )
+    return repo, source
 
 
 def load_waifu2x(
@@ -16,47 +61,77 @@ def load_waifu2x(
 ):
     """
     Load model Waifu2x với tự động phát hiện thiết bị (GPU / CPU).
+    Model được giữ trong registry: các lần gọi sau với cùng cấu hình trả về
+    model đã load (không gọi lại torch.hub.load).
     """
     try:
-        # ------------------------------------------------
-        # 🔍 Tự động phát hiện thiết bị
-        # ------------------------------------------------
-        if device_ids is None:
-            if torch.cuda.is_available():
-                device_ids = [0]
-                device_name = torch.cuda.get_device_name(0)
-                status_manager.add(f"💪 Phát hiện GPU: {device_name}")
+        device_ids = _resolve_device_ids(device_ids)
+        key = (model_type, method, noise_level, scale, tile_size, tuple(device_ids))
+
+        with _models_lock:
+            upscaler = _models.get(key)
+            if upscaler is not None:
+                return upscaler
+
+            if device_ids[0] >= 0:
+                status_manager.add(f"💪 Phát hiện GPU: {torch.cuda.get_device_name(device_ids[0])}")
             else:
-                device_ids = [-1]
                 status_manager.add("⚙️ Không có GPU — sử dụng CPU")
 
-        # ------------------------------------------------
-        # 🚀 Load model
-        # ------------------------------------------------
-        status_manager.add("🔄 Đang load model Waifu2x...")
-
-        upscaler = torch.hub.load(
-            repo,
-            'waifu2x',
-            source=source,
-            model_type=model_type,
-            method=method,
-            noise_level=noise_level,
-            scale=scale,
-            tile_size=tile_size,
-            batch_size=batch_size,
-            device_ids=device_ids,
-            amp=amp if torch.cuda.is_available() else False,  # tắt amp nếu không có GPU
-        )
+            # ------------------------------------------------
+            # 🚀 Load model
+            # ------------------------------------------------
+            status_manager.add("🔄 Đang load model Waifu2x...")
+            hub_repo, hub_source = _resolve_hub_source(repo, source)
+
+            upscaler = torch.hub.load(
+                hub_repo,
+                'waifu2x',
+                source=hub_source,
+                model_type=model_type,
+                method=method,
+                noise_level=noise_level,
+                scale=scale,
+                tile_size=tile_size,
+                batch_size=batch_size,
+                device_ids=device_ids,
+                amp=amp if torch.cuda.is_available() else False,  # tắt amp nếu không có GPU
+            )
 
-        status_manager.add("✅ Load model Waifu2x thành công")
-        return upscaler
+            _models[key] = upscaler
+            status_manager.add("✅ Load model Waifu2x thành công")
+            return upscaler
 
     except Exception as e:
         status_manager.add(f"❌ Lỗi load model Waifu2x: {e}")
         raise
 
 
+def loaded_models() -> list:
+    """Danh sách key các model đang được giữ trong registry"""
+    with _models_lock:
+        return list(_models.keys())
+
+
+def unload_waifu2x(key=None) -> int:
+    """
+    Giải phóng model khỏi registry (key=None → giải phóng tất cả).
+    Trả về số model đã unload.
+    """
+    with _models_lock:
+        keys = list(_models.keys()) if key is None else [key]
+        count = 0
+        for k in keys:
+            if _models.pop(k, None) is not None:
+                count += 1
+
+    if count and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    if count:
+        status_manager.add(f"🧹 Đã unload {count} model Waifu2x")
+    return count
+
+
 # ==========================================================
 # 🔧 TEST TRỰC TIẾP FILE NÀY
 # ==========================================================
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from typing import Callable
+
+from config.config_service import config_service
+from core.status import status_manager
+
+# Thành phần được làm nóng khi mở app
+COMPONENT_UPSCALE = "upscale"        # UpscalePool + model Waifu2x (+ 1 lần chạy thử)
+COMPONENT_OCR_SERVER = "ocr_server"  # client OCR + GET {base_url}/models
+COMPONENTS = (COMPONENT_UPSCALE, COMPONENT_OCR_SERVER)
+
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_READY = "ready"
+STATE_FAILED = "failed"
+STATE_SKIPPED = "skipped"            # tắt warm-up (`warmup_enabled` = false)
+
+# Ảnh chạy thử: đúng 1 tile Waifu2x → JIT / cấp phát bộ nhớ mà gần như không tốn thời gian
+DUMMY_SIZE = (64, 64)
+
+
+@dataclass(frozen=True)
+class WarmupState:
+    """Trạng thái warm-up của 1 thành phần"""
+    component: str
+    state: str = STATE_PENDING
+    detail: str = ""
+    elapsed_ms: float = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.state == STATE_READY
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (STATE_READY, STATE_FAILED, STATE_SKIPPED)
+
+
+def ping_ocr_server(timeout: float) -> str:
+    """
+    GET {base_url}/models (OpenAI-compatible). Trả về mô tả ngắn; lỗi kết nối / HTTP thì raise.
+    Dùng urllib (thư viện chuẩn) để không phụ thuộc engine OCR đang chọn.
+    """
+    base_url = config_service.get_str("base_url", "http://127.0.0.1:1234/v1").rstrip("/")
+    model_id = config_service.get_str("model_id", "qwen/qwen2.5-vl-7b")
+    with urllib.request.urlopen(f"{base_url}/models", timeout=timeout) as resp:
+        data = json.load(resp)
+    ids = [m.get("id") for m in data.get("data", []) if isinstance(m, dict)]
+    if model_id in ids:
+        return f"{model_id} available"
+    # Server vẫn chạy (có thể tự load model khi có request) → coi là sẵn sàng, chỉ cảnh báo
+    return f"{model_id} not listed ({len(ids)} model(s) on server)"
+
+
+class WarmupService:
+    """
+    Làm nóng pipeline ở nền ngay sau khi mở app, để ảnh đầu tiên chỉ tốn thời gian xử lý:
+    - upscale: tạo UpscalePool, load Waifu2x và chạy thử 1 ảnh nhỏ (chờ mọi process con load xong model)
+    - ocr_server: tạo client OCR dùng chung, ping GET /models
+    Mỗi thành phần chạy trên 1 luồng daemon riêng. UI đọc trạng thái qua state()/snapshot()
+    hoặc subscribe(callback) (callback chạy trên luồng warm-up — Qt cần chuyển qua Signal).
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[str, WarmupState] = {c: WarmupState(c) for c in COMPONENTS}
+        self._subscribers: list[Callable[[WarmupState], None]] = []
+        self._cond = threading.Condition()
+        self._started = False
+
+    # =========================
+    # Trạng thái
+    # =========================
+    def state(self, component: str) -> WarmupState:
+        with self._cond:
+            return self._states[component]
+
+    def snapshot(self) -> dict[str, WarmupState]:
+        with self._cond:
+            return dict(self._states)
+
+    def is_ready(self, component: str) -> bool:
+        return self.state(component).ready
+
+    def wait(self, component: str, timeout: float | None = None) -> WarmupState:
+        """Chờ thành phần warm-up xong (ready / failed / skipped) hoặc hết `timeout` giây"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._states[component].finished or not self._started, timeout)
+            return self._states[component]
+
+    def subscribe(self, callback: Callable[[WarmupState], None]) -> Callable[[], None]:
+        """Đăng ký nhận WarmupState mỗi khi có thay đổi; trả về hàm huỷ đăng ký"""
+        with self._cond:
+            self._subscribers.append(callback)
+
+        def _unsubscribe() -> None:
+            with self._cond:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return _unsubscribe
+
+    def _set(self, component: str, state: str, detail: str = "", elapsed_ms: float = 0.0) -> None:
+        new = WarmupState(component, state, detail, round(elapsed_ms, 1))
+        with self._cond:
+            self._states[component] = new
+            subscribers = list(self._subscribers)
+            self._cond.notify_all()
+        for callback in subscribers:
+            try:
+                callback(new)
+            except Exception:
+                pass
+
+    # =========================
+    # Chạy warm-up
+    # =========================
+    def start(self) -> bool:
+        """Bắt đầu warm-up ở nền (gọi nhiều lần chỉ chạy 1 lần). Trả về False nếu bị tắt trong config"""
+        with self._cond:
+            if self._started:
+                return True
+            self._started = True
+
+        if not config_service.get_bool("warmup_enabled", True):
+            for component in COMPONENTS:
+                self._set(component, STATE_SKIPPED, "disabled")
+            return False
+
+        for component, target in ((COMPONENT_UPSCALE, self._warm_upscale),
+                                  (COMPONENT_OCR_SERVER, self._warm_ocr_server)):
+            threading.Thread(target=self._run, args=(component, target),
+                             name=f"warmup-{component}", daemon=True).start()
+        return True
+
+    def _run(self, component: str, target: Callable[[], str]) -> None:
+        self._set(component, STATE_RUNNING)
+        start = time.perf_counter()
+        try:
+            detail = target()
+        except Exception as e:
+            elapsed = (time.perf_counter() - start) * 1000
+            status_manager.add(f"⚠️ Warm-up {component} thất bại: {e}")
+            self._set(component, STATE_FAILED, str(e), elapsed)
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        status_manager.add(f"🔥 Warm-up {component}: {detail} ({elapsed:.0f} ms)")
+        self._set(component, STATE_READY, detail, elapsed)
+
+    @staticmethod
+    def _warm_upscale() -> str:
+        from PIL import Image
+        from core.upscale_pool import get_upscale_pool
+
+        pool = get_upscale_pool()
+        dummy = Image.new("RGB", DUMMY_SIZE, "white")
+        if pool.workers == 0:
+            # Cùng registry với OCRWorker → lần bấm Process đầu tiên dùng lại model này
+            from core.waifu2x_loader import load_waifu2x
+            load_waifu2x()(dummy)
+            return "model loaded in process"
+
+        # `workers` ảnh thử → pool tạo đủ process con (initializer load model); 1 process có thể
+        # nhận nhiều ảnh thử nên chỉ báo sẵn sàng khi mọi initializer đã xác nhận load xong
+        futures = [pool.submit(dummy, "upscale") for _ in range(pool.workers)]
+        for f in futures:
+            f.result()
+        timeout = max(1.0, config_service.get_float("warmup_upscale_timeout", 120.0))
+        if not pool.wait_ready(timeout):
+            raise TimeoutError(f"only {pool.ready_workers}/{pool.workers} worker process(es) ready "
+                               f"after {timeout:.0f} s")
+        return f"{pool.workers} worker process(es) ready"
+
+    @staticmethod
+    def _warm_ocr_server() -> str:
+        from core.ocr_extract import get_ocr_client
+
+        # Tạo sẵn client (import requests/httpx, khởi động event loop của engine async)
+        get_ocr_client()
+        timeout = max(0.5, config_service.get_float("warmup_ping_timeout", 5.0))
+        try:
+            return ping_ocr_server(timeout)
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"OCR server unreachable: {e.reason}") from e
+
+
+_service: WarmupService | None = None
+_service_lock = threading.Lock()
+
+
+def get_warmup_service() -> WarmupService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WarmupService()
+        return _service
@@ -1,62 +1,62 @@
 from __future__ import annotations
+from utils.startup_timer import startup_timer
+import multiprocessing
 import sys
-import json
 from pathlib import Path
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QGuiApplication
+from PySide6.QtCore import QTimer
 from ui.main_window import MainWindow
-
-CONFIG_FILE = Path(__file__).resolve().parent / "config" / "app_config.json"
-
-
-def load_config() -> dict:
-    if CONFIG_FILE.exists():
-        try:
-            return json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
-
-
-def save_config(data: dict) -> None:
-    CONFIG_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+from config.config_service import config_service
+from core.warmup import get_warmup_service
 
 
 def main() -> int:
+    startup_timer.mark("imports")
     app = QApplication(sys.argv)
+    startup_timer.mark("qapplication")
     project_root = Path(__file__).resolve().parent
-    config = load_config()
-    theme_name = config.get("theme", "light")
+    theme_name = config_service.get_str("theme", "light")
 
     win = MainWindow(project_root, theme_name)
+    startup_timer.mark("main_window")
 
     screens = QGuiApplication.screens()
-    idx = min(config.get("last_screen", 0), len(screens) - 1)
-    geom = config.get("geometry")
+    idx = min(config_service.get_int("last_screen", 0), len(screens) - 1)
+    geom = config_service.get("geometry")
     if geom:
         x, y, w, h = geom
         win.setGeometry(x, y, w, h)
     else:
         win.setGeometry(screens[idx].geometry())
 
-    if config.get("is_fullscreen"):
+    if config_service.get_bool("is_fullscreen"):
         win.showFullScreen()
-    elif config.get("is_maximized"):
+    elif config_service.get_bool("is_maximized"):
         win.showMaximized()
     else:
         win.show()
 
     def on_quit():
         """Lưu lại thông tin cơ bản khi thoát ứng dụng."""
-        existing = load_config()
-        existing.update({
-            "theme": win.theme_manager.get_theme_name(),
-        })
-        save_config(existing)
+        config_service.update(theme=win.theme_manager.get_theme_name())
+        from core.upscale_pool import shutdown_upscale_pool
+        shutdown_upscale_pool()
 
     app.aboutToQuit.connect(on_quit)
+
+    def on_first_frame():
+        startup_timer.mark("first_frame")
+        startup_timer.print_report()
+        # Cửa sổ đã hiện → làm nóng model / OCR server ở nền
+        get_warmup_service().start()
+
+    # Chạy sau vòng event loop đầu tiên (cửa sổ đã được vẽ)
+    QTimer.singleShot(0, on_first_frame)
     return app.exec()
 
 
 if __name__ == "__main__":
+    # Cần cho UpscalePool (process con dạng spawn) khi đóng gói thành exe
+    multiprocessing.freeze_support()
     raise SystemExit(main())
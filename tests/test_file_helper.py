@@ -0,0 +1,33 @@
+import os
+import stat
+
+import pytest
+
+from utils.file_helper import _UMASK, atomic_write_text
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+
+
+def test_new_file_uses_default_mode(tmp_path):
+    path = atomic_write_text(tmp_path / "a.md", "x")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~_UMASK
+
+
+def test_replace_keeps_existing_mode(tmp_path):
+    path = tmp_path / "a.md"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    atomic_write_text(path, "new")
+    assert path.read_text() == "new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_chmod_failure_leaves_no_temp_file(tmp_path, monkeypatch):
+    def _deny(*args, **kwargs):
+        raise PermissionError("chmod not supported")
+
+    monkeypatch.setattr(os, "chmod", _deny)
+    with pytest.raises(PermissionError):
+        atomic_write_text(tmp_path / "a.md", "x")
+    assert list(tmp_path.iterdir()) == []
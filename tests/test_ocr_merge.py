@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("PIL")
+
+from core.ocr_extract import merge_markdown
+
+
+def test_repeated_row_inside_window_does_not_drop_rows():
+    head = "Header\n| Na | 140 | mmol/L |\n| K | 4.0 | mmol/L |"
+    tail = "| Cl | 100 | mmol/L |\n| Na | 140 | mmol/L |\n| Ca | 2.3 | mmol/L |"
+    merged = merge_markdown([head, tail])
+    for row in ("| K | 4.0 | mmol/L |", "| Cl | 100 | mmol/L |", "| Ca | 2.3 | mmol/L |"):
+        assert row in merged
+
+
+def test_overlap_at_seam_is_removed():
+    head = "Header\n| Na | 140 | mmol/L |\n| K | 4.0 | mmol/L |"
+    tail = "| Na | 140 | mmol/L |\n| K | 4.0 | mmol/L |\n| Cl | 100 | mmol/L |"
+    merged = merge_markdown([head, tail]).splitlines()
+    assert merged == ["Header", "| Na | 140 | mmol/L |", "| K | 4.0 | mmol/L |", "| Cl | 100 | mmol/L |"]
+
+
+def test_truncated_last_head_row_is_replaced():
+    head = "Header\n| Na | 140 | mmol/L |\n| K | 4.0 | mmol/L |\n| Cl | 10"
+    tail = "| K | 4.0 | mmol/L |\n| Cl | 100 | mmol/L |\n| Ca | 2.3 | mmol/L |"
+    merged = merge_markdown([head, tail]).splitlines()
+    assert merged == ["Header", "| Na | 140 | mmol/L |", "| K | 4.0 | mmol/L |",
+                      "| Cl | 100 | mmol/L |", "| Ca | 2.3 | mmol/L |"]
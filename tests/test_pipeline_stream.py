@@ -0,0 +1,32 @@
+from concurrent.futures import Future
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from core.cancel import OperationCancelled
+from core.pipeline import upscale_stream
+
+
+class _PendingPool:
+    """Pool giả: job không bao giờ xong → ảnh nằm lại trong hàng chờ của upscale_stream"""
+    capacity = 4
+
+    def submit(self, img, mode, cancel=None):
+        return Future()
+
+
+def test_stop_reports_every_started_item(tmp_path):
+    sources = []
+    for i in range(4):
+        path = tmp_path / f"img{i}.png"
+        Image.new("RGB", (8, 8), "white").save(path)
+        sources.append(path)
+
+    started = []
+    items = list(upscale_stream(enumerate(sources), tmp_path / "out", pool=_PendingPool(), bypass_cache=True,
+                                on_start=started.append, should_stop=lambda: len(started) >= 2))
+
+    assert started == [0, 1]
+    assert [item.key for item in items] == started
+    assert all(isinstance(item.error, OperationCancelled) for item in items)
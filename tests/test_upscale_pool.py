@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("PIL")
+
+from core.upscale_pool import UpscalePool
+
+
+@pytest.fixture
+def pool():
+    # Process con chỉ được tạo khi có job → không cần torch / model
+    pool = UpscalePool(workers=2, threads_per_worker=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_wait_ready_times_out_below_workers(pool):
+    pool._ready_count.value = 1
+    assert pool.ready_workers == 1
+    assert pool.wait_ready(0.1) is False
+
+
+def test_wait_ready_when_all_workers_acked(pool):
+    pool._ready_count.value = 2
+    assert pool.ready_workers == 2
+    assert pool.wait_ready(0.1) is True
+
+
+def test_in_process_pool_has_no_workers_to_wait_for():
+    pool = UpscalePool(workers=0, threads_per_worker=1)
+    try:
+        assert pool.ready_workers == 0
+        assert pool.wait_ready(0) is True
+    finally:
+        pool.shutdown()
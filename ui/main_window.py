@@ -1,4 +1,7 @@
 from __future__ import annotations
+import importlib
+import logging
+import time
 from PySide6.QtGui import QIcon
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QMainWindow, QWidget, QGridLayout, QStackedWidget, QFrame
@@ -6,13 +9,11 @@ from PySide6.QtWidgets import QMainWindow, QWidget, QGridLayout, QStackedWidget,
 from pathlib import Path
 
 from ui.widgets.side_panel import SidePanel
-from ui.pages.home_page import HomePage
-from ui.pages.setting_page import SettingPage
-from ui.pages.file_log_page import FileLogPage
-from ui.pages.extract_info_page import ExtraInfoPage
-from ui.pages.review_page import ReviewPage
 from ui.style.theme_manager import ThemeManager
-from ui.style.style_loader import load_theme_qss
+from ui.style.style_loader import load_theme_qss, prewarm_icons
+from utils.startup_timer import startup_timer
+
+logger = logging.getLogger(__name__)
 
 
 MARGIN = 24
@@ -22,6 +23,15 @@ TOTAL_COLS = 12
 MAIN_COLS = TOTAL_COLS - SIDE_COLS
 TOTAL_ROWS = 12
 
+# Page được tạo khi điều hướng tới lần đầu (module chỉ import lúc đó): key → (module, class)
+PAGE_CLASSES = {
+    "home": ("ui.pages.home_page", "HomePage"),
+    "extra_info": ("ui.pages.extract_info_page", "ExtraInfoPage"),
+    "file_log": ("ui.pages.file_log_page", "FileLogPage"),
+    "setting": ("ui.pages.setting_page", "SettingPage"),
+    "review": ("ui.pages.review_page", "ReviewPage"),
+}
+
 
 class Panel(QFrame):
     """Khung panel có border / nền đồng nhất theo theme."""
@@ -45,6 +55,8 @@ class MainWindow(QMainWindow):
 
         self.theme_manager = ThemeManager(theme_name)
         self.theme_manager.theme_changed.connect(self.apply_theme)
+        # Render sẵn icon dùng chung trước khi dựng side panel / các page
+        prewarm_icons(self.theme_manager.get_theme_data())
 
         root = QWidget(self)
         self.setObjectName("MainWindow")
@@ -79,21 +91,7 @@ class MainWindow(QMainWindow):
         grid.addWidget(side_wrapper, 0, 0, TOTAL_ROWS, SIDE_COLS)
         grid.addWidget(main_wrapper, 0, SIDE_COLS, TOTAL_ROWS, MAIN_COLS)
 
-        self.page_index: dict[str, int] = {}
-
-        home_page = HomePage(self.theme_manager)
-        home_page.process_requested.connect(self._go_to_extract_info)
-        self._add_page("home", home_page)
-
-        self._add_page("setting", SettingPage(self.theme_manager))
-        self._add_page("file_log", FileLogPage(self.theme_manager))
-
-        extract_page = ExtraInfoPage(self.theme_manager)
-        extract_page.navigate_back_requested.connect(
-            lambda: self.navigate_to("home"))
-        self._add_page("extra_info", extract_page)
-
-        self._add_page("review", ReviewPage(self.theme_manager))
+        self.pages: dict[str, QWidget] = {}
 
         self.side_panel.page_selected.connect(self.navigate_to)
 
@@ -115,22 +113,44 @@ class MainWindow(QMainWindow):
         for child in widget.findChildren(QWidget):
             child.setFocusPolicy(policy)
 
-    def _add_page(self, key: str, widget: QWidget) -> None:
-        idx = self.stack.addWidget(widget)
-        self.page_index[key] = idx
+    def _page(self, key: str) -> QWidget:
+        """Page theo key — tạo (import module, dựng widget, nối signal) ở lần gọi đầu tiên"""
+        page = self.pages.get(key)
+        if page is not None:
+            return page
+
+        start = time.perf_counter()
+        module_name, class_name = PAGE_CLASSES[key]
+        page_cls = getattr(importlib.import_module(module_name), class_name)
+        page = page_cls(self.theme_manager)
+
+        if key == "home":
+            page.process_requested.connect(self._go_to_extract_info)
+        elif key == "extra_info":
+            page.navigate_back_requested.connect(lambda: self.navigate_to("home"))
+
+        self.stack.addWidget(page)
+        self.pages[key] = page
+        ms = (time.perf_counter() - start) * 1000
+        if startup_timer.reported:
+            logger.debug(f"Page {key} built in {ms:.0f} ms")
+        else:
+            startup_timer.mark(f"page:{key}")
+        return page
 
     def navigate_to(self, key: str) -> None:
-        if key in self.page_index:
-            self.stack.setCurrentIndex(self.page_index[key])
+        if key in PAGE_CLASSES:
+            self.stack.setCurrentWidget(self._page(key))
             self.side_panel.set_active(key)
 
     def _go_to_extract_info(self, files: list[Path]):
         self.navigate_to("extra_info")
 
-        page = self.stack.widget(self.page_index["extra_info"])
+        page = self._page("extra_info")
         if hasattr(page, "load_files"):
             page.load_files(files)
 
     def apply_theme(self, theme_data: dict, theme_name: str) -> None:
         qss = load_theme_qss(theme_name)
-        self.setStyleSheet(qss)
+        if qss != self.styleSheet():
+            self.setStyleSheet(qss)
@@ -64,7 +64,9 @@ class BasePage(QWidget):
             try:
                 # Load file QSS từ theme hiện tại
                 qss = load_theme_qss(theme_name, page_name)
-                self.setStyleSheet(qss)
             except FileNotFoundError:
                 # Nếu không tìm thấy file QSS, xóa stylesheet
-                self.setStyleSheet("")
\ No newline at end of file
+                qss = ""
+            # Cùng stylesheet thì bỏ qua: setStyleSheet buộc Qt polish lại toàn bộ widget con
+            if qss != self.styleSheet():
+                self.setStyleSheet(qss)
\ No newline at end of file
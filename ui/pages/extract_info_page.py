@@ -4,20 +4,45 @@ from PySide6.QtWidgets import (
     QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QFrame,
     QStackedWidget, QScrollArea, QWidget, QTextBrowser, QSizePolicy, QTextEdit, QFileDialog
 )
-from PySide6.QtCore import Qt, Signal, QSize, QThread
-from PySide6.QtGui import QPixmap, QMovie
+from PySide6.QtCore import Qt, Signal, QSize, QThread, QTimer
+from PySide6.QtGui import QMovie, QTextCursor
 from pathlib import Path
 import logging
-import markdown
-import json
-
+import queue
+import threading
+import time
+from collections import deque
+
+from config.config_service import config_service
+from core.cancel import CancelToken
+from core.warmup import COMPONENT_UPSCALE, STATE_RUNNING, get_warmup_service
 from ui.pages.base_page import BasePage
 from ui.style.theme_manager import ThemeManager
 from ui.style.style_loader import load_svg_colored
+from ui.widgets.preview_loader import get_preview_loader
+from utils.file_helper import atomic_write_text
 import sys
 
 logger = logging.getLogger(__name__)
 
+# Chu kỳ vẽ lại kết quả OCR đang stream (ms) — gộp nhiều delta vào 1 lần render
+PARTIAL_REFRESH_MS = 250
+
+# Thời gian hiển thị tối thiểu (ms) của từng bước trước khi chuyển sang bước/kết quả tiếp theo.
+# Chỉ áp dụng phía UI — worker không bao giờ chờ animation.
+MIN_STEP_DISPLAY_MS = {
+    "load_model": 300,
+    "process_image": 300,
+    "extract_info": 300,
+    "success": 1500,
+}
+
+
+def _markdown_to_html(text: str, **kwargs) -> str:
+    """markdown.markdown — import lần đầu cần render (module markdown + extension nạp chậm lúc khởi động)"""
+    import markdown
+    return markdown.markdown(text, **kwargs)
+
 
 # =====================================================
 #             OCR Worker Thread
@@ -28,25 +53,49 @@ class OCRWorker(QThread):
     progress = Signal(int, str)
     step_progress = Signal(int, str)
     result = Signal(int, str, str)
+    partial = Signal(int, str)
     finished = Signal()
     error = Signal(int, str)
     stopped = Signal()
+    # Thông báo pipeline mới nhất của 1 file (từ status_manager.subscribe)
+    status = Signal(int, str)
 
-    def __init__(self, files: list[Path], output_root: Path, page_instance=None, file_indices: list[int] = None):
+    def __init__(self, files: list[Path], output_root: Path, page_instance=None, file_indices: list[int] = None,
+                 bypass_cache: bool = False):
         super().__init__()
         self.files = files
         self.output_root = output_root
         self.page_instance = page_instance
         self.file_indices = file_indices
-        self._is_running = True
-        self._force_stop = False
+        self.bypass_cache = bypass_cache
+        # Huỷ hợp tác: token đi xuống upscale (theo dải), request OCR và ghi file
+        self.cancel_token = CancelToken()
+        self.client = None
+
+    def _stopped(self) -> bool:
+        return self.cancel_token.is_cancelled()
 
     def run(self):
+        from core.status import status_manager
+
+        # Chỉ chuyển tiếp thông báo gắn với file của batch này (file = tên ảnh không đuôi)
+        indices = {f.stem: idx for idx, f in enumerate(self.files)}
+
+        def _forward(event):
+            idx = indices.get(event.file)
+            if idx is not None:
+                self.status.emit(idx, event.message)
+
+        unsubscribe = status_manager.subscribe(_forward)
+        try:
+            self._run()
+        finally:
+            unsubscribe()
+
+    def _run(self):
         from core.waifu2x_loader import load_waifu2x
-        from core.process_image import process_image
-        from core.ocr_extract import call_qwen_ocr
-        from core.pipeline import DEFAULT_PROMPT
-        from PIL import Image
+        from core.upscale_pool import get_upscale_pool
+        from core.ocr_extract import get_ocr_client
 
         try:
             # Xác định danh sách file cần xử lý
@@ -55,87 +104,53 @@ class OCRWorker(QThread):
             else:
                 files_to_process = list(enumerate(self.files))
 
-            # Bước 1: Load model Waifu2x (chỉ load 1 lần)
-            if len(files_to_process) > 0 and self._is_running:
-                first_idx = files_to_process[0][0]
+            if self._stopped():
+                self.stopped.emit()
+                return
+
+            # Không có file nào cần xử lý → xong luôn, không khởi tạo pool / client
+            if not files_to_process:
+                self.finished.emit()
+                return
+
+            # Bước 1: Khởi tạo UpscalePool (process con tự load model Waifu2x của mình;
+            # chế độ in-process thì load model ngay tại đây).
+            # Warm-up nền đã xong thì pool / model có sẵn → bỏ qua bước "load_model"
+            first_idx = files_to_process[0][0]
+            if not get_warmup_service().is_ready(COMPONENT_UPSCALE):
                 self.step_progress.emit(first_idx, "load_model")
-                upscaler = load_waifu2x()
+            pool = get_upscale_pool()
+            if pool.workers == 0:
+                load_waifu2x()
 
-            if not self._is_running:
+            if self._stopped():
                 self.stopped.emit()
                 return
 
-            for i, (idx, file_path) in enumerate(files_to_process):
-                if self._force_stop or not self._is_running:
-                    logger.info(f"OCR stopped at file {idx}")
-                    self.stopped.emit()
-                    return
+            # Các luồng OCR dùng chung 1 client (connection pool, keep-alive)
+            self.client = get_ocr_client()
+
+            # Pipeline 2 tầng: upscale (UpscalePool) → hàng đợi giới hạn → N luồng OCR
+            concurrency = self._get_concurrency()
+            jobs = queue.Queue(maxsize=concurrency)
+            ocr_threads = [
+                threading.Thread(target=self._ocr_stage, args=(jobs,), daemon=True)
+                for _ in range(max(1, min(concurrency, len(files_to_process))))
+            ]
+            for t in ocr_threads:
+                t.start()
 
-                try:
-                    self.progress.emit(idx, "processing")
-                    logger.info(f"Processing file {idx + 1}/{len(self.files)}: {file_path.name}")
-
-                    if i > 0 and self._is_running:
-                        self.step_progress.emit(idx, "load_model")
-                        self.msleep(300)
-
-                    if not self._is_running:
-                        self.stopped.emit()
-                        return
-
-                    # Bước 2: Process image (upscale)
-                    self.step_progress.emit(idx, "process_image")
-                    img = Image.open(file_path).convert("RGB")
-                    img_name = file_path.stem
-                    _, processed_path = process_image(upscaler, img, img_name, self.output_root)
-
-                    if not self._is_running:
-                        self.stopped.emit()
-                        return
-
-                    # Bước 3: Extract information (OCR)
-                    self.step_progress.emit(idx, "extract_info")
-                    
-                    # 🔥 FIX: Tạo thư mục text trước khi lưu
-                    out_dir_text = self.output_root / img_name / "text"
-                    out_dir_text.mkdir(parents=True, exist_ok=True)
-
-                    # Gọi OCR
-                    extracted = call_qwen_ocr(str(processed_path), DEFAULT_PROMPT)
-
-                    if not self._is_running:
-                        self.stopped.emit()
-                        return
-
-                    # 🔥 FIX: LƯU FILE MARKDOWN NGAY SAU KHI OCR XONG
-                    md_path = out_dir_text / f"{img_name}_processed.md"
-                    with open(md_path, "w", encoding="utf-8") as f:
-                        f.write(extracted)
-                    
-                    logger.info(f"✅ Saved markdown to: {md_path}")
-
-                    # Đường dẫn ảnh processed
-                    processed_img = self.output_root / img_name / "processed" / f"{img_name}_processed.png"
-
-                    # Bước 4: Success
-                    self.step_progress.emit(idx, "success")
-                    self.msleep(1500)
-
-                    if not self._is_running:
-                        self.stopped.emit()
-                        return
-
-                    # 🔥 FIX: Emit kết quả với text đã lưu
-                    self.result.emit(idx, extracted, str(processed_img))
-                    self.progress.emit(idx, "completed")
-
-                except Exception as e:
-                    if not self._is_running:
-                        self.stopped.emit()
-                        return
-                    self.error.emit(idx, str(e))
-                    self.progress.emit(idx, "failed")
-                    logger.error(f"Error processing file {idx}: {str(e)}")
+            try:
+                self._upscale_stage(pool, files_to_process, jobs)
+            finally:
+                for _ in ocr_threads:
+                    jobs.put(None)
+                for t in ocr_threads:
+                    t.join()
+
+            if self._stopped():
+                self.stopped.emit()
+                return
 
             self.finished.emit()
 
@@ -143,32 +158,92 @@ class OCRWorker(QThread):
             logger.error(f"OCR Worker crashed: {str(e)}")
             self.stopped.emit()
 
-    def stop(self):
-        """Dừng worker một cách an toàn"""
-        self._is_running = False
-        self._force_stop = True
-        logger.info("OCR Worker stop requested")
+    def _get_concurrency(self) -> int:
+        """Số request OCR chạy song song (key `ocr_concurrency` trong config)"""
+        return max(1, config_service.get_int("ocr_concurrency", 2))
+
+    def _upscale_stage(self, pool, files_to_process, jobs: queue.Queue):
+        """Tầng 1: upscale song song qua UpscalePool rồi đẩy ảnh vào hàng đợi cho tầng OCR"""
+        from core.pipeline import upscale_stream
 
-    def terminate_worker(self):
-        """Buộc dừng worker ngay lập tức"""
-        self._force_stop = True
-        self._is_running = False
-        self.terminate()
-        logger.warning("OCR Worker force terminated")
+        def _on_start(idx):
+            file_path = self.files[idx]
+            self.progress.emit(idx, "processing")
+            logger.info(f"Processing file {idx + 1}/{len(self.files)}: {file_path.name}")
+
+            # Bước 2: Process image (upscale)
+            self.step_progress.emit(idx, "process_image")
+
+        items = ((idx, file_path) for idx, file_path in files_to_process)
+        for item in upscale_stream(items, self.output_root, pool=pool, bypass_cache=self.bypass_cache,
+                                   on_start=_on_start, cancel=self.cancel_token):
+            idx = item.key
+            if self._stopped():
+                logger.info(f"OCR stopped at file {idx}")
+                return
+
+            if item.error is not None:
+                self.error.emit(idx, str(item.error))
+                self.progress.emit(idx, "failed")
+                logger.error(f"Error processing file {idx}: {str(item.error)}")
+                continue
+
+            # Cache hit → bỏ qua upscale + OCR
+            if item.cached_markdown is not None:
+                self.step_progress.emit(idx, "success")
+                self.result.emit(idx, item.cached_markdown, str(item.preview_path))
+                self.progress.emit(idx, "completed")
+                continue
+
+            # Block khi hàng đợi đầy → giới hạn số ảnh đã upscale đang chờ OCR
+            jobs.put(item)
+
+    def _ocr_stage(self, jobs: queue.Queue):
+        """Tầng 2: lấy ảnh đã upscale từ hàng đợi và gọi OCR"""
+        from core.pipeline import finish_ocr
+
+        while True:
+            item = jobs.get()
+            if item is None:
+                return
+
+            idx = item.key
+            # Đã dừng → chỉ rút hàng đợi để tầng upscale không bị block
+            if self._stopped():
+                continue
+
+            try:
+                # Bước 3: Extract information (OCR)
+                self.step_progress.emit(idx, "extract_info")
+
+                # Gọi OCR thẳng từ ảnh trong bộ nhớ, stream text từng phần lên UI.
+                # Markdown / ảnh processed được ghi atomic và chỉ khi OCR hoàn tất.
+                extracted = finish_ocr(item, self.output_root, client=self.client,
+                                       on_partial=lambda text, idx=idx: self.partial.emit(idx, text),
+                                       cancel=self.cancel_token)
+
+                # Bước 4: Success — thời gian hiển thị animation do ExtraInfoPage quyết định
+                self.step_progress.emit(idx, "success")
+
+                # Preview dùng ảnh processed nếu đã ghi, ngược lại dùng ảnh gốc
+                self.result.emit(idx, extracted, str(item.preview_path))
+                self.progress.emit(idx, "completed")
+
+            except Exception as e:
+                if self._stopped():
+                    continue
+                self.error.emit(idx, str(e))
+                self.progress.emit(idx, "failed")
+                logger.error(f"Error processing file {idx}: {str(e)}")
 
     def stop(self):
-        """Dừng worker một cách an toàn"""
-        self._is_running = False
-        self._force_stop = True
+        """
+        Dừng worker: huỷ token → upscale dừng ở dải kế tiếp, request OCR đang chạy
+        bị đóng ngay; không file nào bị ghi dở.
+        """
+        self.cancel_token.cancel()
         logger.info("OCR Worker stop requested")
 
-    def terminate_worker(self):
-        """Buộc dừng worker ngay lập tức"""
-        self._force_stop = True
-        self._is_running = False
-        self.terminate()
-        logger.warning("OCR Worker force terminated")
-
 
 # =====================================================
 #           File Row Item (Clickable)
@@ -312,14 +387,30 @@ class ExtraInfoPage(BasePage):
         self.output_root = None
         self.file_items = []
         self.results_cache = {}
+        self.partial_results = {}
         self.file_status = {}
         self.file_md_paths = {}
         self.worker = None
         self.current_preview_index = 0
+        self._preview_path = None
 
         # Load storage directory từ config
         self.storage_dir = self._load_storage_dir()
 
+        # Render kết quả đang stream theo nhịp PARTIAL_REFRESH_MS thay vì mỗi delta
+        self._partial_timer = QTimer(self)
+        self._partial_timer.setSingleShot(True)
+        self._partial_timer.setInterval(PARTIAL_REFRESH_MS)
+        self._partial_timer.timeout.connect(self._render_partial)
+
+        # Hàng đợi hiển thị của file đang xem: mỗi bước giữ tối thiểu MIN_STEP_DISPLAY_MS
+        self._display_queue = deque()
+        self._display_step = None
+        self._display_since = 0.0
+        self._display_timer = QTimer(self)
+        self._display_timer.setSingleShot(True)
+        self._display_timer.timeout.connect(self._drain_display)
+
         layout = self.layout()
         layout.setSpacing(6)
 
@@ -669,21 +760,15 @@ class ExtraInfoPage(BasePage):
     #                   Logic
     # =====================================================
     def _load_storage_dir(self) -> Path:
-        """Load storage directory từ config file, mặc định là ./data/output"""
-        config_path = self.project_root / "config" / "app_config.json"
-
+        """Load storage directory từ config, mặc định là ./data/output"""
         try:
-            if config_path.exists():
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    storage_path_str = config.get("storage_path", "").strip()
-                    if storage_path_str:
-                        custom_dir = Path(storage_path_str)
-                        if custom_dir.exists():
-                            logger.info(f"Using custom storage path: {custom_dir}")
-                            return custom_dir
-                        else:
-                            logger.warning(f"Storage_path không tồn tại: {custom_dir}")
+            custom_dir = config_service.get_path("storage_path")
+            if custom_dir:
+                if custom_dir.exists():
+                    logger.info(f"Using custom storage path: {custom_dir}")
+                    return custom_dir
+                else:
+                    logger.warning(f"Storage_path không tồn tại: {custom_dir}")
 
             # 🔹 Mặc định dùng đường dẫn tương đối data/output
             default_path = self.project_root / "data" / "output"
@@ -719,8 +804,11 @@ class ExtraInfoPage(BasePage):
             if hasattr(self, "image_movie_tab2"):
                 self.processing_gif_tab2.setMovie(self.image_movie_tab2)
                 self.image_movie_tab2.start()
-            self.processing_text_tab1.setText("Loading model (1/3)")
-            self.processing_text_tab2.setText("Loading model (1/3)")
+            text = "Loading model (1/3)"
+            if get_warmup_service().state(COMPONENT_UPSCALE).state == STATE_RUNNING:
+                text += " — finishing background warm-up"
+            self.processing_text_tab1.setText(text)
+            self.processing_text_tab2.setText(text)
 
         elif step == "process_image":
             # Bước 2: Processing image
@@ -831,6 +919,42 @@ class ExtraInfoPage(BasePage):
             pass
         self.raw_text_area.textChanged.connect(self._update_live_preview)
 
+    def _show_streaming_content(self):
+        """Hiển thị kết quả OCR đang stream (chỉ đọc cho tới khi hoàn thành)"""
+        self.tab1_stack.setCurrentIndex(2)
+        self.tab2_stack.setCurrentIndex(2)
+
+        self._stop_all_movies()
+
+        self.raw_text_area.setReadOnly(True)
+        try:
+            self.raw_text_area.textChanged.disconnect(
+                self._update_live_preview)
+        except:
+            pass
+
+    def _render_partial(self):
+        """Vẽ lại text đang stream của file đang xem"""
+        idx = self.current_preview_index
+        text = self.partial_results.get(idx)
+        if text is None or self.file_status.get(idx) != "processing":
+            return
+        if self._display_queue:
+            # Bước trước chưa hiển thị đủ lâu → vẽ sau khi hàng đợi trống
+            self._partial_timer.start()
+            return
+
+        self._show_streaming_content()
+        html = _markdown_to_html(text, extensions=["tables", "fenced_code", "nl2br"])
+        self.markdown_preview.setHtml(html)
+        bar = self.markdown_preview.verticalScrollBar()
+        bar.setValue(bar.maximum())
+
+        self.raw_text_area.blockSignals(True)
+        self.raw_text_area.setPlainText(text)
+        self.raw_text_area.moveCursor(QTextCursor.End)
+        self.raw_text_area.blockSignals(False)
+
     def _show_empty_state(self):
         """Hiển thị trạng thái rỗng"""
         # Chuyển sang page empty (index 0)
@@ -841,7 +965,7 @@ class ExtraInfoPage(BasePage):
     def _update_live_preview(self):
         """Cập nhật markdown preview khi chỉnh sửa raw text"""
         text = self.raw_text_area.toPlainText()
-        html = markdown.markdown(
+        html = _markdown_to_html(
             text, extensions=["tables", "fenced_code", "nl2br"])
         self.markdown_preview.setHtml(html)
 
@@ -872,8 +996,7 @@ class ExtraInfoPage(BasePage):
             # 🔥 FIX: Đảm bảo thư mục tồn tại
             md_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(md_path, "w", encoding="utf-8") as f:
-                f.write(text)
+            atomic_write_text(md_path, text)
             
             logger.info(f"✅ Saved markdown to: {md_path}")
 
@@ -957,7 +1080,9 @@ class ExtraInfoPage(BasePage):
         self.file_items.clear()
         self.file_status.clear()
         self.results_cache.clear()
+        self.partial_results.clear()
         self.file_md_paths.clear()
+        self._reset_display()
 
     def _show_preview(self, idx: int, processed=False):
         """Hiển thị preview ảnh của file"""
@@ -967,27 +1092,39 @@ class ExtraInfoPage(BasePage):
                 _, img = self.results_cache[idx]
                 path = Path(img)
 
-            pix = QPixmap(str(path))
-            if not pix.isNull():
-                scaled = pix.scaled(self.preview_box.size(),
-                                    Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                self.preview_box.setPixmap(scaled)
-                self.current_preview_index = idx
+            self.current_preview_index = idx
+            self._preview_path = path
+            box = self.preview_box.size()
+            needed = int(max(box.width(), box.height()) * self.preview_box.devicePixelRatioF())
+
+            def _apply(pix, path=path):
+                # Bỏ qua kết quả về muộn của file không còn được xem
+                if pix.isNull() or self._preview_path != path:
+                    return
+                self.preview_box.setPixmap(pix.scaled(self.preview_box.size(),
+                                                      Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+            # Preview nạp nền (core.thumbnails + LRU), không decode ảnh đầy đủ trên luồng UI
+            get_preview_loader().request(path, self.output_root or self.storage_dir, needed, _apply)
 
     def _on_file_clicked(self, idx: int):
         """Xử lý khi click vào dòng file"""
         status = self.file_status.get(idx, "waiting")
+        self._reset_display()
 
         if status == "processing":
-            # Nếu đang xử lý, hiển thị bước cuối cùng
-            self._show_processing_step("extract_info")
+            # Nếu đang xử lý, hiển thị text đang stream (nếu có) hoặc bước cuối cùng
             self._show_preview(idx, processed=False)
+            if idx in self.partial_results:
+                self._render_partial()
+            else:
+                self._show_processing_step("extract_info")
 
         elif status == "completed" and idx in self.results_cache:
             # Nếu hoàn thành, hiển thị kết quả
             self._show_result_content()
             md, img = self.results_cache[idx]
-            html = markdown.markdown(
+            html = _markdown_to_html(
                 md, extensions=["tables", "fenced_code", "nl2br"])
             self.markdown_preview.setHtml(html)
             self.raw_text_area.setPlainText(md)
@@ -1048,9 +1185,11 @@ class ExtraInfoPage(BasePage):
         self.worker.progress.connect(self._on_progress)
         self.worker.step_progress.connect(self._on_step_progress)
         self.worker.result.connect(self._on_result)
+        self.worker.partial.connect(self._on_partial)
         self.worker.error.connect(self._on_error)
         self.worker.finished.connect(self._on_finished)
         self.worker.stopped.connect(self._on_stopped)
+        self.worker.status.connect(self._on_status)
         self.stop_btn.setEnabled(True)
         self.back_btn.setEnabled(False)
         self.worker.start()
@@ -1059,17 +1198,56 @@ class ExtraInfoPage(BasePage):
         """Cập nhật trạng thái xử lý"""
         self.file_items[idx].update_status(status)
         self.file_status[idx] = status
-        if status == "processing":
-            self._show_preview(idx, processed=False)
+
+    # ===== Hiển thị theo thời gian tối thiểu (thay cho sleep trong worker) =====
+    def _queue_display(self, step: str | None, action):
+        """Đưa 1 thay đổi hiển thị vào hàng đợi; chạy ngay nếu bước hiện tại đã hiển thị đủ lâu"""
+        self._display_queue.append((step, action))
+        self._drain_display()
+
+    def _drain_display(self):
+        while self._display_queue:
+            min_ms = MIN_STEP_DISPLAY_MS.get(self._display_step, 0)
+            remaining = min_ms - (time.monotonic() - self._display_since) * 1000
+            if remaining > 0:
+                self._display_timer.start(int(remaining) + 1)
+                return
+            step, action = self._display_queue.popleft()
+            action()
+            self._display_step = step
+            self._display_since = time.monotonic()
+
+    def _reset_display(self):
+        """Bỏ các hiển thị đang chờ (đổi file đang xem / dừng worker)"""
+        self._display_timer.stop()
+        self._display_queue.clear()
+        self._display_step = None
 
     def _on_step_progress(self, idx, step: str):
         """Xử lý cập nhật từng bước xử lý"""
+        if step == "success":
+            # Stream đã xong → không render partial đè lên màn success
+            self.partial_results.pop(idx, None)
+        elif step == "extract_info":
+            # Tự chuyển preview khi file bắt đầu OCR (không phải lúc bắt đầu upscale — tầng upscale
+            # chạy trước nhiều file), trừ khi file đang xem vẫn còn đang xử lý
+            watched = self.current_preview_index
+            if watched != idx and self.file_status.get(watched) != "processing":
+                self._reset_display()
+                self._show_preview(idx, processed=False)
         # Chỉ hiển thị step nếu đang xem file đang được xử lý
         if idx == self.current_preview_index:
-            self._show_processing_step(step)
+            self._queue_display(step, lambda: self._show_processing_step(step))
+
+    def _on_partial(self, idx, text):
+        """Nhận text OCR từng phần; render dồn theo timer"""
+        self.partial_results[idx] = text
+        if idx == self.current_preview_index and not self._partial_timer.isActive():
+            self._partial_timer.start()
 
     def _on_result(self, idx, text, img):
         """Xử lý kết quả OCR"""
+        self.partial_results.pop(idx, None)
         self.results_cache[idx] = (text, img)
         self.file_items[idx].update_status("completed")
         self.file_status[idx] = "completed"
@@ -1081,41 +1259,58 @@ class ExtraInfoPage(BasePage):
         
         logger.info(f"📄 Markdown file path stored: {md_path}")
 
-        # Chỉ hiển thị kết quả nếu đang xem file này
+        # Chỉ hiển thị kết quả nếu đang xem file này (sau khi màn success hiển thị đủ lâu)
         if idx == self.current_preview_index:
-            self._show_result_content()
-            html = markdown.markdown(text, extensions=["tables", "fenced_code", "nl2br"])
-            self.markdown_preview.setHtml(html)
-            self.raw_text_area.setPlainText(text)
-            self._show_preview(idx, processed=True)
+            self._queue_display(None, lambda: self._display_result(idx))
 
         # 🔥 FIX: Enable nút save ngay khi có kết quả đầu tiên
         self.save_btn.setEnabled(True)
         self.save_as_btn.setEnabled(True)
 
+    def _display_result(self, idx: int):
+        """Hiển thị kết quả OCR đã có của file idx (nếu vẫn đang xem file đó)"""
+        if idx != self.current_preview_index or idx not in self.results_cache:
+            return
+        text, _ = self.results_cache[idx]
+        self._show_result_content()
+        html = _markdown_to_html(text, extensions=["tables", "fenced_code", "nl2br"])
+        self.markdown_preview.setHtml(html)
+        self.raw_text_area.setPlainText(text)
+        self._show_preview(idx, processed=True)
+
+    def _on_status(self, idx: int, message: str):
+        """Thông báo pipeline mới nhất của file → tooltip của dòng file"""
+        if 0 <= idx < len(self.file_items):
+            self.file_items[idx].setToolTip(message)
+
     def _on_error(self, idx, msg):
         """Xử lý lỗi OCR"""
+        self.partial_results.pop(idx, None)
         self.file_items[idx].update_status("failed")
         self.file_status[idx] = "failed"
 
         # Chỉ hiển thị error nếu đang xem file này
         if idx == self.current_preview_index:
-            self._show_error_state()
+            self._queue_display(None, self._show_error_state)
 
         logger.error(f"OCR error on file {idx}: {msg}")
 
     def _on_finished(self):
         """Xử lý khi worker hoàn thành"""
         self.stop_btn.setEnabled(False)
+        self.stop_btn.setText("Stop OCR")
         self.back_btn.setEnabled(True)
         logger.info("OCR worker finished.")
 
     def _on_stopped(self):
         """Xử lý khi worker bị dừng giữa chừng"""
         self.stop_btn.setEnabled(False)
+        self.stop_btn.setText("Stop OCR")
         self.back_btn.setEnabled(True)
 
         # Reset các file đang processing về waiting
+        self.partial_results.clear()
+        self._reset_display()
         for idx, status in self.file_status.items():
             if status == "processing":
                 self.file_status[idx] = "waiting"
@@ -1126,34 +1321,9 @@ class ExtraInfoPage(BasePage):
         logger.info("OCR worker stopped by user.")
 
     def _stop_ocr(self):
-        """Dừng xử lý OCR - Tối ưu không lag"""
+        """Dừng xử lý OCR (huỷ hợp tác — worker tự kết thúc và phát `stopped`)"""
         if self.worker and self.worker.isRunning():
             # Disable nút stop ngay lập tức để tránh click nhiều lần
             self.stop_btn.setEnabled(False)
             self.stop_btn.setText("Stopping...")
-
-            # Gọi stop worker
             self.worker.stop()
-
-            # Sử dụng QTimer để đợi worker dừng mà không block UI
-            from PySide6.QtCore import QTimer
-
-            timeout_counter = [0]
-
-            def check_worker_stopped():
-                if not self.worker.isRunning():
-                    self.stop_btn.setText("Stop OCR")
-                    logger.info("OCR stopped successfully")
-                else:
-                    timeout_counter[0] += 1
-                    if timeout_counter[0] > 20:
-                        logger.warning("Force terminating worker...")
-                        self.worker.terminate_worker()
-                        self.worker.wait(1000)
-                        self.stop_btn.setText("Stop OCR")
-                        self._on_stopped()
-
-            timer = QTimer()
-            timer.timeout.connect(check_worker_stopped)
-            timer.start(100)
-            self._stop_timer = timer
@@ -2,57 +2,91 @@ from PySide6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QMessageBox,
     QFrame, QDialog, QTextEdit, QComboBox, QWidget, QScrollArea
 )
-from PySide6.QtCore import Qt, QSize, QStandardPaths
-from PySide6.QtGui import QPixmap, QPainter, QMouseEvent
+from PySide6.QtCore import Qt, QSize, QStandardPaths, QTimer, QThreadPool
+from PySide6.QtGui import QImageReader, QPainter, QMouseEvent
 from pathlib import Path
-import json
 from datetime import datetime
 import shutil
 import logging
+import threading
 
+from config.config_service import config_service
+from core.catalog import STATUS_PARTIAL, STATUS_SUCCESS, FolderEntry, get_catalog
+from core.thumbnails import PREVIEW_SIZES
 from ui.pages.base_page import BasePage
 from ui.style.theme_manager import ThemeManager
+from ui.widgets.preview_loader import get_preview_loader
+from ui.widgets.storage_watcher import StorageWatcher
+from utils.file_helper import atomic_write_text
 
 logger = logging.getLogger(__name__)
 ITEMS_PER_PAGE = 5
+# Chờ người dùng ngừng gõ trước khi truy vấn lại
+SEARCH_DEBOUNCE_MS = 250
+# Gộp các thông báo thay đổi catalog liên tiếp (pipeline đang chạy) thành 1 lần vẽ lại trang
+CHANGE_DEBOUNCE_MS = 150
+
+# Màu badge theo trạng thái folder (còn lại: Pending)
+STATUS_COLORS = {STATUS_SUCCESS: "#22C55E", STATUS_PARTIAL: "#FB923C"}
 
 
 # =====================================================
 # Image Compare Widget
 # =====================================================
 class ImageCompareWidget(QFrame):
-    """So sánh ảnh original / processed bằng thanh kéo"""
-    def __init__(self, original: Path, processed: Path):
+    """
+    So sánh ảnh original / processed bằng thanh kéo.
+    Ảnh lấy từ preview (PreviewLoader, nạp nền); bản đã scale theo kích thước widget được giữ lại,
+    kéo thanh trượt chỉ vẽ lại — chỉ scale lại khi widget đổi kích thước.
+    """
+    def __init__(self, original: Path, processed: Path, output_root: Path):
         super().__init__()
-        self.original = QPixmap(str(original)) if original and original.exists() else None
-        self.processed = QPixmap(str(processed)) if processed and processed.exists() else None
+        self.original = None
+        self.processed = None
+        self._loading = 0
+        self._scaled = None  # (QSize, original đã scale, processed đã scale)
         self.slider_pos = 0.5
         self.setMinimumHeight(500)
         self.setMouseTracking(True)
         self.setObjectName("ImageCompare")
 
+        loader = get_preview_loader()
+        for attr, path in (("original", original), ("processed", processed)):
+            if path and path.exists():
+                self._loading += 1
+                loader.request(path, output_root, PREVIEW_SIZES[-1],
+                               lambda pixmap, attr=attr: self._on_loaded(attr, pixmap))
+
+    def _on_loaded(self, attr: str, pixmap):
+        self._loading -= 1
+        setattr(self, attr, pixmap if not pixmap.isNull() else None)
+        self._scaled = None
+        self.update()
+
+    def _scaled_pair(self):
+        size = self.size()
+        if self._scaled is None or self._scaled[0] != size:
+            self._scaled = (
+                size,
+                self.original.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+                self.processed.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation),
+            )
+        return self._scaled[1], self._scaled[2]
+
     def paintEvent(self, event):
         painter = QPainter(self)
         painter.fillRect(self.rect(), Qt.white)
         
         if not (self.original and self.processed):
             painter.setPen(Qt.gray)
-            painter.drawText(self.rect(), Qt.AlignCenter, "(Missing image files)")
+            text = "Loading…" if self._loading else "(Missing image files)"
+            painter.drawText(self.rect(), Qt.AlignCenter, text)
             return
 
         size = self.size()
         
-        # Scale images to fit while maintaining aspect ratio
-        ori_scaled = self.original.scaled(
-            size, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
-        proc_scaled = self.processed.scaled(
-            size, 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        )
+        # Scale images to fit while maintaining aspect ratio (cache theo kích thước widget)
+        ori_scaled, proc_scaled = self._scaled_pair()
         
         # Center images
         ori_x = (size.width() - ori_scaled.width()) // 2
@@ -85,9 +119,10 @@ class ImageCompareWidget(QFrame):
 # =====================================================
 class FileDetailDialog(QDialog):
     """Hiển thị ảnh và markdown song song với khả năng scroll"""
-    def __init__(self, folder: Path, theme_data: dict, parent=None):
+    def __init__(self, folder: Path, theme_data: dict, parent=None, on_saved=None):
         super().__init__(parent)
         self.folder = folder
+        self.on_saved = on_saved
         self.theme_data = theme_data
         self.setWindowTitle(f"Details - {folder.name}")
         self.resize(1200, 700)
@@ -129,19 +164,19 @@ class FileDetailDialog(QDialog):
                     proc = files[0]
                     break
 
-        # Image info
+        # Image info (QImageReader chỉ đọc header, không decode ảnh)
         info_text = ""
         if ori and ori.exists():
-            pixmap = QPixmap(str(ori))
+            dims = QImageReader(str(ori)).size()
             size_mb = ori.stat().st_size / (1024 * 1024)
-            info_text = f"Original: {pixmap.width()}x{pixmap.height()}px, {size_mb:.2f}MB"
+            info_text = f"Original: {dims.width()}x{dims.height()}px, {size_mb:.2f}MB"
         
         if proc and proc.exists():
-            pixmap = QPixmap(str(proc))
+            dims = QImageReader(str(proc)).size()
             size_mb = proc.stat().st_size / (1024 * 1024)
             if info_text:
                 info_text += " | "
-            info_text += f"Processed: {pixmap.width()}x{pixmap.height()}px, {size_mb:.2f}MB"
+            info_text += f"Processed: {dims.width()}x{dims.height()}px, {size_mb:.2f}MB"
         
         if info_text:
             info_label = QLabel(info_text)
@@ -154,7 +189,7 @@ class FileDetailDialog(QDialog):
         scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
         
-        self.img_cmp = ImageCompareWidget(ori, proc)
+        self.img_cmp = ImageCompareWidget(ori, proc, folder.parent)
         scroll.setWidget(self.img_cmp)
         left_layout.addWidget(scroll, 1)
 
@@ -205,7 +240,9 @@ class FileDetailDialog(QDialog):
             return
         
         try:
-            self.text_path.write_text(self.editor.toPlainText(), encoding="utf-8")
+            atomic_write_text(self.text_path, self.editor.toPlainText())
+            if self.on_saved:
+                self.on_saved(self.folder)
             QMessageBox.information(self, "Saved", "File saved successfully!")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to save file: {e}")
@@ -215,9 +252,14 @@ class FileDetailDialog(QDialog):
 # Folder Card
 # =====================================================
 class FolderCard(QFrame):
-    def __init__(self, folder: Path, theme_data: dict, project_root: Path, view_cb, del_cb):
+    """
+    1 folder output — số liệu lấy từ catalog (không duyệt thư mục khi vẽ).
+    Widget được tái sử dụng giữa các trang: set_entry() chỉ đổi nội dung label.
+    """
+    def __init__(self, entry: FolderEntry, theme_data: dict, project_root: Path, view_cb, del_cb):
         super().__init__()
-        self.folder = folder
+        self.entry = None
+        self.folder = None
         self.view_cb = view_cb
         self.del_cb = del_cb
         self.setObjectName("FolderCard")
@@ -231,24 +273,25 @@ class FolderCard(QFrame):
         head = QHBoxLayout()
         head.setSpacing(8)
         
-        name = QLabel(folder.name)
-        name.setObjectName("FolderName")
-        name.setWordWrap(True)
-        head.addWidget(name, 1)
+        self.name_label = QLabel()
+        self.name_label.setObjectName("FolderName")
+        self.name_label.setWordWrap(True)
+        head.addWidget(self.name_label, 1)
         
-        status, color = self._get_status()
-        badge = QLabel(status)
-        badge.setObjectName("StatusBadge")
-        badge.setStyleSheet(f"background:{color}; color: white; padding: 4px 8px; border-radius: 4px; font-size: 11px; font-weight: 600; min-height: 12px;")
-        head.addWidget(badge)
+        self.badge = QLabel()
+        self.badge.setObjectName("StatusBadge")
+        head.addWidget(self.badge)
         layout.addLayout(head)
 
         # Info
         info = QHBoxLayout()
         info.setSpacing(12)
-        info.addWidget(QLabel(f"📄 Files: {self._count()}"))
-        info.addWidget(QLabel(f"🕒 {self._time()}"))
-        info.addWidget(QLabel(f"📦 {self._size()}"))
+        self.files_label = QLabel()
+        self.time_label = QLabel()
+        self.size_label = QLabel()
+        info.addWidget(self.files_label)
+        info.addWidget(self.time_label)
+        info.addWidget(self.size_label)
         info.addStretch()
         layout.addLayout(info)
 
@@ -260,50 +303,42 @@ class FolderCard(QFrame):
         view = QPushButton("View Details")
         view.setObjectName("ViewBtn")
         view.setCursor(Qt.PointingHandCursor)
-        view.clicked.connect(lambda: view_cb(folder))
+        view.clicked.connect(lambda: self.view_cb(self.folder))
         
         delete = QPushButton("Delete")
         delete.setObjectName("DeleteBtn")
         delete.setCursor(Qt.PointingHandCursor)
-        delete.clicked.connect(lambda: del_cb(folder))
+        delete.clicked.connect(lambda: self.del_cb(self.folder))
         
         btns.addWidget(view)
         btns.addWidget(delete)
         layout.addLayout(btns)
 
-    def _get_status(self):
-        text_dir = self.folder / "text"
-        proc_dir = self.folder / "processed"
-        orig_dir = self.folder / "original"
-        
-        has_text = text_dir.exists() and any(text_dir.iterdir())
-        has_proc = proc_dir.exists() and any(proc_dir.iterdir())
-        has_orig = orig_dir.exists() and any(orig_dir.iterdir())
-        
-        if has_text and has_proc and has_orig:
-            return "Success", "#22C55E"
-        elif has_proc:
-            return "Partial", "#FB923C"
-        return "Pending", "#3B82F6"
+        self.set_entry(entry)
 
-    def _count(self):
-        try:
-            return sum(1 for _ in self.folder.rglob("*") if _.is_file())
-        except Exception:
-            return 0
+    def set_entry(self, entry: FolderEntry):
+        """Hiển thị `entry` (bỏ qua nếu không đổi)"""
+        if entry == self.entry:
+            return
+        self.entry = entry
+        self.folder = entry.path
+        self.name_label.setText(entry.name)
+
+        color = STATUS_COLORS.get(entry.status, "#3B82F6")
+        self.badge.setText(entry.status)
+        self.badge.setStyleSheet(f"background:{color}; color: white; padding: 4px 8px; border-radius: 4px; font-size: 11px; font-weight: 600; min-height: 12px;")
+
+        self.files_label.setText(f"📄 Files: {entry.files}")
+        self.time_label.setText(f"🕒 {self._time()}")
+        self.size_label.setText(f"📦 {self._size()}")
 
     def _size(self):
-        try:
-            total_size = sum(f.stat().st_size for f in self.folder.rglob("*") if f.is_file())
-            return f"{total_size / (1024*1024):.2f} MB"
-        except Exception:
-            return "0.00 MB"
+        return f"{self.entry.bytes / (1024*1024):.2f} MB"
 
     def _time(self):
         try:
-            mtime = datetime.fromtimestamp(self.folder.stat().st_mtime)
-            return mtime.strftime("%Y-%m-%d %H:%M")
-        except Exception:
+            return datetime.fromtimestamp(self.entry.mtime).strftime("%Y-%m-%d %H:%M")
+        except (OverflowError, OSError, ValueError):
             return "Unknown"
 
 
@@ -320,10 +355,25 @@ class FileLogPage(BasePage):
         self.project_root = Path(__file__).resolve().parent.parent.parent
         self.output_dir = self._load_storage()
         self.theme_data = theme_manager.get_theme_data()
-        self.all_folders = []
-        self.filtered = []
+        self.catalog = None
+        self.watcher = None
+        self.total_items = 0
+        self.total_bytes = 0
         self.current_page = 1
         self.search_text = ""
+        self._cards: list[FolderCard] = []   # tái sử dụng giữa các trang / lần cập nhật
+        self._stale = False                  # catalog đổi khi page đang ẩn → vẽ lại khi hiện
+        self._reconcile_lock = threading.Lock()
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._on_search_changed)
+
+        self._change_timer = QTimer(self)
+        self._change_timer.setSingleShot(True)
+        self._change_timer.setInterval(CHANGE_DEBOUNCE_MS)
+        self._change_timer.timeout.connect(self._apply_filters)
 
         # === Top Bar ===
         top = QHBoxLayout()
@@ -333,7 +383,7 @@ class FileLogPage(BasePage):
         self.search.setObjectName("SearchBar")
         self.search.setPlaceholderText("Search folders...")
         self.search.setClearButtonEnabled(True)
-        self.search.textChanged.connect(self._on_search_changed)
+        self.search.textChanged.connect(self._search_timer.start)
         top.addWidget(self.search, 3)
 
         self.sort = QComboBox()
@@ -362,6 +412,13 @@ class FileLogPage(BasePage):
         self.card_layout = QVBoxLayout(self.card_container)
         self.card_layout.setSpacing(10)
         self.card_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.empty_label = QLabel("No folders found")
+        self.empty_label.setAlignment(Qt.AlignCenter)
+        self.empty_label.setStyleSheet("color: #999; font-size: 16px; padding: 40px;")
+        self.empty_label.hide()
+        self.card_layout.addWidget(self.empty_label)
+        self.card_layout.addStretch()
         layout.addWidget(self.card_container, 1)
 
         # === Pagination ===
@@ -394,24 +451,21 @@ class FileLogPage(BasePage):
         
         layout.addLayout(bottom)
 
-        # Load initial data
+        # Hiển thị ngay dữ liệu catalog đã có, đồng bộ với thư mục ở nền
+        self._open_catalog()
+        self._apply_filters()
         self.load_logs()
 
     def _load_storage(self):
-        """Load storage directory từ config file (mặc định là ./data/output)"""
-        cfg = self.project_root / "config" / "app_config.json"
+        """Load storage directory từ config (mặc định là ./data/output)"""
         try:
-            if cfg.exists():
-                with cfg.open("r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    storage_path_str = data.get("storage_path", "").strip()
-                    if storage_path_str:
-                        custom_dir = Path(storage_path_str)
-                        if custom_dir.exists():
-                            logger.info(f"📁 Using custom storage path: {custom_dir}")
-                            return custom_dir
-                        else:
-                            logger.warning(f"⚠️ storage_path không tồn tại: {custom_dir}")
+            custom_dir = config_service.get_path("storage_path")
+            if custom_dir:
+                if custom_dir.exists():
+                    logger.info(f"📁 Using custom storage path: {custom_dir}")
+                    return custom_dir
+                else:
+                    logger.warning(f"⚠️ storage_path không tồn tại: {custom_dir}")
             # 🔹 Mặc định dùng đường dẫn tương đối trong dự án
             default = self.project_root / "data" / "output"
             default.mkdir(parents=True, exist_ok=True)
@@ -423,20 +477,53 @@ class FileLogPage(BasePage):
             fallback.mkdir(parents=True, exist_ok=True)
             return fallback
 
+    def _open_catalog(self):
+        """Mở catalog của storage và gắn watcher (thông báo thay đổi → cập nhật trang)"""
+        try:
+            self.catalog = get_catalog(self.output_dir)
+        except Exception as e:
+            logger.error(f"Error opening catalog: {e}")
+            return
+        self.watcher = StorageWatcher(self.catalog, self)
+        self.watcher.changed.connect(self._on_catalog_changed)
+
     def load_logs(self):
-        """Load all folders from output directory"""
+        """Đồng bộ catalog với output directory ở nền (chỉ quét lại folder đã đổi); trang tự cập nhật khi xong"""
+        if self.catalog is None:
+            self._open_catalog()
+        if self.catalog is not None:
+            QThreadPool.globalInstance().start(self._reconcile)
+
+    def _reconcile(self):
+        """Chạy trên QThreadPool; folder thay đổi được báo về qua StorageWatcher.changed"""
+        if not self._reconcile_lock.acquire(blocking=False):
+            return
         try:
-            self.all_folders = [f for f in self.output_dir.iterdir() if f.is_dir()]
-            self._apply_filters()
+            self.catalog.reconcile()
         except Exception as e:
             logger.error(f"Error loading logs: {e}")
-            self.all_folders = []
-            self.filtered = []
-            self._update_page()
+        finally:
+            self._reconcile_lock.release()
+
+    def _on_catalog_changed(self, names: set):
+        """Catalog đổi (watcher / pipeline / dialog): vẽ lại trang hiện tại — gộp bằng timer"""
+        if not self.isVisible():
+            self._stale = True
+            return
+        self._change_timer.start()
 
-    def _on_search_changed(self, text: str):
-        """Handle search text change"""
-        self.search_text = text.lower().strip()
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._stale:
+            self._stale = False
+            self._apply_filters()
+
+    def _on_search_changed(self):
+        """Handle search text change (sau SEARCH_DEBOUNCE_MS kể từ lần gõ cuối)"""
+        text = self.search.text().lower().strip()
+        if text == self.search_text:
+            return
+        self.search_text = text
         self.current_page = 1
         self._apply_filters()
 
@@ -445,74 +532,62 @@ class FileLogPage(BasePage):
         self._apply_filters()
 
     def _apply_filters(self):
-        """Apply search and sort filters"""
-        # Apply search filter
-        if self.search_text:
-            self.filtered = [f for f in self.all_folders if self.search_text in f.name.lower()]
-        else:
-            self.filtered = self.all_folders.copy()
-        
-        # Apply sort
-        mode = self.sort.currentText()
+        """Đếm số folder / dung lượng khớp ô tìm kiếm (sắp xếp + phân trang làm trong SQL)"""
         try:
-            if "Date" in mode:
-                reverse = "Newest" in mode
-                self.filtered.sort(key=lambda f: f.stat().st_mtime, reverse=reverse)
-            elif "Name" in mode:
-                reverse = "Z-A" in mode
-                self.filtered.sort(key=lambda f: f.name.lower(), reverse=reverse)
-            elif "Size" in mode:
-                reverse = "Largest" in mode
-                self.filtered.sort(
-                    key=lambda f: sum(x.stat().st_size for x in f.rglob("*") if x.is_file()), 
-                    reverse=reverse
-                )
+            self.total_items, self.total_bytes = (
+                self.catalog.totals(self.search_text) if self.catalog else (0, 0)
+            )
         except Exception as e:
-            logger.error(f"Error sorting: {e}")
-        
+            logger.error(f"Error querying catalog: {e}")
+            self.total_items, self.total_bytes = 0, 0
         self._update_page()
 
+    def _card(self, i: int, entry: FolderEntry) -> FolderCard:
+        """Card thứ i của trang (tạo khi chưa có, còn lại dùng lại widget cũ)"""
+        if i < len(self._cards):
+            card = self._cards[i]
+            card.set_entry(entry)
+        else:
+            card = FolderCard(entry, self.theme_data, self.project_root, self._view_details, self._delete_folder)
+            self.card_layout.insertWidget(i, card)
+            self._cards.append(card)
+        return card
+
     def _update_page(self):
         """Update the current page display"""
-        # Clear existing cards
-        for i in reversed(range(self.card_layout.count())):
-            widget = self.card_layout.takeAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        total_items = len(self.filtered)
+        total_items = self.total_items
         total_pages = max(1, (total_items + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
         self.current_page = max(1, min(self.current_page, total_pages))
         
         start_idx = (self.current_page - 1) * ITEMS_PER_PAGE
         end_idx = min(start_idx + ITEMS_PER_PAGE, total_items)
 
-        # Add cards for current page
+        # Lấy folder của trang hiện tại
+        entries = []
         if total_items > 0:
-            for folder in self.filtered[start_idx:end_idx]:
-                card = FolderCard(folder, self.theme_data, self.project_root, self._view_details, self._delete_folder)
-                self.card_layout.addWidget(card)
-        else:
-            # Show empty state
-            empty_label = QLabel("No folders found")
-            empty_label.setAlignment(Qt.AlignCenter)
-            empty_label.setStyleSheet("color: #999; font-size: 16px; padding: 40px;")
-            self.card_layout.addWidget(empty_label)
+            try:
+                entries = self.catalog.query(self.search_text, self.sort.currentText(),
+                                             limit=ITEMS_PER_PAGE, offset=start_idx)
+            except Exception as e:
+                logger.error(f"Error querying catalog: {e}")
 
-        # Add stretch at the end
-        self.card_layout.addStretch()
+        # Cập nhật card có sẵn thay vì xoá / tạo lại widget
+        for i, entry in enumerate(entries):
+            self._card(i, entry).show()
+        for card in self._cards[len(entries):]:
+            card.hide()
+        self.empty_label.setVisible(not entries)
+
+        # Chỉ watch folder đang hiển thị
+        if self.watcher is not None:
+            self.watcher.watch_folders([entry.path for entry in entries])
 
         # Update labels
         if total_items > 0:
             self.page_label.setText(f"Page {self.current_page} of {total_pages}")
             self.page_info_label.setText(f"Showing {start_idx + 1}-{end_idx} of {total_items} folders")
-            
-            total_size = sum(
-                sum(f.stat().st_size for f in folder.rglob("*") if f.is_file())
-                for folder in self.filtered
-            )
             self.summary_label.setText(
-                f"Total: {total_items} folders | {total_size / (1024*1024):.2f} MB"
+                f"Total: {total_items} folders | {self.total_bytes / (1024*1024):.2f} MB"
             )
         else:
             self.page_label.setText("Page 0 of 0")
@@ -531,7 +606,7 @@ class FileLogPage(BasePage):
 
     def _next_page(self):
         """Go to next page"""
-        total_pages = max(1, (len(self.filtered) + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
+        total_pages = max(1, (self.total_items + ITEMS_PER_PAGE - 1) // ITEMS_PER_PAGE)
         if self.current_page < total_pages:
             self.current_page += 1
             self._update_page()
@@ -539,12 +614,17 @@ class FileLogPage(BasePage):
     def _view_details(self, folder: Path):
         """Open detail dialog for folder"""
         try:
-            dialog = FileDetailDialog(folder, self.theme_data, self)
+            dialog = FileDetailDialog(folder, self.theme_data, self, on_saved=self._on_folder_saved)
             dialog.exec()
         except Exception as e:
             logger.error(f"Error opening details: {e}")
             QMessageBox.critical(self, "Error", f"Failed to open details: {e}")
 
+    def _on_folder_saved(self, folder: Path):
+        """Markdown được sửa trong dialog → cập nhật dung lượng / trạng thái trong catalog (trang tự vẽ lại)"""
+        if self.catalog:
+            self.catalog.refresh(folder.name)
+
     def _delete_folder(self, folder: Path):
         """Delete folder with confirmation"""
         reply = QMessageBox.question(
@@ -558,8 +638,9 @@ class FileLogPage(BasePage):
         if reply == QMessageBox.Yes:
             try:
                 shutil.rmtree(folder, ignore_errors=True)
+                if self.catalog:
+                    self.catalog.remove(folder.name)
                 QMessageBox.information(self, "Deleted", f"Folder '{folder.name}' has been deleted.")
-                self.load_logs()
             except Exception as e:
                 logger.error(f"Error deleting folder: {e}")
                 QMessageBox.critical(self, "Error", f"Failed to delete folder: {e}")
\ No newline at end of file
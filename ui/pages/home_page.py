@@ -1,143 +1,305 @@
 
 from __future__ import annotations
 from pathlib import Path
-from PySide6.QtCore import Qt, Signal, QSize, QStandardPaths
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import (Qt, Signal, QSize, QRect, QEvent, QObject, QRunnable, QThreadPool,
+                            QAbstractListModel, QModelIndex)
+from PySide6.QtGui import QPixmap, QPainter, QColor, QFont
 from PySide6.QtWidgets import (QHBoxLayout, QVBoxLayout, QLineEdit, QSizePolicy,
                                QPushButton, QLabel, QFrame, QFileDialog, QWidget,
-                               QScrollArea, QMessageBox, QGridLayout)
-from PySide6.QtGui import QAction
-from threading import Lock
+                               QMessageBox, QListView, QStyledItemDelegate, QAbstractItemView)
 import os
 import logging
-import json
 
+from config.config_service import config_service
 from ui.pages.base_page import BasePage
 from ui.style.theme_manager import ThemeManager
 from ui.style.style_loader import load_svg_colored
 from ui.widgets.dialog_manager import DialogManager
+from ui.widgets.warmup_bridge import get_warmup_bridge, readiness_text, readiness_tooltip
 
 # ============= CONSTANTS =============
 VALID_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".tif", ".tiff"}
 ICON_SIZE_SMALL = 16
 ICON_SIZE_MEDIUM = 18
 ICON_SIZE_LARGE = 48
+# Số file mỗi lô khi đọc kích thước trên luồng nền
+SIZE_BATCH = 256
+ROW_HEIGHT = 40
+# Tỉ lệ 4 cột (#, File Name, Size, Action) — giống FileListHeader
+COLUMN_STRETCH = (1, 4, 4, 1)
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
 
-class FileItem(QFrame):
-    """
-    Widget hiển thị thông tin của 1 file trong danh sách.
-    Bao gồm: index, icon, tên file, kích thước, nút xóa.
-    """
-    def __init__(self, index: int, file_path: Path, theme_data: dict, project_root: Path,
-                 remove_callback, parent=None):
-        super().__init__(parent)
-        self.setObjectName("FileItem")
+def _format_size(size: int | None) -> str:
+    if size is None:
+        return "…"
+    if size < 0:
+        return "--"
+    size_kb = size / 1024
+    return f"{size_kb/1024:.1f} MB" if size_kb > 1024 else f"{size_kb:.0f} KB"
 
-        self.file_path = Path(file_path)
-        self.remove_callback = remove_callback
-        self.theme_data = theme_data
-        self.project_root = project_root
 
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(0, 6, 0, 6)
-        layout.setSpacing(0)
+class _SizeSignals(QObject):
+    sizes_ready = Signal(list)
 
-        # ======= Column 1: Index (Proportion 1) =======
-        index_container = QFrame()
-        index_container.setObjectName("FileItemColumn")
-        index_layout = QHBoxLayout(index_container)
-        index_layout.setContentsMargins(12, 0, 12, 0)
-        index_layout.setSpacing(0)
-        
-        index_label = QLabel(str(index))
-        index_label.setObjectName("FileIndex")
-        index_label.setAlignment(Qt.AlignCenter)
-        index_layout.addWidget(index_label)
-        layout.addWidget(index_container, 1)
-        
-        # ======= Column 2: Icon + File Name (Proportion 4) =======
-        name_container = QFrame()
-        name_container.setObjectName("FileItemColumn")
-        name_layout = QHBoxLayout(name_container)
-        name_layout.setContentsMargins(12, 0, 12, 0)
-        name_layout.setSpacing(8)
 
-        file_icon_path = project_root / "assets" / "icon" / "file.svg"
-        icon_label = QLabel()
-        try:
-            if file_icon_path.exists():
-                icon = load_svg_colored(file_icon_path, "#1A73E8", ICON_SIZE_MEDIUM)
-                icon_label.setPixmap(icon.pixmap(QSize(ICON_SIZE_MEDIUM, ICON_SIZE_MEDIUM)))
-        except Exception as e:
-            logger.warning(f"Failed to load file icon: {e}")
-        
-        icon_label.setFixedSize(25, 25)
-        icon_label.setObjectName("FileIcon")
-        name_layout.addWidget(icon_label)
+class _SizeTask(QRunnable):
+    """Đọc kích thước 1 lô file trên QThreadPool (không chặn UI khi thêm hàng nghìn file)"""
 
-        self.name_label = QLabel(self.file_path.name)
-        self.name_label.setObjectName("FileName")
-        name_layout.addWidget(self.name_label, 1)
-        layout.addWidget(name_container, 4)
+    def __init__(self, paths: list[Path], signals: _SizeSignals):
+        super().__init__()
+        self.paths = paths
+        self.signals = signals
 
-        # ======= Column 3: Size (Proportion 4) =======
-        size_container = QFrame()
-        size_container.setObjectName("FileItemColumn")
-        size_layout = QHBoxLayout(size_container)
-        size_layout.setContentsMargins(12, 0, 12, 0)
-        size_layout.setSpacing(0)
+    def run(self):
+        results = []
+        for p in self.paths:
+            try:
+                results.append((p, os.path.getsize(p)))
+            except OSError as e:
+                logger.warning(f"Failed to get file size for {p.name}: {e}")
+                results.append((p, -1))
+        self.signals.sizes_ready.emit(results)
 
-        try:
-            size_kb = os.path.getsize(self.file_path) / 1024
-            size_txt = f"{size_kb/1024:.1f} MB" if size_kb > 1024 else f"{size_kb:.0f} KB"
-        except Exception as e:
-            logger.warning(f"Failed to get file size for {self.file_path.name}: {e}")
-            size_txt = "--"
-        
-        size_label = QLabel(size_txt)
-        size_label.setObjectName("FileSize")
-        size_layout.addWidget(size_label)
-        layout.addWidget(size_container, 4)
 
-        # ======= Column 4: Action (Proportion 1) =======
-        action_container = QFrame()
-        action_container.setObjectName("FileItemColumn")
-        action_layout = QHBoxLayout(action_container)
-        action_layout.setContentsMargins(12, 0, 12, 0)
-        action_layout.setSpacing(0)
+class FileListModel(QAbstractListModel):
+    """
+    Danh sách file đầu vào (key = path đã resolve).
+    - contains() / row_of(): O(1) qua dict path → hàng, thêm / xoá không cần duyệt danh sách
+    - kích thước file đọc bất đồng bộ (_SizeTask), hiển thị "…" cho tới khi có
+    """
+    SizeRole = Qt.UserRole + 1
+    PathRole = Qt.UserRole + 2
 
-        close_icon_path = project_root / "assets" / "icon" / "close.svg"
-        delete_btn = QPushButton()
-        delete_btn.setObjectName("DeleteButton")
-        try:
-            if close_icon_path.exists():
-                delete_btn.setIcon(load_svg_colored(close_icon_path, "#666", ICON_SIZE_MEDIUM))
-        except Exception as e:
-            logger.warning(f"Failed to load close icon: {e}")
-        
-        delete_btn.setFixedSize(28, 28)
-        delete_btn.setCursor(Qt.PointingHandCursor)
-        delete_btn.clicked.connect(self.remove_self)
-        action_layout.addWidget(delete_btn, alignment=Qt.AlignCenter)
-        layout.addWidget(action_container, 1)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._paths: list[Path] = []
+        self._sizes: dict[Path, int | None] = {}
+        # path → số hàng, cập nhật khi thêm / xoá
+        self._rows: dict[Path, int] = {}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _SizeSignals()
+        self._signals.sizes_ready.connect(self._on_sizes_ready)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._paths)
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._paths):
+            return None
+        path = self._paths[index.row()]
+        if role == Qt.DisplayRole:
+            return path.name
+        if role == Qt.ToolTipRole:
+            return str(path)
+        if role == self.SizeRole:
+            return self._sizes.get(path)
+        if role == self.PathRole:
+            return path
+        return None
+
+    def contains(self, path: Path) -> bool:
+        return path in self._rows
+
+    def row_of(self, path: Path) -> int:
+        """Hàng của `path`, -1 nếu không có trong danh sách"""
+        return self._rows.get(path, -1)
+
+    def paths(self) -> list[Path]:
+        return list(self._paths)
+
+    def add_paths(self, paths: list[Path]) -> None:
+        """Thêm các path chưa có (1 lần beginInsertRows cho cả lô)"""
+        if not paths:
+            return
+        first = len(self._paths)
+        self.beginInsertRows(QModelIndex(), first, first + len(paths) - 1)
+        self._paths.extend(paths)
+        for row, p in enumerate(paths, first):
+            self._sizes[p] = None
+            self._rows[p] = row
+        self.endInsertRows()
+
+        for i in range(0, len(paths), SIZE_BATCH):
+            self._pool.start(_SizeTask(paths[i:i + SIZE_BATCH], self._signals))
+
+    def remove_row(self, row: int) -> Path | None:
+        if not 0 <= row < len(self._paths):
+            return None
+        self.beginRemoveRows(QModelIndex(), row, row)
+        path = self._paths.pop(row)
+        self._sizes.pop(path, None)
+        del self._rows[path]
+        # Các hàng phía sau lùi lên 1
+        for p in self._paths[row:]:
+            self._rows[p] -= 1
+        self.endRemoveRows()
+        return path
+
+    def _on_sizes_ready(self, results: list):
+        changed = False
+        for path, size in results:
+            # File có thể đã bị xoá khỏi danh sách trong lúc đọc
+            if path in self._sizes:
+                self._sizes[path] = size
+                changed = True
+        if changed and self._paths:
+            # Cột # tính từ số hàng nên không cần đánh lại index; chỉ vẽ lại vùng đang hiển thị
+            self.dataChanged.emit(self.index(0), self.index(len(self._paths) - 1), [self.SizeRole])
+
+
+class FileItemDelegate(QStyledItemDelegate):
+    """
+    Vẽ 1 hàng file (index, icon, tên, kích thước, nút xoá) trực tiếp bằng QPainter —
+    không tạo widget cho từng hàng; icon render 1 lần và dùng chung cho mọi hàng.
+    """
+    remove_requested = Signal(int)
 
-    def remove_self(self):
-        reply = QMessageBox.question(
-            self,
-            'Confirm Delete',
-            f'Remove "{self.file_path.name}" from the list?',
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
+    def __init__(self, project_root: Path, theme_data: dict, parent=None):
+        super().__init__(parent)
+        self.project_root = project_root
+        self._hover_delete_row = -1
+        self.set_theme(theme_data)
 
-        if reply == QMessageBox.Yes:
-            self.setParent(None)
-            self.deleteLater()
-            self.remove_callback(self.file_path)
+    def set_theme(self, theme_data: dict) -> None:
+        self.theme_data = theme_data
+        self.file_icon = self._load_icon("file.svg", "#1A73E8")
+        self.close_icon = self._load_icon("close.svg", "#666")
+
+    def _load_icon(self, name: str, color: str) -> QPixmap:
+        path = self.project_root / "assets" / "icon" / name
+        try:
+            if path.exists():
+                return load_svg_colored(path, color, ICON_SIZE_MEDIUM).pixmap(QSize(ICON_SIZE_MEDIUM, ICON_SIZE_MEDIUM))
+        except Exception as e:
+            logger.warning(f"Failed to load icon {name}: {e}")
+        return QPixmap()
+
+    @staticmethod
+    def _columns(rect: QRect) -> list[QRect]:
+        total = sum(COLUMN_STRETCH)
+        cols = []
+        x = rect.left()
+        for i, stretch in enumerate(COLUMN_STRETCH):
+            width = rect.right() + 1 - x if i == len(COLUMN_STRETCH) - 1 else rect.width() * stretch // total
+            cols.append(QRect(x, rect.top(), width, rect.height()))
+            x += width
+        return cols
+
+    def delete_rect(self, rect: QRect) -> QRect:
+        action = self._columns(rect)[3]
+        btn = QRect(0, 0, 28, 28)
+        btn.moveCenter(action.center())
+        return btn
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(option.rect.width(), ROW_HEIGHT)
+
+    def paint(self, painter: QPainter, option, index: QModelIndex):
+        colors = self.theme_data["color"]
+        font_size = self.theme_data["typography"]["normal"]["size"]
+        border = QColor(colors["border"]["default"])
+        rect = option.rect
+        cols = self._columns(rect)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Đường kẻ cột và đường kẻ dưới hàng
+        painter.setPen(border)
+        for col in cols[:-1]:
+            painter.drawLine(col.right(), rect.top() + 6, col.right(), rect.bottom() - 6)
+        if index.row() < index.model().rowCount() - 1:
+            painter.drawLine(rect.left(), rect.bottom(), rect.right(), rect.bottom())
+
+        font = QFont(option.font)
+        font.setPixelSize(font_size)
+
+        # Cột #: số thứ tự = row + 1
+        bold = QFont(font)
+        bold.setWeight(QFont.DemiBold)
+        painter.setFont(bold)
+        painter.setPen(QColor(colors["text"]["primary"]))
+        painter.drawText(cols[0], Qt.AlignCenter, str(index.row() + 1))
+
+        # Cột tên file: icon + tên (cắt "…" nếu dài)
+        name_rect = cols[1].adjusted(12, 0, -12, 0)
+        if not self.file_icon.isNull():
+            icon_top = name_rect.top() + (name_rect.height() - ICON_SIZE_MEDIUM) // 2
+            painter.drawPixmap(name_rect.left(), icon_top, self.file_icon)
+            name_rect.setLeft(name_rect.left() + 25 + 8)
+        painter.setFont(font)
+        name = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideMiddle, name_rect.width())
+        painter.drawText(name_rect, Qt.AlignVCenter | Qt.AlignLeft, name)
+
+        # Cột kích thước
+        size_font = QFont(font)
+        size_font.setPixelSize(13)
+        painter.setFont(size_font)
+        painter.setPen(QColor("#666"))
+        painter.drawText(cols[2].adjusted(12, 0, -12, 0), Qt.AlignVCenter | Qt.AlignLeft,
+                         _format_size(index.data(FileListModel.SizeRole)))
+
+        # Nút xoá
+        btn = self.delete_rect(rect)
+        if index.row() == self._hover_delete_row:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor(colors["background"]["base"]))
+            painter.drawRoundedRect(btn, 6, 6)
+        if not self.close_icon.isNull():
+            icon_rect = QRect(0, 0, ICON_SIZE_MEDIUM, ICON_SIZE_MEDIUM)
+            icon_rect.moveCenter(btn.center())
+            painter.drawPixmap(icon_rect, self.close_icon)
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton
+                and self.delete_rect(option.rect).contains(event.position().toPoint())):
+            self.remove_requested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def set_hover_row(self, row: int) -> bool:
+        """Đổi hàng có nút xoá đang được hover; trả về True nếu cần vẽ lại"""
+        if row == self._hover_delete_row:
+            return False
+        self._hover_delete_row = row
+        return True
+
+
+class FileListView(QListView):
+    """QListView cho FileListModel: hàng cao cố định (uniformItemSizes) → cuộn mượt với hàng nghìn file"""
+
+    def __init__(self, delegate: FileItemDelegate, parent=None):
+        super().__init__(parent)
+        self.setObjectName("FileList")
+        self.setItemDelegate(delegate)
+        self.setUniformItemSizes(True)
+        self.setMouseTracking(True)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setFocusPolicy(Qt.NoFocus)
+        self._delegate = delegate
+
+    def mouseMoveEvent(self, event):
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        on_delete = index.isValid() and self._delegate.delete_rect(self.visualRect(index)).contains(pos)
+        self.viewport().setCursor(Qt.PointingHandCursor if on_delete else Qt.ArrowCursor)
+        if self._delegate.set_hover_row(index.row() if on_delete else -1):
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        if self._delegate.set_hover_row(-1):
+            self.viewport().update()
+        self.viewport().unsetCursor()
+        super().leaveEvent(event)
 
 
 class DropArea(QFrame):
@@ -264,9 +426,7 @@ class HomePage(BasePage):
 
         self.project_root = Path(__file__).resolve().parent.parent.parent
         self.theme_data = theme_manager.get_theme_data()
-        self.files: list[Path] = []
-        self.files_set: set = set()  # ✅ Dùng set để kiểm tra O(1)
-        self._files_lock = Lock()
+        self.file_model = FileListModel(self)
 
         layout = self.layout()
 
@@ -385,10 +545,6 @@ class HomePage(BasePage):
         layout.addWidget(storage_frame)
 
         # ============= FILE LIST =============
-        self.file_scroll = QScrollArea()
-        self.file_scroll.setObjectName("FileList")
-        self.file_scroll.setWidgetResizable(True)
-
         self.file_list_container = QWidget()
         self.file_list_container.setObjectName("FileListContainer")
         self.file_list_layout = QVBoxLayout(self.file_list_container)
@@ -405,11 +561,13 @@ class HomePage(BasePage):
         separator.setFixedHeight(1)
         self.file_list_layout.addWidget(separator)
 
-        self.file_list_layout.addSpacing(0)
-        self.file_list_layout.setAlignment(Qt.AlignTop)
+        self.file_delegate = FileItemDelegate(self.project_root, self.theme_data, self)
+        self.file_delegate.remove_requested.connect(self._confirm_remove_row)
+        self.file_view = FileListView(self.file_delegate)
+        self.file_view.setModel(self.file_model)
+        self.file_list_layout.addWidget(self.file_view, 1)
 
-        self.file_scroll.setWidget(self.file_list_container)
-        layout.addWidget(self.file_scroll)
+        layout.addWidget(self.file_list_container, 1)
 
         # ============= FOOTER =============
         footer_layout = QHBoxLayout()
@@ -418,6 +576,11 @@ class HomePage(BasePage):
         self.total_files_label.setObjectName("TotalFilesLabel")
         footer_layout.addWidget(self.total_files_label)
 
+        # Trạng thái warm-up (model Waifu2x, OCR server) — cập nhật qua WarmupBridge
+        self.warmup_label = QLabel("")
+        self.warmup_label.setObjectName("WarmupLabel")
+        footer_layout.addWidget(self.warmup_label)
+
         self.process_btn = QPushButton("Process Document")
         self.process_btn.setObjectName("ProcessButton")
         self.process_btn.setCursor(Qt.PointingHandCursor)
@@ -429,31 +592,39 @@ class HomePage(BasePage):
         self.process_btn.clicked.connect(self._process_files)
         layout.addLayout(footer_layout)
 
+        self.warmup_bridge = get_warmup_bridge()
+        self.warmup_bridge.state_changed.connect(self._on_warmup_state)
+        self._on_warmup_state()
+
     # ============= HELPER METHODS =============
+    @property
+    def files(self) -> list[Path]:
+        """Danh sách file đầu vào theo thứ tự thêm"""
+        return self.file_model.paths()
+
+    def apply_theme(self, theme_data: dict, theme_name: str):
+        super().apply_theme(theme_data, theme_name)
+        self.theme_data = theme_data
+        # BasePage gọi apply_theme trong __init__ trước khi tạo delegate
+        if hasattr(self, "file_delegate"):
+            self.file_delegate.set_theme(theme_data)
+            self.file_view.viewport().update()
+
     def _get_icon_path(self, icon_name: str) -> Path:
         """Helper method to get icon path"""
         return self.project_root / "assets" / "icon" / icon_name
 
     def _load_storage_dir(self) -> Path:
-        """Load storage directory từ config file (ưu tiên storage_path, mặc định là ./data/output)"""
-        import json, logging
-        from pathlib import Path
-        logger = logging.getLogger(__name__)
-
-        config_path = self.project_root / "config" / "app_config.json"
+        """Load storage directory từ config (ưu tiên storage_path, mặc định là ./data/output)"""
         try:
-            # 1️⃣ Ưu tiên đọc từ file config
-            if config_path.exists():
-                with open(config_path, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    storage_path_str = config.get("storage_path", "").strip()
-                    if storage_path_str:
-                        custom_dir = Path(storage_path_str)
-                        if custom_dir.exists():
-                            logger.info(f"Using custom storage path: {custom_dir}")
-                            return custom_dir
-                        else:
-                            logger.warning(f"Storage_path không tồn tại: {custom_dir}")
+            # 1️⃣ Ưu tiên đọc từ config
+            custom_dir = config_service.get_path("storage_path")
+            if custom_dir:
+                if custom_dir.exists():
+                    logger.info(f"Using custom storage path: {custom_dir}")
+                    return custom_dir
+                else:
+                    logger.warning(f"Storage_path không tồn tại: {custom_dir}")
 
             # 2️⃣ Nếu không có hoặc lỗi → mặc định dùng relative path trong dự án
             default_path = self.project_root / "data" / "output"
@@ -514,16 +685,7 @@ class HomePage(BasePage):
                 self.storage_path.setText(folder)
 
                 # Lưu vào config (đúng khóa: storage_path)
-                config_path = self.project_root / "config" / "app_config.json"
-                config = {}
-                if config_path.exists():
-                    with open(config_path, "r", encoding="utf-8") as f:
-                        config = json.load(f)
-
-                config["storage_path"] = str(storage_path)
-
-                with open(config_path, "w", encoding="utf-8") as f:
-                    json.dump(config, f, indent=2, ensure_ascii=False)
+                config_service.update(storage_path=str(storage_path))
 
                 logger.info(f"Storage directory updated to: {storage_path}")
             except Exception as e:
@@ -538,44 +700,34 @@ class HomePage(BasePage):
     def add_files(self, paths: list[Path]):
         """Add files to the list"""
         added = []
+        added_set = set()
         skipped = []
 
-        with self._files_lock:
-            for p in paths:
-                p = Path(p).resolve()
-                
-                # Validate file existence and type
-                if not p.exists():
-                    skipped.append(f"{p.name} (not found)")
-                    continue
-                
-                if p.is_dir():
-                    skipped.append(f"{p.name} (is directory)")
-                    continue
-                
-                if p.suffix.lower() not in VALID_EXTENSIONS:
-                    skipped.append(f"{p.name} (invalid format)")
-                    continue
-                
-                # Check for duplicates using set (O(1) lookup)
-                if p in self.files_set:
-                    skipped.append(f"{p.name} (already added)")
-                    continue
-                
-                self.files.append(p)
-                self.files_set.add(p)
-                added.append(p)
-
-        # Add FileItems for new files
-        if added:
-            for p in added:
-                # Check if item already exists to avoid duplicates
-                if not any(p == f.file_path for f in self.file_list_container.findChildren(FileItem)):
-                    # Get current index from total files
-                    current_index = len([item for item in self.file_list_container.findChildren(FileItem)])
-                    item = FileItem(current_index + 1, p, self.theme_data, self.project_root, 
-                                  remove_callback=self.remove_file)
-                    self.file_list_layout.addWidget(item)
+        for p in paths:
+            p = Path(p)
+
+            # Kiểm tra đuôi file trước (không cần truy cập đĩa)
+            if p.suffix.lower() not in VALID_EXTENSIONS and not p.is_dir():
+                skipped.append(f"{p.name} (invalid format)")
+                continue
+
+            p = p.resolve()
+
+            # Check for duplicates (O(1) lookup trong model)
+            if self.file_model.contains(p) or p in added_set:
+                skipped.append(f"{p.name} (already added)")
+                continue
+
+            # Validate file existence and type
+            if not p.is_file():
+                skipped.append(f"{p.name} ({'is directory' if p.is_dir() else 'not found'})")
+                continue
+
+            added.append(p)
+            added_set.add(p)
+
+        # 1 lần insert cho cả lô; kích thước đọc trên luồng nền
+        self.file_model.add_paths(added)
 
         # Show feedback to user
         self.update_total_files()
@@ -594,45 +746,59 @@ class HomePage(BasePage):
             elif skipped:
                 QMessageBox.warning(self, "Upload Status", feedback_msg)
 
-    def remove_file(self, file_path: Path):
+    def _confirm_remove_row(self, row: int):
+        """Hỏi xác nhận rồi xoá hàng `row` khỏi danh sách"""
+        path = self.file_model.data(self.file_model.index(row), FileListModel.PathRole)
+        if path is None:
+            return
+        reply = QMessageBox.question(
+            self,
+            'Confirm Delete',
+            f'Remove "{path.name}" from the list?',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.remove_file(path, row)
+
+    def remove_file(self, file_path: Path, row: int | None = None):
         """Remove file from list"""
-        with self._files_lock:
-            resolved_path = file_path.resolve()
-            try:
-                self.files.remove(file_path)
-                self.files_set.discard(resolved_path)
-            except ValueError:
+        resolved_path = Path(file_path).resolve()
+        if row is None or self.file_model.data(self.file_model.index(row), FileListModel.PathRole) != resolved_path:
+            row = self.file_model.row_of(resolved_path)
+            if row < 0:
                 logger.warning(f"File not found in list: {file_path}")
-        
+                return
+        self.file_model.remove_row(row)
         self.update_total_files()
-        self.refresh_file_indexes()
 
-    def refresh_file_indexes(self):
-        """Update file indexes after deletion"""
-        file_items = self.file_list_container.findChildren(FileItem)
-        for i, item in enumerate(file_items, start=1):
-            label = item.findChild(QLabel, "FileIndex")
-            if label:
-                label.setText(str(i))
+    def _on_warmup_state(self, _state=None):
+        """Hiển thị trạng thái warm-up cạnh nút Process"""
+        states = self.warmup_bridge.snapshot()
+        self.warmup_label.setText(readiness_text(states))
+        self.warmup_label.setToolTip(readiness_tooltip(states))
+        self.process_btn.setToolTip(readiness_tooltip(states))
 
     def update_total_files(self):
         """Update total files label and process button state"""
-        self.total_files_label.setText(f"Total files: {len(self.files)}")
-        self.process_btn.setEnabled(len(self.files) > 0)
+        count = self.file_model.rowCount()
+        self.total_files_label.setText(f"Total files: {count}")
+        self.process_btn.setEnabled(count > 0)
 
     def _process_files(self):
         """Process selected files"""
-        if not self.files:
+        files = self.files
+        if not files:
             QMessageBox.warning(self, "No Files", "Please select files to process.")
             return
 
         reply = QMessageBox.question(
             self,
             'Process Files',
-            f'Start processing {len(self.files)} file(s)?',
+            f'Start processing {len(files)} file(s)?',
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.Yes
         )
 
         if reply == QMessageBox.Yes:
-            self.process_requested.emit(self.files)
\ No newline at end of file
+            self.process_requested.emit(files)
\ No newline at end of file
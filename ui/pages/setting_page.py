@@ -1,17 +1,22 @@
 from PySide6.QtWidgets import (
     QVBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton,
-    QFileDialog, QHBoxLayout, QMessageBox, QFrame, QWidget
+    QFileDialog, QHBoxLayout, QMessageBox, QFrame, QWidget, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
 )
 from PySide6.QtCore import Qt
-from pathlib import Path
-import json
 import logging
 
+from config.config_service import config_service
+from core.metrics import get_metrics_log, summarize
+from core.ocr_extract import WIRE_FORMATS
 from ui.pages.base_page import BasePage
 from ui.style.theme_manager import ThemeManager
 
 logger = logging.getLogger(__name__)
 
+# Số bản ghi cuối trong .metrics.jsonl dùng để tính p50/p95
+METRICS_WINDOW = 500
+
 
 class SettingPage(BasePage):
     """Settings Page – configure API, model parameters, and storage directory."""
@@ -20,9 +25,6 @@ class SettingPage(BasePage):
         # Header/Divider (title) do BasePage quản lý — KHÔNG style đè
         super().__init__("Settings", theme_manager, parent)
         self.theme_manager = theme_manager
-        self.config_path = (
-            Path(__file__).resolve().parent.parent.parent / "config" / "app_config.json"
-        )
 
         # Lấy layout chính từ BasePage (đang chứa header + divider)
         root_layout: QVBoxLayout = self.layout()
@@ -137,6 +139,70 @@ class SettingPage(BasePage):
 
         form_layout.addWidget(token_row)
 
+        # =========================
+        # OCR payload encoding
+        # =========================
+        wire_row = QWidget()
+        wire_row_layout = QVBoxLayout(wire_row)
+        wire_row_layout.setContentsMargins(0, 0, 0, 0)
+        wire_row_layout.setSpacing(6)
+
+        wire_label = QLabel("OCR Image Encoding:")
+        wire_row_layout.addWidget(wire_label)
+
+        wire_hint = QLabel("Format / quality (JPEG, WebP) / max side in px (0 = keep original size)")
+        wire_hint.setObjectName("HintLabel")
+        wire_hint.setStyleSheet("color: gray; font-size: 11px;")
+        wire_row_layout.addWidget(wire_hint)
+
+        wire_inputs = QHBoxLayout()
+        wire_inputs.setContentsMargins(0, 0, 0, 0)
+        wire_inputs.setSpacing(8)
+
+        self.wire_format_combo = QComboBox()
+        self.wire_format_combo.setObjectName("SettingComboBox")
+        self.wire_format_combo.addItems(list(WIRE_FORMATS))
+        self.wire_format_combo.setCurrentText(self.config.get("ocr_wire_format", "png"))
+        self.wire_format_combo.setFocusPolicy(Qt.StrongFocus)
+        wire_inputs.addWidget(self.wire_format_combo, 1)
+
+        self.wire_quality_input = QLineEdit()
+        self.wire_quality_input.setObjectName("SettingLineEdit")
+        self.wire_quality_input.setPlaceholderText("90")
+        self.wire_quality_input.setText(str(self.config.get("ocr_wire_quality", 90)))
+        self.wire_quality_input.setFocusPolicy(Qt.StrongFocus)
+        wire_inputs.addWidget(self.wire_quality_input, 1)
+
+        self.max_side_input = QLineEdit()
+        self.max_side_input.setObjectName("SettingLineEdit")
+        self.max_side_input.setPlaceholderText("0")
+        self.max_side_input.setText(str(self.config.get("ocr_max_side", 0)))
+        self.max_side_input.setFocusPolicy(Qt.StrongFocus)
+        wire_inputs.addWidget(self.max_side_input, 1)
+
+        wire_row_layout.addLayout(wire_inputs)
+
+        form_layout.addWidget(wire_row)
+
+        # =========================
+        # OCR result cache
+        # =========================
+        cache_row = QWidget()
+        cache_row_layout = QVBoxLayout(cache_row)
+        cache_row_layout.setContentsMargins(0, 0, 0, 0)
+        cache_row_layout.setSpacing(6)
+
+        cache_label = QLabel("OCR Result Cache:")
+        cache_row_layout.addWidget(cache_label)
+
+        self.cache_checkbox = QCheckBox("Reuse cached results for unchanged images (uncheck to bypass cache)")
+        self.cache_checkbox.setObjectName("SettingCheckBox")
+        self.cache_checkbox.setChecked(bool(self.config.get("ocr_cache_enabled", True)))
+        self.cache_checkbox.setFocusPolicy(Qt.StrongFocus)
+        cache_row_layout.addWidget(self.cache_checkbox)
+
+        form_layout.addWidget(cache_row)
+
         # =========================
         # Storage Path
         # =========================
@@ -171,6 +237,43 @@ class SettingPage(BasePage):
 
         form_layout.addWidget(store_row)
 
+        # =========================
+        # Pipeline metrics (p50 / p95)
+        # =========================
+        metrics_row = QWidget()
+        metrics_layout = QVBoxLayout(metrics_row)
+        metrics_layout.setContentsMargins(0, 0, 0, 0)
+        metrics_layout.setSpacing(6)
+
+        metrics_header = QHBoxLayout()
+        metrics_header.setContentsMargins(0, 0, 0, 0)
+        metrics_header.addWidget(QLabel("Pipeline Metrics:"))
+        metrics_header.addStretch(1)
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.setObjectName("BrowseButton")
+        refresh_btn.setFocusPolicy(Qt.StrongFocus)
+        refresh_btn.clicked.connect(self._refresh_metrics)
+        metrics_header.addWidget(refresh_btn)
+        metrics_layout.addLayout(metrics_header)
+
+        self.metrics_hint = QLabel()
+        self.metrics_hint.setObjectName("HintLabel")
+        self.metrics_hint.setStyleSheet("color: gray; font-size: 11px;")
+        metrics_layout.addWidget(self.metrics_hint)
+
+        self.metrics_table = QTableWidget(0, 4)
+        self.metrics_table.setObjectName("MetricsTable")
+        self.metrics_table.setHorizontalHeaderLabels(["Stage", "Files", "p50", "p95"])
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.metrics_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.metrics_table.setSelectionMode(QAbstractItemView.NoSelection)
+        self.metrics_table.setMinimumHeight(180)
+        metrics_layout.addWidget(self.metrics_table)
+
+        form_layout.addWidget(metrics_row)
+        self._refresh_metrics()
+
         form_layout.addStretch(1)
 
         # =========================
@@ -217,14 +320,8 @@ class SettingPage(BasePage):
     # Config I/O
     # =========================
     def _load_config(self) -> dict:
-        """Load configuration from app_config.json."""
-        try:
-            if self.config_path.exists():
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.error(f"Error reading config: {e}")
-        return {}
+        """Load configuration from the shared config service."""
+        return config_service.load()
 
     def _save_config(self):
         """Validate & save all settings to app_config.json."""
@@ -247,19 +344,42 @@ class SettingPage(BasePage):
                 self.token_input.setFocus()
                 return
 
+            # Validate wire encoding
+            q_str = (self.wire_quality_input.text() or "").strip()
+            side_str = (self.max_side_input.text() or "").strip()
+            try:
+                wire_quality = int(q_str) if q_str != "" else 90
+                max_side = int(side_str) if side_str != "" else 0
+                if not 1 <= wire_quality <= 100 or max_side < 0:
+                    raise ValueError
+            except ValueError:
+                QMessageBox.warning(
+                    self, "Invalid input",
+                    "Quality must be an integer from 1 to 100 and max side a non-negative integer."
+                )
+                self.wire_quality_input.setFocus()
+                return
+
             # Build full URL from user input
             host_port = self.base_input.text().strip()
             full_url = self._build_full_url(host_port)
 
             # Pack config
-            self.config["theme"] = self.theme_combo.currentText()
-            self.config["base_url"] = full_url  # Lưu URL đầy đủ
-            self.config["temperature"] = temperature
-            self.config["max_tokens"] = max_tokens
-            self.config["storage_path"] = self.storage_input.text().strip()
-
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=2)
+            values = {
+                "theme": self.theme_combo.currentText(),
+                "base_url": full_url,  # Lưu URL đầy đủ
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "storage_path": self.storage_input.text().strip(),
+                "ocr_wire_format": self.wire_format_combo.currentText(),
+                "ocr_wire_quality": wire_quality,
+                "ocr_max_side": max_side,
+                "ocr_cache_enabled": self.cache_checkbox.isChecked(),
+            }
+
+            # Merge vào config hiện tại (giữ các key do nơi khác ghi), cache được làm mới ngay
+            config_service.update(**values)
+            self.config.update(values)
 
             QMessageBox.information(self, "Saved", f"Settings have been successfully updated.\nFull API URL: {full_url}")
             logger.info(f"✅ Config saved successfully. Base URL: {full_url}")
@@ -268,6 +388,42 @@ class SettingPage(BasePage):
             logger.error(f"Error saving config: {e}")
             QMessageBox.critical(self, "Error", f"Unable to save configuration:\n{e}")
 
+    # =========================
+    # Pipeline metrics
+    # =========================
+    def _refresh_metrics(self):
+        """Đọc các bản ghi cuối trong .metrics.jsonl của storage hiện tại và hiển thị p50/p95"""
+        # core.pipeline kéo theo PIL / upscale pool → chỉ import khi cần đọc số đo
+        from core.pipeline import get_default_output
+
+        log = get_metrics_log(get_default_output())
+        records = log.tail(METRICS_WINDOW) if log is not None else []
+        rows = summarize(records)
+
+        self.metrics_table.setRowCount(len(rows))
+        for r, row in enumerate(rows):
+            fmt = "{:.0f} " if row["unit"] != "tok/s" else "{:.1f} "
+            values = [
+                row["name"],
+                str(row["count"]),
+                fmt.format(row["p50"]) + row["unit"],
+                fmt.format(row["p95"]) + row["unit"],
+            ]
+            for c, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if c > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.metrics_table.setItem(r, c, item)
+
+        if log is None:
+            self.metrics_hint.setText("Metrics are disabled (metrics_enabled = false).")
+        elif not records:
+            self.metrics_hint.setText("No metrics recorded yet — run an OCR batch first.")
+        else:
+            self.metrics_hint.setText(
+                f"Last {len(records)} file(s) in {log.path.name}. generation_rate p95 = slowest 5%."
+            )
+
     def _choose_folder(self):
         """Open a folder selection dialog."""
         folder = QFileDialog.getExistingDirectory(self, "Select storage directory")
@@ -77,6 +77,12 @@
     color: {{ color.text.primary }};
 }
 
+#WarmupLabel {
+    font-size: {{ typography.muted.size }}px;
+    color: {{ color.text.placeholder }};
+    padding: 0 8px;
+}
+
 #ProcessButton {
     background: {{ color.text.secondary }};
     color: #ffffff;
@@ -100,36 +106,11 @@
     color: #999999;
 }
 
-#FileName {
-    font-size: {{ typography.normal.size }}px;
-    color: {{ color.text.primary }};
-}
-
-#FileSize {
-    font-size: 13px;
-    color: #666;
-}
-
-#FileIndex {
-    font-size: {{ typography.normal.size }}px;
-    color: {{ color.text.primary }};
-    font-weight: 600;
-}
-
-#DeleteButton {
-    border: 1px solid transparent;
-    border-radius: 6px;
-}
-
-#DeleteButton:hover {
-    background: {{ color.background.base }};
-    border: 1px solid transparent;
-    border-radius: 6px;
-}
-
 #FileList {
     border: none;
     background: {{ color.background.panel }};
+    border-bottom-left-radius: 12px;
+    border-bottom-right-radius: 12px;
 }
 
 #FileListContainer {
@@ -166,22 +147,3 @@
 #FileListSeparator {
     background: {{ color.border.default }};
 }
-
-#FileItemColumn {
-    background: transparent;
-    border-right: 1px solid {{ color.border.default }};
-}
-
-#FileItemColumn:last-child {
-    border-right: none;
-}
-
-#FileItem {
-    border-bottom: 1px solid {{ color.border.default }};
-}
-
-#FileItem:last-child {
-    border-bottom: none;
-    border-bottom-left-radius: 12px;
-    border-bottom-right-radius: 12px;
-}
\ No newline at end of file
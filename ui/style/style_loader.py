@@ -1,38 +1,132 @@
 from __future__ import annotations
+import hashlib
 import json
+import re
+import threading
 from pathlib import Path
-from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor
+from PySide6.QtCore import Qt, QSize, QStandardPaths
+from PySide6.QtGui import QIcon, QPixmap, QPainter, QColor, QGuiApplication
 from PySide6.QtSvg import QSvgRenderer
 
+from utils.path_helper import resource_path
+
 
 STYLE_DIR = Path(__file__).parent
 THEME_DIR = STYLE_DIR / "theme"
 PAGES_DIR = STYLE_DIR / "pages"
 
+# Placeholder trong template: {{ color.text.primary }}
+_PLACEHOLDER = re.compile(r"\{\{ ([\w.]+) \}\}")
+# Đổi khi thay cách render → bỏ qua file QSS đã lưu của phiên bản cũ
+_RENDER_VERSION = "1"
+
+ICON_DIR = resource_path("assets/icon")
+
+# Icon dùng ngay khi mở app: (file, màu — "text.primary" = key trong theme hoặc mã màu, size)
+PREWARM_ICONS = (
+    *((name, role, 20) for name in ("home.svg", "scan.svg", "folder.svg", "setting.svg", "review.svg")
+      for role in ("text.primary", "text.secondary")),
+    ("user.svg", "text.primary", 24),
+    ("folder_plus.svg", "text.primary", 18),
+    ("camera.svg", "text.primary", 18),
+    ("link.svg", "text.primary", 18),
+    ("upload.svg", "text.primary", 48),
+    ("folder.svg", "text.primary", 16),
+    ("more.svg", "text.primary", 16),
+    ("file.svg", "#1A73E8", 18),
+    ("close.svg", "#666", 18),
+    ("no_image.svg", "text.muted", 100),
+    ("reload.svg", "#6B7280", 16),
+    *(("circle.svg", color, 10) for color in ("#A0A0A0", "#FB923C", "#22C55E", "#EF4444")),
+)
+
+# Icon đã tô màu: (path, màu, size, devicePixelRatio) → QIcon; dùng chung toàn app, chỉ dùng trên luồng UI
+_icon_cache: dict[tuple[str, str, int, float], QIcon] = {}
+# SVG đã parse theo path (1 file chỉ parse 1 lần dù tô nhiều màu / size)
+_svg_cache: dict[str, QSvgRenderer] = {}
+
+# QSS đã render trong phiên: (theme, page) → (chữ ký file nguồn, qss)
+_qss_cache: dict[tuple[str, str | None], tuple[str, str]] = {}
+_qss_lock = threading.Lock()
+
+
+def _flatten(ctx: dict, prefix: str = "", out: dict | None = None) -> dict[str, str]:
+    """{"color": {"text": {"primary": "#111"}}} → {"color.text.primary": "#111"}"""
+    out = {} if out is None else out
+    for k, v in ctx.items():
+        if isinstance(v, dict):
+            _flatten(v, f"{prefix}{k}.", out)
+        else:
+            out[f"{prefix}{k}"] = str(v)
+    return out
+
+
+def render_qss(template: str, theme_data: dict) -> str:
+    """Thay mọi placeholder trong 1 lượt duyệt; key không có trong theme được giữ nguyên"""
+    values = _flatten(theme_data)
+    return _PLACEHOLDER.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+
+def _qss_disk_dir() -> Path:
+    return Path(QStandardPaths.writableLocation(QStandardPaths.CacheLocation)) / "qss"
+
+
+def _signature(*files: Path) -> str:
+    """Chữ ký (mtime + size) của template và theme JSON — file nguồn đổi thì render lại"""
+    parts = [_RENDER_VERSION]
+    for f in files:
+        st = f.stat()
+        parts.append(f"{f.name}:{st.st_mtime_ns}:{st.st_size}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
 
 def load_theme_qss(theme: str = "light", page: str | None = None) -> str:
-    """Render QSS từ template + theme JSON."""
+    """
+    Render QSS từ template + theme JSON.
+    Kết quả được cache theo (theme, page, mtime file nguồn): trong bộ nhớ cho cả phiên
+    và trên đĩa (CacheLocation/qss) cho lần khởi động sau.
+    """
     theme_file = THEME_DIR / f"theme_{theme}.json"
-    theme_data = json.loads(theme_file.read_text(encoding="utf-8"))
 
     if page:
         tpl_file = PAGES_DIR / f"{page}.qss.tpl"
     else:
         tpl_file = STYLE_DIR / "pages" / "style.qss.tpl"
 
-    template = tpl_file.read_text(encoding="utf-8")
-
-    def deep_format(s: str, ctx: dict, prefix="") -> str:
-        out = s
-        for k, v in ctx.items():
-            if isinstance(v, dict):
-                out = deep_format(out, v, f"{prefix}{k}.")
-            else:
-                out = out.replace(f"{{{{ {prefix}{k} }}}}", str(v))
-        return out
-
-    return deep_format(template, theme_data)
+    signature = _signature(tpl_file, theme_file)
+    key = (theme, page)
+    with _qss_lock:
+        cached = _qss_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    disk_dir = _qss_disk_dir()
+    disk_file = disk_dir / f"{theme}_{page or 'style'}_{signature}.qss"
+    try:
+        qss = disk_file.read_text(encoding="utf-8")
+    except OSError:
+        theme_data = json.loads(theme_file.read_text(encoding="utf-8"))
+        qss = render_qss(tpl_file.read_text(encoding="utf-8"), theme_data)
+        _store_qss(disk_dir, disk_file, qss)
+
+    with _qss_lock:
+        _qss_cache[key] = (signature, qss)
+    return qss
+
+
+def _store_qss(disk_dir: Path, disk_file: Path, qss: str) -> None:
+    """Ghi QSS đã render (ghi tạm rồi replace) và xoá bản cũ của cùng theme/page; lỗi ghi bỏ qua"""
+    prefix = disk_file.name.rsplit("_", 1)[0] + "_"
+    try:
+        disk_dir.mkdir(parents=True, exist_ok=True)
+        for old in disk_dir.glob(f"{prefix}*.qss"):
+            if old.name != disk_file.name and old.name.rsplit("_", 1)[0] + "_" == prefix:
+                old.unlink(missing_ok=True)
+        tmp = disk_file.with_suffix(".tmp")
+        tmp.write_text(qss, encoding="utf-8")
+        tmp.replace(disk_file)
+    except OSError:
+        pass
 
 
 def load_theme_data(theme: str = "light") -> dict:
@@ -42,18 +136,39 @@ def load_theme_data(theme: str = "light") -> dict:
     return json.loads(theme_file.read_text(encoding="utf-8"))
 
 
-def load_svg_colored(path: Path, color: str, size: int = 20) -> QIcon:
-    """Load SVG và tô lại bằng màu theme, có kiểm tra hợp lệ"""
-    if not path.exists():
-        print(f"[WARN] SVG not found: {path}")
-        return QIcon()
-
-    renderer = QSvgRenderer(str(path))
-    if not renderer.isValid():
-        print(f"[WARN] Invalid SVG: {path}")
-        return QIcon()
-
-    pixmap = QPixmap(size, size)
+def _device_pixel_ratio() -> float:
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app is not None else None
+    return screen.devicePixelRatio() if screen is not None else 1.0
+
+
+def load_svg_colored(path: Path, color: str, size: int = 20, dpr: float | None = None) -> QIcon:
+    """
+    Load SVG và tô lại bằng màu theme, có kiểm tra hợp lệ.
+    Kết quả được cache theo (path, màu, size, devicePixelRatio) — gọi lại (hover, từng hàng danh sách...)
+    không parse / render lại SVG.
+    """
+    dpr = dpr or _device_pixel_ratio()
+    key = (str(path), QColor(color).name(QColor.HexArgb), size, dpr)
+    icon = _icon_cache.get(key)
+    if icon is not None:
+        return icon
+
+    renderer = _svg_cache.get(key[0])
+    if renderer is None:
+        if not path.exists():
+            print(f"[WARN] SVG not found: {path}")
+            return QIcon()
+
+        renderer = QSvgRenderer(str(path))
+        if not renderer.isValid():
+            print(f"[WARN] Invalid SVG: {path}")
+            return QIcon()
+        _svg_cache[key[0]] = renderer
+
+    # Render theo pixel thật của màn hình (HiDPI) rồi gắn devicePixelRatio
+    px = max(1, round(size * dpr))
+    pixmap = QPixmap(px, px)
     pixmap.fill(Qt.transparent)
 
     # Vẽ SVG gốc
@@ -70,5 +185,27 @@ def load_svg_colored(path: Path, color: str, size: int = 20) -> QIcon:
     painter.setCompositionMode(QPainter.CompositionMode_DestinationIn)
     painter.drawPixmap(0, 0, pixmap)
     painter.end()
-
-    return QIcon(colored)
\ No newline at end of file
+    colored.setDevicePixelRatio(dpr)
+
+    icon = QIcon(colored)
+    _icon_cache[key] = icon
+    return icon
+
+
+def clear_icon_cache() -> None:
+    """Bỏ toàn bộ icon đã render (đổi theme → bộ màu khác, tránh cache phình theo số lần đổi)"""
+    _icon_cache.clear()
+
+
+def prewarm_icons(theme_data: dict) -> int:
+    """Render sẵn PREWARM_ICONS theo màu của theme; trả về số icon đã có trong cache"""
+    for name, color, size in PREWARM_ICONS:
+        if not color.startswith("#"):
+            value = theme_data["color"]
+            for part in color.split("."):
+                value = value[part]
+            color = value
+        path = ICON_DIR / name
+        if path.exists():
+            load_svg_colored(path, color, size)
+    return len(_icon_cache)
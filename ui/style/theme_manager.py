@@ -3,6 +3,8 @@ import json
 from pathlib import Path
 from PySide6.QtCore import QObject, Signal
 
+from ui.style.style_loader import clear_icon_cache, prewarm_icons
+
 STYLE_DIR = Path(__file__).parent
 THEME_DIR = STYLE_DIR / "theme"
 
@@ -31,4 +33,7 @@ class ThemeManager(QObject):
         if theme != self._theme_name:
             self._theme_name = theme
             self._theme_data = self._load_theme(theme)
+            # Icon theo màu theme cũ không dùng nữa → render lại bộ mới trước khi các page nhận signal
+            clear_icon_cache()
+            prewarm_icons(self._theme_data)
             self.theme_changed.emit(self._theme_data, self._theme_name)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+from core.thumbnails import get_thumbnail_cache, preview_size_for
+
+# Dung lượng tối đa (byte) của các QPixmap preview giữ trong bộ nhớ
+PIXMAP_CACHE_BYTES = 128 * 1024 * 1024
+
+
+class _LoaderSignals(QObject):
+    loaded = Signal(object, QImage)
+
+
+class _LoadTask(QRunnable):
+    """Đọc preview trên luồng nền: tạo file trong .thumbs nếu chưa có, decode thành QImage"""
+
+    def __init__(self, key: tuple, source: Path, output_root: Path, max_side: int, signals: _LoaderSignals):
+        super().__init__()
+        self.key = key
+        self.source = source
+        self.output_root = output_root
+        self.max_side = max_side
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        path = get_thumbnail_cache(self.output_root).get(self.source, self.max_side)
+        if path is not None:
+            image = QImage(str(path))
+        if image.isNull():
+            # Không tạo được file preview → Qt tự decode ở kích thước nhỏ
+            reader = QImageReader(str(self.source))
+            reader.setAutoTransform(True)
+            size = reader.size()
+            if size.isValid() and max(size.width(), size.height()) > self.max_side:
+                reader.setScaledSize(size.scaled(self.max_side, self.max_side, Qt.KeepAspectRatio))
+            image = reader.read()
+        self.signals.loaded.emit(self.key, image)
+
+
+class PreviewLoader(QObject):
+    """
+    Nạp preview ảnh không chặn UI:
+    - decode trên QThreadPool riêng, từ file preview nhiều mức (core.thumbnails) thay vì ảnh đầy đủ
+    - LRU QPixmap trong bộ nhớ (PIXMAP_CACHE_BYTES), key = (path, mtime, mức preview)
+    Chỉ dùng trên luồng UI (tạo qua get_preview_loader()).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pixmaps: OrderedDict[tuple, QPixmap] = OrderedDict()
+        self._bytes = 0
+        self._pending: dict[tuple, list] = {}
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _LoaderSignals()
+        self._signals.loaded.connect(self._on_loaded)
+
+    def request(self, source: Path, output_root: Path, needed_px: int, callback) -> None:
+        """
+        Gọi callback(QPixmap) với preview của `source` có cạnh dài >= `needed_px` (nếu có mức đủ lớn).
+        Có trong LRU thì gọi ngay, ngược lại gọi sau khi luồng nền decode xong.
+        QPixmap rỗng khi không đọc được ảnh.
+        """
+        source = Path(source)
+        max_side = preview_size_for(needed_px)
+        try:
+            mtime = source.stat().st_mtime_ns
+        except OSError:
+            callback(QPixmap())
+            return
+        key = (str(source), mtime, max_side)
+
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            callback(pixmap)
+            return
+        if key in self._pending:
+            self._pending[key].append(callback)
+            return
+        self._pending[key] = [callback]
+        self._pool.start(_LoadTask(key, source, Path(output_root), max_side, self._signals))
+
+    def _on_loaded(self, key: tuple, image: QImage):
+        pixmap = QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+        if not pixmap.isNull():
+            self._pixmaps[key] = pixmap
+            self._bytes += self._cost(pixmap)
+            while self._bytes > PIXMAP_CACHE_BYTES and len(self._pixmaps) > 1:
+                _, old = self._pixmaps.popitem(last=False)
+                self._bytes -= self._cost(old)
+
+        for callback in self._pending.pop(key, []):
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # Widget nhận kết quả đã bị đóng / xoá
+                pass
+
+    @staticmethod
+    def _cost(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+
+_loader: PreviewLoader | None = None
+
+
+def get_preview_loader() -> PreviewLoader:
+    global _loader
+    if _loader is None:
+        _loader = PreviewLoader()
+    return _loader
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import sqlite3
+from pathlib import Path
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+from core.catalog import StorageCatalog
+
+# Gộp các sự kiện file system liên tiếp (pipeline ghi nhiều file / copy cả thư mục) thành 1 lần cập nhật
+WATCH_DEBOUNCE_MS = 300
+
+
+class StorageWatcher(QObject):
+    """
+    Cập nhật catalog theo thay đổi trên đĩa, không quét lại cả storage:
+    - watch thư mục root → folder được thêm / xoá (catalog.sync_root)
+    - watch các folder đang hiển thị (và thư mục con) → catalog.refresh(tên folder)
+    Không watch mọi folder (giới hạn inotify / handle trên Windows với hàng chục nghìn folder);
+    folder không hiển thị do pipeline ghi vẫn được cập nhật qua record_output.
+    `changed` phát (trên luồng UI) set tên folder vừa đổi trong catalog — từ watcher lẫn pipeline.
+    """
+    changed = Signal(object)  # set[str]
+
+    def __init__(self, catalog: StorageCatalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.root = catalog.output_root
+        self._root_dirty = False
+        self._dirty: set[str] = set()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.addPath(str(self.root))
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(WATCH_DEBOUNCE_MS)
+        self._timer.timeout.connect(self._flush)
+
+        # Signal.emit từ luồng pipeline → Qt tự chuyển về luồng UI
+        self._unsubscribe = catalog.subscribe(self.changed.emit)
+
+    def watch_folders(self, folders: list[Path]) -> None:
+        """Theo dõi đúng các folder đang hiển thị (thay cho danh sách trước đó)"""
+        wanted: set[Path] = set()
+        for folder in folders:
+            try:
+                wanted.update(sub for sub in folder.iterdir() if sub.is_dir())
+                wanted.add(folder)
+            except OSError:
+                continue
+        # So sánh bằng Path: Qt trả về path dùng "/" kể cả trên Windows
+        current = {Path(p) for p in self._watcher.directories()} - {self.root}
+        if current - wanted:
+            self._watcher.removePaths([str(p) for p in current - wanted])
+        if wanted - current:
+            self._watcher.addPaths([str(p) for p in wanted - current])
+
+    def _on_directory_changed(self, path: str):
+        changed = Path(path)
+        if changed == self.root:
+            self._root_dirty = True
+        else:
+            try:
+                self._dirty.add(changed.relative_to(self.root).parts[0])
+            except (ValueError, IndexError):
+                return
+        self._timer.start()
+
+    def _flush(self):
+        root_dirty, dirty = self._root_dirty, self._dirty
+        self._root_dirty, self._dirty = False, set()
+        try:
+            if root_dirty:
+                self.catalog.sync_root()
+            for name in dirty:
+                self.catalog.refresh(name)
+        except (OSError, sqlite3.Error):
+            # Storage bị xoá / ngắt kết nối — lần Refresh sau sẽ đồng bộ lại
+            pass
+
+    def close(self) -> None:
+        self._unsubscribe()
+        self._timer.stop()
+        paths = self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from PySide6.QtCore import QObject, Signal
+
+from core.warmup import (COMPONENT_OCR_SERVER, COMPONENT_UPSCALE, STATE_FAILED, STATE_READY,
+                         STATE_RUNNING, STATE_SKIPPED, WarmupState, get_warmup_service)
+
+# Câu hiển thị theo (thành phần, trạng thái)
+_LABELS = {
+    (COMPONENT_UPSCALE, STATE_RUNNING): "Loading model…",
+    (COMPONENT_UPSCALE, STATE_READY): "Model ready",
+    (COMPONENT_UPSCALE, STATE_FAILED): "Model warm-up failed",
+    (COMPONENT_OCR_SERVER, STATE_RUNNING): "Checking OCR server…",
+    (COMPONENT_OCR_SERVER, STATE_READY): "OCR server online",
+    (COMPONENT_OCR_SERVER, STATE_FAILED): "OCR server unreachable",
+}
+
+
+def readiness_text(states: dict[str, WarmupState]) -> str:
+    """Tóm tắt 1 dòng cho UI, ví dụ "Model ready · Checking OCR server…" (rỗng nếu chưa bắt đầu / tắt)"""
+    parts = [_LABELS[key] for key in ((c, s.state) for c, s in states.items()) if key in _LABELS]
+    return " · ".join(parts)
+
+
+def readiness_tooltip(states: dict[str, WarmupState]) -> str:
+    lines = []
+    for component, s in states.items():
+        if s.state == STATE_SKIPPED:
+            continue
+        line = f"{component}: {s.state}"
+        if s.detail:
+            line += f" — {s.detail}"
+        if s.finished:
+            line += f" ({s.elapsed_ms:.0f} ms)"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+class WarmupBridge(QObject):
+    """
+    Chuyển thay đổi của WarmupService (luồng warm-up) sang luồng UI qua Signal.
+    Dùng 1 instance chung: get_warmup_bridge().
+    """
+    state_changed = Signal(object)  # WarmupState
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.service = get_warmup_service()
+        self._unsubscribe = self.service.subscribe(self.state_changed.emit)
+
+    def snapshot(self) -> dict[str, WarmupState]:
+        return self.service.snapshot()
+
+
+_bridge: WarmupBridge | None = None
+
+
+def get_warmup_bridge() -> WarmupBridge:
+    global _bridge
+    if _bridge is None:
+        _bridge = WarmupBridge()
+    return _bridge
@@ -0,0 +1,63 @@
+import os
+import tempfile
+from pathlib import Path
+
+# umask của process — đọc 1 lần lúc import (os.umask vừa đọc vừa ghi, không an toàn giữa các luồng)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _temp_path(path: Path) -> Path:
+    """
+    File tạm (ẩn) cùng thư mục với `path` để os.replace là thao tác atomic.
+    mkstemp tạo file quyền 0600 và os.replace giữ nguyên quyền đó → đặt lại quyền giống file
+    đích hiện có, hoặc quyền mặc định (0666 & ~umask) như open() nếu file đích chưa tồn tại.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp, mode)
+    except BaseException:
+        # Caller chưa nhận được path → tự dọn file tạm
+        os.unlink(tmp)
+        raise
+    return Path(tmp)
+
+
+def atomic_write_text(path, text: str, encoding: str = "utf-8") -> Path:
+    """
+    Ghi text vào file tạm rồi replace: file đích luôn là bản cũ hoặc bản mới đầy đủ,
+    không bao giờ bị ghi dở (kể cả khi bị dừng giữa chừng).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _temp_path(path)
+    try:
+        with open(tmp, "w", encoding=encoding) as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def atomic_save_image(img, path, **params) -> Path:
+    """Lưu PIL.Image theo cùng cơ chế file tạm + replace (định dạng lấy từ đuôi file)"""
+    from PIL import Image
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fmt = Image.registered_extensions().get(path.suffix.lower(), "PNG")
+    tmp = _temp_path(path)
+    try:
+        img.save(tmp, format=fmt, **params)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
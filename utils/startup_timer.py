@@ -0,0 +1,42 @@
+import time
+
+# Mốc 0: lúc module này được import (main.py import nó đầu tiên)
+_T0 = time.perf_counter()
+
+
+class StartupTimer:
+    """
+    Đo thời gian khởi động app: mark(tên) ghi mốc (ms tính từ lúc process bắt đầu import),
+    report() in bảng tóm tắt 1 lần sau khi cửa sổ hiện lên.
+    """
+
+    def __init__(self) -> None:
+        self.marks: list[tuple[str, float]] = []
+        self.reported = False
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - _T0) * 1000
+
+    def mark(self, name: str) -> float:
+        ms = self.elapsed_ms()
+        self.marks.append((name, ms))
+        return ms
+
+    def report(self) -> str:
+        lines = ["[STARTUP] Thời gian khởi động:"]
+        prev = 0.0
+        for name, ms in self.marks:
+            lines.append(f"  {name:<24} {ms:8.0f} ms  (+{ms - prev:.0f})")
+            prev = ms
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        """In report (chỉ lần đầu gọi)"""
+        if self.reported:
+            return
+        self.reported = True
+        print(self.report(), flush=True)
+
+
+# Singleton
+startup_timer = StartupTimer()